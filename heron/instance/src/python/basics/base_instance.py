@@ -98,11 +98,17 @@ class BaseInstance(object):
 
     self.logger.log(_log_level, message)
 
-  def admit_data_tuple(self, stream_id, data_tuple, tuple_size_in_bytes):
-    self.output_helper.add_data_tuple(stream_id, data_tuple, tuple_size_in_bytes)
+  def admit_data_tuple(self, stream_id, values, tuple_size_in_bytes,
+                       dest_task_ids=None, roots=None, grouping_values=None):
+    return self.output_helper.add_new_data_tuple(stream_id, values, tuple_size_in_bytes,
+                                                 dest_task_ids, roots, grouping_values)
 
-  def admit_control_tuple(self, control_tuple, tuple_size_in_bytes, is_ack):
-    self.output_helper.add_control_tuple(control_tuple, tuple_size_in_bytes, is_ack)
+  def admit_control_tuple(self, acked_tuple_id, roots, tuple_size_in_bytes, is_ack):
+    return self.output_helper.add_new_control_tuple(acked_tuple_id, roots,
+                                                    tuple_size_in_bytes, is_ack)
+
+  def admit_ack_tuple(self, acked_tuple_id, roots, is_ack):
+    self.output_helper.add_ack_tuple(acked_tuple_id, roots, is_ack)
 
   def admit_ckpt_state(self, ckpt_id, ckpt_state):
     self.output_helper.add_ckpt_state(ckpt_id, self.serializer.serialize(ckpt_state))
@@ -20,6 +20,7 @@
 
 '''bolt_instance.py: module for base bolt for python topology'''
 
+import itertools
 import time
 import Queue
 
@@ -32,7 +33,9 @@ from heron.common.src.python.utils.log import Log
 from heron.proto import topology_pb2, tuple_pb2, ckptmgr_pb2
 
 from heron.instance.src.python.utils.metrics import BoltMetrics
-from heron.instance.src.python.utils.tuple import TupleHelper, HeronTuple
+from heron.instance.src.python.utils.misc import BatchController
+from heron.instance.src.python.utils.tuple import (TupleHelper, HeronTuple, LazyDataTupleSet,
+                                                   LazyTupleValues)
 
 import heron.instance.src.python.utils.system_constants as system_constants
 
@@ -40,6 +43,8 @@ from .base_instance import BaseInstance
 
 class BoltInstance(BaseInstance):
   """The base class for all heron bolts in Python"""
+  # number of tuples of a set deserialized at once, so that a whole set is never parsed up front
+  DESERIALIZE_BATCH_SIZE = 64
 
   def __init__(self, pplan_helper, in_stream, out_stream, looper):
     super(BoltInstance, self).__init__(pplan_helper, in_stream, out_stream, looper)
@@ -56,9 +61,20 @@ class BoltInstance(BaseInstance):
     mode = context.get_cluster_config().get(api_constants.TOPOLOGY_RELIABILITY_MODE,
                                             api_constants.TopologyReliabilityMode.ATMOST_ONCE)
     self.acking_enabled = bool(mode == api_constants.TopologyReliabilityMode.ATLEAST_ONCE)
+    self.lazy_deserialization = bool(context.get_cluster_config().get(
+        api_constants.TOPOLOGY_SERIALIZER_LAZY_DESERIALIZATION, False))
     self._initialized_metrics_and_tasks = False
     Log.info("Enable ACK: %s" % str(self.acking_enabled))
 
+    # unit of a batch is an executed tuple
+    self.batch_controller = BatchController(
+      max_batch_time=float(self.sys_config[system_constants.INSTANCE_EXECUTE_BATCH_TIME_MS]) *
+      system_constants.MS_TO_SEC,
+      max_batch_bytes=int(self.sys_config[system_constants.INSTANCE_EXECUTE_BATCH_SIZE_BYTES]),
+      expected_queue_size=int(
+        self.sys_config[system_constants.INSTANCE_TUNING_EXPECTED_BOLT_WRITE_QUEUE_SIZE]),
+      sample_weight=float(self.sys_config[system_constants.INSTANCE_TUNING_CURRENT_SAMPLE_WEIGHT]))
+
     # load user's bolt class
     bolt_impl_class = super(BoltInstance, self).load_py_instance(is_spout=False)
     self.bolt_impl = bolt_impl_class(delegate=self)
@@ -70,6 +86,10 @@ class BoltInstance(BaseInstance):
     if self.is_stateful and isinstance(self.bolt_impl, StatefulComponent):
       self.bolt_impl.init_state(stateful_state)
     self.bolt_impl.initialize(config=context.get_cluster_config(), context=context)
+    if context.task_hooks and self.bolt_metrics.execute_sampler.interval > 1:
+      # task hooks are given the latencies of every tuple
+      Log.info("Task hooks are registered, latency sampling is disabled")
+      self.bolt_metrics.set_latency_sampling(1)
     # prepare tick tuple
     if not self._initialized_metrics_and_tasks:
       self._prepare_tick_tup_timer()
@@ -110,46 +130,57 @@ class BoltInstance(BaseInstance):
     self.pplan_helper.check_output_schema(stream, tup)
 
     # get custom grouping target task ids; get empty list if not custom grouping
-    custom_target_task_ids = self.pplan_helper.choose_tasks_for_custom_grouping(stream, tup)
+    grouping_values = None
+    if direct_task is None and not need_task_ids and \
+        self.pplan_helper.is_custom_grouping_batched(stream):
+      # target task ids are chosen for the whole tuple set when it is sent out
+      custom_target_task_ids = None
+      grouping_values = tup
+    else:
+      custom_target_task_ids = self.pplan_helper.choose_tasks_for_custom_grouping(stream, tup)
 
     self.pplan_helper.context.invoke_hook_emit(tup, stream, None)
 
-    data_tuple = tuple_pb2.HeronDataTuple()
-    data_tuple.key = 0
-
+    dest_task_ids = None
     if direct_task is not None:
       if not isinstance(direct_task, int):
         raise TypeError("direct_task argument needs to be an integer, given: %s"
                         % str(type(direct_task)))
       # performing emit-direct
-      data_tuple.dest_task_ids.append(direct_task)
+      dest_task_ids = [direct_task]
     elif custom_target_task_ids is not None:
-      for task_id in custom_target_task_ids:
-        # for custom grouping
-        data_tuple.dest_task_ids.append(task_id)
+      # for custom grouping
+      dest_task_ids = custom_target_task_ids
 
     # Set the anchors for a tuple
+    merged_roots = None
     if anchors is not None:
-      merged_roots = set()
-      for tup in [t for t in anchors if isinstance(t, HeronTuple) and t.roots is not None]:
-        merged_roots.update(tup.roots)
-      for rt in merged_roots:
-        to_add = data_tuple.roots.add()
-        to_add.CopyFrom(rt)
+      # RootId messages are unhashable, so they are deduplicated by their fields
+      merged_roots = {}
+      for anchor in [t for t in anchors if isinstance(t, HeronTuple) and t.roots is not None]:
+        for rt in anchor.roots:
+          merged_roots[(rt.taskid, rt.key)] = rt
+      merged_roots = merged_roots.values()
 
     tuple_size_in_bytes = 0
-    start_time = time.time()
+    sampler = self.bolt_metrics.serialize_sampler
+    sampled = sampler.sample()
+    if sampled:
+      start_time = time.time()
 
     # Serialize
-    for obj in tup:
-      serialized = self.serializer.serialize(obj)
-      data_tuple.values.append(serialized)
+    values = self.serializer.serialize_tuple(self.pplan_helper.my_component_name, stream, tup)
+    for serialized in values:
       tuple_size_in_bytes += len(serialized)
-    serialize_latency_ns = (time.time() - start_time) * system_constants.SEC_TO_NS
-    self.bolt_metrics.serialize_data_tuple(stream, serialize_latency_ns)
+    if sampled:
+      serialize_latency_ns = (time.time() - start_time) * system_constants.SEC_TO_NS
+      self.bolt_metrics.serialize_data_tuple(stream, serialize_latency_ns, sampler.interval)
 
-    super(BoltInstance, self).admit_data_tuple(stream_id=stream, data_tuple=data_tuple,
-                                               tuple_size_in_bytes=tuple_size_in_bytes)
+    # the tuple is built directly inside the buffered tuple set
+    super(BoltInstance, self).admit_data_tuple(stream_id=stream, values=values,
+                                               tuple_size_in_bytes=tuple_size_in_bytes,
+                                               dest_task_ids=dest_task_ids, roots=merged_roots,
+                                               grouping_values=grouping_values)
 
     self.bolt_metrics.update_emit_count(stream)
     if need_task_ids:
@@ -173,58 +204,87 @@ class BoltInstance(BaseInstance):
       self.bolt_metrics.update_out_queue_full_count()
 
   def _read_tuples_and_execute(self):
-    start_cycle_time = time.time()
-    total_data_emitted_bytes_before = self.get_total_data_emitted_in_bytes()
-    exec_batch_time = \
-      self.sys_config[system_constants.INSTANCE_EXECUTE_BATCH_TIME_MS] * system_constants.MS_TO_SEC
-    exec_batch_size = self.sys_config[system_constants.INSTANCE_EXECUTE_BATCH_SIZE_BYTES]
+    batch_controller = self.batch_controller
+    batch_controller.start_batch(self.output_helper.get_out_queue_size(),
+                                 self.get_total_data_emitted_in_bytes())
+    self.bolt_metrics.update_batch(batch_controller.batch_size,
+                                   batch_controller.time_budget * system_constants.SEC_TO_NS)
+
     while not self.in_stream.is_empty():
       try:
         tuples = self.in_stream.poll()
       except Queue.Empty:
         break
 
-      if isinstance(tuples, tuple_pb2.HeronTupleSet):
+      executed = 1
+      if isinstance(tuples, tuple_pb2.HeronTupleSet2):
         if tuples.HasField("control"):
           raise RuntimeError("Bolt cannot get acks/fails from other components")
         elif tuples.HasField("data"):
-          stream = tuples.data.stream
-
-          for data_tuple in tuples.data.tuples:
-            self._handle_data_tuple(data_tuple, stream)
+          data_tuple_set = LazyDataTupleSet(tuples.data)
+          executed = len(data_tuple_set)
+          self._handle_data_tuple_set(data_tuple_set)
         else:
           Log.error("Received tuple neither data nor control")
       elif isinstance(tuples, ckptmgr_pb2.InitiateStatefulCheckpoint):
         self.handle_initiate_stateful_checkpoint(tuples, self.bolt_impl)
       else:
-        Log.error("Received tuple not instance of HeronTupleSet")
+        Log.error("Received tuple not instance of HeronTupleSet2")
 
-      if (time.time() - start_cycle_time - exec_batch_time > 0) or \
-          (self.get_total_data_emitted_in_bytes() - total_data_emitted_bytes_before
-           > exec_batch_size):
+      if batch_controller.add(executed, self.get_total_data_emitted_in_bytes()):
         # batch reached
         break
 
-  def _handle_data_tuple(self, data_tuple, stream):
-    start_time = time.time()
-
-    values = []
-    for value in data_tuple.values:
-      values.append(self.serializer.deserialize(value))
+    batch_controller.finish_batch()
+
+  def _handle_data_tuple_set(self, data_tuple_set):
+    stream = data_tuple_set.stream
+    stream_metrics = self.bolt_metrics.get_input_stream_metrics(stream.id, stream.component_name)
+
+    if self.lazy_deserialization:
+      # tuples of a set are created at once
+      creation_time = time.time()
+      # values are deserialized by the bolt as it reads them, as part of its execution, so the
+      # time spent is in the execute latency rather than the deserialization time metric
+      for data_tuple in data_tuple_set:
+        values = LazyTupleValues(data_tuple.values, self.serializer,
+                                 stream.component_name, stream.id)
+        self._handle_data_tuple(data_tuple, stream, values, stream_metrics, creation_time)
+      return
 
+    # deserialize the set a batch of tuples at a time
+    data_tuple_iter = iter(data_tuple_set)
+    while True:
+      data_tuples = list(itertools.islice(data_tuple_iter, self.DESERIALIZE_BATCH_SIZE))
+      if not data_tuples:
+        return
+      creation_time = time.time()
+      values_batch = self.serializer.deserialize_batch(
+          stream.component_name, stream.id, [data_tuple.values for data_tuple in data_tuples])
+      deserialize_latency_ns = (time.time() - creation_time) * system_constants.SEC_TO_NS
+      stream_metrics.deserialize_data_tuple(deserialize_latency_ns)
+
+      for data_tuple, values in zip(data_tuples, values_batch):
+        self._handle_data_tuple(data_tuple, stream, values, stream_metrics, creation_time)
+
+  def _handle_data_tuple(self, data_tuple, stream, values, stream_metrics, creation_time):
     # create HeronTuple
-    tup = TupleHelper.make_tuple(stream, data_tuple.key, values, roots=data_tuple.roots)
+    tup = TupleHelper.make_tuple(stream, data_tuple.key, values, roots=data_tuple.roots,
+                                 creation_time=creation_time)
+
+    sampler = self.bolt_metrics.execute_sampler
+    if not sampler.sample():
+      self.bolt_impl.process(tup)
+      stream_metrics.execute_tuple()
+      return
 
-    deserialized_time = time.time()
+    start_time = time.time()
     self.bolt_impl.process(tup)
-    execute_latency_ns = (time.time() - deserialized_time) * system_constants.SEC_TO_NS
-    deserialize_latency_ns = (deserialized_time - start_time) * system_constants.SEC_TO_NS
+    execute_latency_ns = (time.time() - start_time) * system_constants.SEC_TO_NS
 
     self.pplan_helper.context.invoke_hook_bolt_execute(tup, execute_latency_ns)
 
-    self.bolt_metrics.deserialize_data_tuple(stream.id, stream.component_name,
-                                             deserialize_latency_ns)
-    self.bolt_metrics.execute_tuple(stream.id, stream.component_name, execute_latency_ns)
+    stream_metrics.execute_tuple(execute_latency_ns, sampler.interval)
 
   def _prepare_tick_tup_timer(self):
     cluster_config = self.pplan_helper.context.get_cluster_config()
@@ -254,16 +314,11 @@ class BoltInstance(BaseInstance):
       return
 
     if self.acking_enabled:
-      ack_tuple = tuple_pb2.AckTuple()
-      ack_tuple.ackedtuple = int(tup.id)
-
-      tuple_size_in_bytes = 0
-      for rt in tup.roots:
-        to_add = ack_tuple.roots.add()
-        to_add.CopyFrom(rt)
-        tuple_size_in_bytes += rt.ByteSize()
-      super(BoltInstance, self).admit_control_tuple(ack_tuple, tuple_size_in_bytes, True)
+      self.admit_ack_tuple(tup.key, tup.roots, True)
 
+    if not self.bolt_metrics.ack_sampler.sample():
+      self.bolt_metrics.acked_tuple(tup.stream, tup.component)
+      return
     process_latency_ns = (time.time() - tup.creation_time) * system_constants.SEC_TO_NS
     self.pplan_helper.context.invoke_hook_bolt_ack(tup, process_latency_ns)
     self.bolt_metrics.acked_tuple(tup.stream, tup.component, process_latency_ns)
@@ -278,16 +333,11 @@ class BoltInstance(BaseInstance):
       return
 
     if self.acking_enabled:
-      fail_tuple = tuple_pb2.AckTuple()
-      fail_tuple.ackedtuple = int(tup.id)
-
-      tuple_size_in_bytes = 0
-      for rt in tup.roots:
-        to_add = fail_tuple.roots.add()
-        to_add.CopyFrom(rt)
-        tuple_size_in_bytes += rt.ByteSize()
-      super(BoltInstance, self).admit_control_tuple(fail_tuple, tuple_size_in_bytes, False)
+      self.admit_ack_tuple(tup.key, tup.roots, False)
 
+    if not self.bolt_metrics.ack_sampler.sample():
+      self.bolt_metrics.failed_tuple(tup.stream, tup.component)
+      return
     fail_latency_ns = (time.time() - tup.creation_time) * system_constants.SEC_TO_NS
     self.pplan_helper.context.invoke_hook_bolt_fail(tup, fail_latency_ns)
     self.bolt_metrics.failed_tuple(tup.stream, tup.component, fail_latency_ns)
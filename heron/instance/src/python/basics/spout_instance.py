@@ -20,7 +20,6 @@
 
 '''spout_instance.py: module for base spout for python topology'''
 
-import Queue
 import time
 import collections
 
@@ -31,7 +30,7 @@ from heronpy.api.state.stateful_component import StatefulComponent
 from heron.common.src.python.utils.log import Log
 
 from heron.instance.src.python.utils.metrics import SpoutMetrics
-from heron.instance.src.python.utils.tuple import TupleHelper
+from heron.instance.src.python.utils.misc import BatchController, PendingTupleTracker
 
 from heron.proto import topology_pb2, tuple_pb2, ckptmgr_pb2
 
@@ -42,6 +41,8 @@ from .base_instance import BaseInstance
 # pylint: disable=too-many-instance-attributes
 class SpoutInstance(BaseInstance):
   """The base class for all heron spouts in Python"""
+  # number of buffered tuple sets handled between two checks of INSTANCE_ACK_BATCH_TIME_MS
+  READ_BATCH_SIZE = 16
 
   def __init__(self, pplan_helper, in_stream, out_stream, looper):
     super(SpoutInstance, self).__init__(pplan_helper, in_stream, out_stream, looper)
@@ -63,11 +64,22 @@ class SpoutInstance(BaseInstance):
     Log.info("Enable ACK: %s" % str(self.acking_enabled))
     Log.info("Enable Message Timeouts: %s" % str(self.enable_message_timeouts))
 
-    # map <tuple_info.key -> tuple_info>, ordered by insertion time
-    self.in_flight_tuples = collections.OrderedDict()
+    self.in_flight_tuples = PendingTupleTracker()
+    # (tuple_id, stream_id) of tuples to ack right away when acking is disabled
     self.immediate_acks = collections.deque()
     self.total_tuples_emitted = 0
 
+    # unit of a batch is a call of next_tuple()
+    self.batch_controller = BatchController(
+      max_batch_time=float(self.sys_config[system_constants.INSTANCE_EMIT_BATCH_TIME_MS]) *
+      system_constants.MS_TO_SEC,
+      max_batch_bytes=int(self.sys_config[system_constants.INSTANCE_EMIT_BATCH_SIZE_BYTES]),
+      expected_queue_size=int(
+        self.sys_config[system_constants.INSTANCE_TUNING_EXPECTED_SPOUT_WRITE_QUEUE_SIZE]),
+      sample_weight=float(self.sys_config[system_constants.INSTANCE_TUNING_CURRENT_SAMPLE_WEIGHT]),
+      on_sample=lambda count, latency: self.spout_metrics.next_tuple(
+        latency * system_constants.SEC_TO_NS, count=count))
+
     # load user's spout class
     spout_impl_class = super(SpoutInstance, self).load_py_instance(is_spout=True)
     self.spout_impl = spout_impl_class(delegate=self)
@@ -122,50 +134,58 @@ class SpoutInstance(BaseInstance):
     self.pplan_helper.check_output_schema(stream, tup)
 
     # get custom grouping target task ids; get empty list if not custom grouping
-    custom_target_task_ids = self.pplan_helper.choose_tasks_for_custom_grouping(stream, tup)
+    grouping_values = None
+    if direct_task is None and not need_task_ids and \
+        self.pplan_helper.is_custom_grouping_batched(stream):
+      # target task ids are chosen for the whole tuple set when it is sent out
+      custom_target_task_ids = None
+      grouping_values = tup
+    else:
+      custom_target_task_ids = self.pplan_helper.choose_tasks_for_custom_grouping(stream, tup)
 
     self.pplan_helper.context.invoke_hook_emit(tup, stream, None)
 
-    data_tuple = tuple_pb2.HeronDataTuple()
-    data_tuple.key = 0
-
+    dest_task_ids = None
     if direct_task is not None:
       if not isinstance(direct_task, int):
         raise TypeError("direct_task argument needs to be an integer, given: %s"
                         % str(type(direct_task)))
       # performing emit-direct
-      data_tuple.dest_task_ids.append(direct_task)
+      dest_task_ids = [direct_task]
     elif custom_target_task_ids is not None:
       # for custom grouping
-      for task_id in custom_target_task_ids:
-        data_tuple.dest_task_ids.append(task_id)
-
-    if tup_id is not None:
-      tuple_info = TupleHelper.make_root_tuple_info(stream, tup_id)
-      if self.acking_enabled:
-        # this message is rooted
-        root = data_tuple.roots.add()
-        root.taskid = self.pplan_helper.my_task_id
-        root.key = tuple_info.key
-        self.in_flight_tuples[tuple_info.key] = tuple_info
-      else:
-        self.immediate_acks.append(tuple_info)
+      dest_task_ids = custom_target_task_ids
 
     tuple_size_in_bytes = 0
 
-    start_time = time.time()
+    sampler = self.spout_metrics.serialize_sampler
+    sampled = sampler.sample()
+    if sampled:
+      start_time = time.time()
 
     # Serialize
-    for obj in tup:
-      serialized = self.serializer.serialize(obj)
-      data_tuple.values.append(serialized)
+    values = self.serializer.serialize_tuple(self.pplan_helper.my_component_name, stream, tup)
+    for serialized in values:
       tuple_size_in_bytes += len(serialized)
 
-    serialize_latency_ns = (time.time() - start_time) * system_constants.SEC_TO_NS
-    self.spout_metrics.serialize_data_tuple(stream, serialize_latency_ns)
+    if sampled:
+      serialize_latency_ns = (time.time() - start_time) * system_constants.SEC_TO_NS
+      self.spout_metrics.serialize_data_tuple(stream, serialize_latency_ns, sampler.interval)
+
+    # the tuple is built directly inside the buffered tuple set
+    data_tuple = super(SpoutInstance, self).admit_data_tuple(
+        stream_id=stream, values=values, tuple_size_in_bytes=tuple_size_in_bytes,
+        dest_task_ids=dest_task_ids, grouping_values=grouping_values)
+
+    if tup_id is not None:
+      if self.acking_enabled:
+        # this message is rooted
+        root = data_tuple.roots.add()
+        root.taskid = self.pplan_helper.my_task_id
+        root.key = self.in_flight_tuples.add(stream, tup_id, time.time())
+      else:
+        self.immediate_acks.append((tup_id, stream))
 
-    super(SpoutInstance, self).admit_data_tuple(stream_id=stream, data_tuple=data_tuple,
-                                                tuple_size_in_bytes=tuple_size_in_bytes)
     self.total_tuples_emitted += 1
     self.spout_metrics.update_emit_count(stream)
     if need_task_ids:
@@ -183,25 +203,23 @@ class SpoutInstance(BaseInstance):
     ack_batch_time = self.sys_config[system_constants.INSTANCE_ACK_BATCH_TIME_MS] * \
                      system_constants.MS_TO_SEC
     while not self.in_stream.is_empty():
-      try:
-        tuples = self.in_stream.poll()
-      except Queue.Empty:
-        break
-
-      if isinstance(tuples, tuple_pb2.HeronTupleSet):
-        if tuples.HasField("data"):
-          raise RuntimeError("Spout cannot get incoming data tuples from other components")
-        elif tuples.HasField("control"):
-          for ack_tuple in tuples.control.acks:
-            self._handle_ack_tuple(ack_tuple, True)
-          for fail_tuple in tuples.control.fails:
-            self._handle_ack_tuple(fail_tuple, False)
+      # acks and fails are cheap, so a few buffered sets are handled at once, but not a whole
+      # backlog, which would starve next_tuple()
+      for tuples in self.in_stream.poll_many(self.READ_BATCH_SIZE):
+        if isinstance(tuples, tuple_pb2.HeronTupleSet2):
+          if tuples.HasField("data"):
+            raise RuntimeError("Spout cannot get incoming data tuples from other components")
+          elif tuples.HasField("control"):
+            for ack_tuple in tuples.control.acks:
+              self._handle_ack_tuple(ack_tuple, True)
+            for fail_tuple in tuples.control.fails:
+              self._handle_ack_tuple(fail_tuple, False)
+          else:
+            Log.error("Received tuple neither data nor control")
+        elif isinstance(tuples, ckptmgr_pb2.InitiateStatefulCheckpoint):
+          self.handle_initiate_stateful_checkpoint(tuples, self.spout_impl)
         else:
-          Log.error("Received tuple neither data nor control")
-      elif isinstance(tuples, ckptmgr_pb2.InitiateStatefulCheckpoint):
-        self.handle_initiate_stateful_checkpoint(tuples, self.spout_impl)
-      else:
-        Log.error("Received tuple not instance of HeronTupleSet")
+          Log.error("Received tuple not instance of HeronTupleSet2")
 
       # avoid spending too much time here
       if time.time() - start_cycle_time - ack_batch_time > 0:
@@ -213,29 +231,25 @@ class SpoutInstance(BaseInstance):
       self.pplan_helper.context.get_cluster_config().get(api_constants.TOPOLOGY_MAX_SPOUT_PENDING)
 
     total_tuples_emitted_before = self.total_tuples_emitted
-    total_data_emitted_bytes_before = self.get_total_data_emitted_in_bytes()
-    emit_batch_time = \
-      float(self.sys_config[system_constants.INSTANCE_EMIT_BATCH_TIME_MS]) * \
-      system_constants.MS_TO_SEC
-    emit_batch_size = int(self.sys_config[system_constants.INSTANCE_EMIT_BATCH_SIZE_BYTES])
-    start_cycle_time = time.time()
+    batch_controller = self.batch_controller
+    batch_controller.start_batch(self.output_helper.get_out_queue_size(),
+                                 self.get_total_data_emitted_in_bytes())
+    self.spout_metrics.update_batch(batch_controller.batch_size,
+                                    batch_controller.time_budget * system_constants.SEC_TO_NS)
 
     while (self.acking_enabled and max_spout_pending > len(self.in_flight_tuples)) or \
         not self.acking_enabled:
-      start_time = time.time()
       self.spout_impl.next_tuple()
-      next_tuple_latency_ns = (time.time() - start_time) * system_constants.SEC_TO_NS
-      self.spout_metrics.next_tuple(next_tuple_latency_ns)
 
-      if (self.total_tuples_emitted == total_tuples_emitted_before) or \
-        (time.time() - start_cycle_time - emit_batch_time > 0) or \
-        (self.get_total_data_emitted_in_bytes() - total_data_emitted_bytes_before >
-         emit_batch_size):
+      if batch_controller.add(1, self.get_total_data_emitted_in_bytes()) or \
+          self.total_tuples_emitted == total_tuples_emitted_before:
         # no tuples to emit or batch reached
         break
 
       total_tuples_emitted_before = self.total_tuples_emitted
 
+    batch_controller.finish_batch()
+
   def _add_spout_task(self):
     Log.info("Adding spout task...")
     def spout_task():
@@ -305,21 +319,13 @@ class SpoutInstance(BaseInstance):
     n_bucket = self.sys_config.get(system_constants.INSTANCE_ACKNOWLEDGEMENT_NBUCKETS)
     now = time.time()
 
-    timeout_lst = []
-    while self.in_flight_tuples:
-      key = next(iter(self.in_flight_tuples))
-      tuple_info = self.in_flight_tuples[key]
-      if tuple_info.is_expired(now, timeout_sec):
-        timeout_lst.append(tuple_info)
-        self.in_flight_tuples.pop(key)
-      else:
-        # in_flight_tuples are ordered by insertion time
-        break
+    timeout_lst = self.in_flight_tuples.expire(now, timeout_sec)
+    # tuples emitted until the next look are kept in a new bucket
+    self.in_flight_tuples.rotate()
 
-    for tuple_info in timeout_lst:
-      self.spout_metrics.timeout_tuple(tuple_info.stream_id)
-      self._invoke_fail(tuple_info.tuple_id, tuple_info.stream_id,
-                        timeout_sec * system_constants.SEC_TO_NS)
+    for stream_id, tuple_id, _ in timeout_lst:
+      self.spout_metrics.timeout_tuple(stream_id)
+      self._invoke_fail(tuple_id, stream_id, timeout_sec * system_constants.SEC_TO_NS)
 
     # register this method to timer again
     self.looper.register_timer_task_in_sec(self._look_for_timeouts, float(timeout_sec) / n_bucket)
@@ -330,25 +336,23 @@ class SpoutInstance(BaseInstance):
       if rt.taskid != self.pplan_helper.my_task_id:
         raise RuntimeError("Receiving tuple for task: %s in task: %s"
                            % (str(rt.taskid), str(self.pplan_helper.my_task_id)))
-      try:
-        tuple_info = self.in_flight_tuples.pop(rt.key)
-      except KeyError:
+      tuple_info = self.in_flight_tuples.remove(rt.key)
+      if tuple_info is None:
         # rt.key is not in in_flight_tuples -> already removed due to time-out
         return
 
-      # pylint: disable=no-member
-      if tuple_info.tuple_id is not None:
-        latency_ns = (time.time() - tuple_info.insertion_time) * system_constants.SEC_TO_NS
-        if is_success:
-          self._invoke_ack(tuple_info.tuple_id, tuple_info.stream_id, latency_ns)
-        else:
-          self._invoke_fail(tuple_info.tuple_id, tuple_info.stream_id, latency_ns)
+      stream_id, tuple_id, insertion_time = tuple_info
+      latency_ns = (time.time() - insertion_time) * system_constants.SEC_TO_NS
+      if is_success:
+        self._invoke_ack(tuple_id, stream_id, latency_ns)
+      else:
+        self._invoke_fail(tuple_id, stream_id, latency_ns)
 
   def _do_immediate_acks(self):
     size = len(self.immediate_acks)
     for _ in range(size):
-      tuple_info = self.immediate_acks.pop()
-      self._invoke_ack(tuple_info.tuple_id, tuple_info.stream_id, 0)
+      tuple_id, stream_id = self.immediate_acks.pop()
+      self._invoke_ack(tuple_id, stream_id, 0)
 
   def _invoke_ack(self, tuple_id, stream_id, complete_latency_ns):
     Log.debug("In invoke_ack(): Acking %s from stream: %s" % (str(tuple_id), stream_id))
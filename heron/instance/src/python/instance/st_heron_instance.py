@@ -41,7 +41,7 @@ from heron.instance.src.python.utils.misc import PhysicalPlanHelper
 from heron.instance.src.python.utils.metrics import GatewayMetrics, PyMetrics, MetricsCollector
 from heron.instance.src.python.network import MetricsManagerClient, SingleThreadStmgrClient
 from heron.instance.src.python.network import create_socket_options
-from heron.instance.src.python.network import GatewayLooper
+from heron.instance.src.python.network import create_gateway_looper
 from heron.instance.src.python.basics import SpoutInstance, BoltInstance
 import heron.instance.src.python.utils.system_constants as constants
 from heron.instance.src.python.utils import system_config
@@ -68,14 +68,14 @@ class SingleThreadHeronInstance(object):
     self.topo_pex_file_abs_path = os.path.abspath(topo_pex_file_path)
     self.sys_config = system_config.get_sys_config()
 
-    self.in_stream = HeronCommunicator(producer_cb=None, consumer_cb=None)
-    self.out_stream = HeronCommunicator(producer_cb=None, consumer_cb=None)
+    self.in_stream = HeronCommunicator(producer_cb=None, consumer_cb=None, single_thread=True)
+    self.out_stream = HeronCommunicator(producer_cb=None, consumer_cb=None, single_thread=True)
 
     self.socket_map = dict()
-    self.looper = GatewayLooper(self.socket_map)
+    self.looper = create_gateway_looper(self.socket_map)
 
     # Initialize metrics related
-    self.out_metrics = HeronCommunicator()
+    self.out_metrics = HeronCommunicator(single_thread=True)
     self.out_metrics.\
       register_capacity(self.sys_config[constants.INSTANCE_INTERNAL_METRICS_WRITE_QUEUE_CAPACITY])
     self.metrics_collector = MetricsCollector(self.looper, self.out_metrics)
@@ -117,27 +117,17 @@ class SingleThreadHeronInstance(object):
 
   def handle_new_tuple_set_2(self, hts2):
     """Called when new HeronTupleSet2 arrives
-       Convert(Assemble) HeronTupleSet2(raw byte array) to HeronTupleSet
-       See more at GitHub PR #1421
+
+    The HeronTupleSet2 is queued as is; its data tuples are parsed lazily by the bolt
+    while it iterates over them (see ``LazyDataTupleSet``).
+    See more at GitHub PR #1421
+
     :param tuple_msg_set: HeronTupleSet2 type
     """
     if self.my_pplan_helper is None or self.my_instance is None:
       Log.error("Got tuple set when no instance assigned yet")
     else:
-      hts = tuple_pb2.HeronTupleSet()
-      if hts2.HasField('control'):
-        hts.control.CopyFrom(hts2.control)
-      else:
-        hdts = tuple_pb2.HeronDataTupleSet()
-        hdts.stream.CopyFrom(hts2.data.stream)
-        try:
-          for trunk in hts2.data.tuples:
-            added_tuple = hdts.tuples.add()
-            added_tuple.ParseFromString(trunk)
-        except Exception:
-          Log.exception('Fail to deserialize HeronDataTuple')
-        hts.data.CopyFrom(hdts)
-      self.in_stream.offer(hts)
+      self.in_stream.offer(hts2)
       if self.my_pplan_helper.is_topology_running():
         self.my_instance.py_class.process_incoming_tuples()
 
@@ -195,8 +185,9 @@ class SingleThreadHeronInstance(object):
 
   def send_buffered_messages(self):
     """Send messages in out_stream to the Stream Manager"""
-    while not self.out_stream.is_empty() and self._stmgr_client.is_registered:
-      tuple_set = self.out_stream.poll()
+    if not self._stmgr_client.is_registered:
+      return
+    for tuple_set in self.out_stream.poll_many():
       if isinstance(tuple_set, tuple_pb2.HeronTupleSet):
         tuple_set.src_task_id = self.my_pplan_helper.my_task_id
         self.gateway_metrics.update_sent_packet(tuple_set.ByteSize())
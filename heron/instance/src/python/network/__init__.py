@@ -18,8 +18,8 @@
 __all__ = ['event_looper', 'gateway_looper', 'metricsmgr_client',
            'heron_client', 'st_stmgr_client', 'protocol', 'socket_options']
 
-from .event_looper import EventLooper
-from .gateway_looper import GatewayLooper
+from .event_looper import EventLooper, TimerTask
+from .gateway_looper import GatewayLooper, EpollGatewayLooper, create_gateway_looper
 from .protocol import HeronProtocol, OutgoingPacket, IncomingPacket, REQID, StatusCode
 from .socket_options import SocketOptions, create_socket_options
 from .metricsmgr_client import MetricsManagerClient
@@ -24,9 +24,77 @@ import traceback
 import sys
 
 from abc import abstractmethod
-from heapq import heappush, heappop
 from heron.common.src.python.utils.log import Log
 
+def _get_monotonic_clock():
+  """Returns a function reading a monotonic clock in seconds, which timers are based on
+
+  time.monotonic() is only available from Python 3.3, so CLOCK_MONOTONIC is read with
+  clock_gettime() on Python 2, falling back to time.time() where it is not available.
+  """
+  if hasattr(time, "monotonic"):
+    return time.monotonic
+  try:
+    if not sys.platform.startswith('linux'):
+      raise OSError("CLOCK_MONOTONIC is only looked up on Linux")
+    import ctypes
+    import ctypes.util
+
+    class Timespec(ctypes.Structure):
+      _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    librt = ctypes.CDLL(ctypes.util.find_library('rt') or 'libc.so.6', use_errno=True)
+    clock_gettime = librt.clock_gettime
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(Timespec)]
+    # CLOCK_MONOTONIC
+    clock_id = 1
+    timespec = Timespec()
+    timespec_ref = ctypes.byref(timespec)
+    if clock_gettime(clock_id, timespec_ref) != 0:
+      raise OSError(ctypes.get_errno(), "clock_gettime(CLOCK_MONOTONIC) failed")
+  except (ImportError, OSError, AttributeError):
+    Log.warning("No monotonic clock available, timers follow changes of the system time")
+    return time.time
+
+  def monotonic():
+    clock_gettime(clock_id, timespec_ref)
+    return timespec.tv_sec + timespec.tv_nsec * 1e-9
+  return monotonic
+
+_clock = _get_monotonic_clock()
+
+class TimerTask(object):
+  """Handle of a timer task returned by ``EventLooper.register_timer_task_in_sec()``
+
+  ``task`` is reset to None once the timer task is triggered or cancelled, so that the
+  function (and whatever it refers to) is released right away.
+  """
+  __slots__ = ('expiration', 'tick', 'task', '_looper')
+
+  def __init__(self, looper, expiration, tick, task):
+    self.expiration = expiration
+    self.tick = tick
+    self.task = task
+    self._looper = looper
+
+  @property
+  def pending(self):
+    """Whether this timer task is neither triggered nor cancelled yet"""
+    return self.task is not None
+
+  def cancel(self):
+    """Cancels this timer task in O(1)
+
+    :returns: True if the timer task was pending, False if it was already triggered or cancelled
+    """
+    if self.task is None:
+      return False
+    self.task = None
+    self._looper._num_timers -= 1
+    # the cached next expiration may be this timer's
+    self._looper._next_expiration = None
+    return True
+
 class EventLooper(object):
   """EventLooper is a Python implementation of WakeableLooper.java
 
@@ -45,15 +113,43 @@ class EventLooper(object):
     tasks will be executed every loop after wakeup.
   - run ``_trigger_timers()``, in which expired timers are executed and removed.
 
+  Timer tasks are kept in a hierarchical timer wheel of ``TIMER_WHEEL_LEVELS`` levels with
+  ``2 ** TIMER_WHEEL_BITS`` slots each. A slot of the lowest level covers ``TIMER_TICK_SEC``
+  seconds, and a slot of each higher level covers a whole revolution of the level below, whose
+  timers are cascaded down when that revolution starts. This makes registering and cancelling
+  a timer task O(1), however many timers are pending.
+
   Note that the EventLooper class is NOT designed to be thread-safe,
   except for ``wake_up()`` method.
   """
+  TIMER_TICK_SEC = 0.01
+  TIMER_WHEEL_BITS = 8
+  TIMER_WHEEL_LEVELS = 4
+  TIMER_WHEEL_SIZE = 1 << TIMER_WHEEL_BITS
+  TIMER_WHEEL_MASK = TIMER_WHEEL_SIZE - 1
+
   def __init__(self):
     self.should_exit = False
     self.wakeup_tasks = []
-    self.timer_tasks = []
     self.exit_tasks = []
 
+    self._timer_origin = _clock()
+    # all timer tasks in ticks before this one are triggered, the ones in this tick may not be
+    self._current_tick = 0
+    self._timer_wheels = [[[] for _ in range(self.TIMER_WHEEL_SIZE)]
+                          for _ in range(self.TIMER_WHEEL_LEVELS)]
+    self._num_timers = 0
+    # cached result of _get_next_expiration(), None if it needs to be recomputed
+    self._next_expiration = None
+
+  @property
+  def timer_tasks(self):
+    """List of (expiration, task) of pending timer tasks, sorted by expiration"""
+    pending = [(timer.expiration, timer.task) for wheel in self._timer_wheels
+               for bucket in wheel for timer in bucket if timer.task is not None]
+    pending.sort(key=lambda x: x[0])
+    return pending
+
   def loop(self):
     """Start loop
 
@@ -115,11 +211,31 @@ class EventLooper(object):
 
     :param task: function to be run at a specified second from now
     :param second: how many seconds to wait before the timer is triggered
+    :returns: ``TimerTask`` handle, which can be used to cancel the timer task
     """
     # Python time is in float
     second_in_float = float(second)
-    expiration = time.time() + second_in_float
-    heappush(self.timer_tasks, (expiration, task))
+    expiration = _clock() + second_in_float
+    tick = max(int((expiration - self._timer_origin) / self.TIMER_TICK_SEC), self._current_tick)
+    timer = TimerTask(self, expiration, tick, task)
+    self._add_timer(timer)
+    self._num_timers += 1
+    if self._next_expiration is not None and expiration < self._next_expiration:
+      self._next_expiration = expiration
+    return timer
+
+  def _add_timer(self, timer):
+    """Puts a timer into the slot of the lowest level that its tick is within a revolution of"""
+    delta = timer.tick - self._current_tick
+    level = 0
+    while level < self.TIMER_WHEEL_LEVELS - 1 and delta >> (self.TIMER_WHEEL_BITS * (level + 1)):
+      level += 1
+    tick = timer.tick
+    if delta >> (self.TIMER_WHEEL_BITS * (level + 1)):
+      # beyond the last level, wait in its farthest slot and get re-cascaded from there
+      tick = self._current_tick + (1 << (self.TIMER_WHEEL_BITS * (level + 1))) - 1
+    index = (tick >> (self.TIMER_WHEEL_BITS * level)) & self.TIMER_WHEEL_MASK
+    self._timer_wheels[level][index].append(timer)
 
   def exit_loop(self):
     """Exits the loop"""
@@ -130,13 +246,58 @@ class EventLooper(object):
     """Get the next timeout from now
 
     This should be used from do_wait().
-    :returns (float) next_timeout, or 10.0 if there are no timer events
+    :returns (float) next_timeout, or sys.maxsize if there are no timer events
     """
-    if len(self.timer_tasks) == 0:
+    if self._num_timers == 0:
       return sys.maxsize
-    else:
-      next_timeout_interval = self.timer_tasks[0][0] - time.time()
-      return next_timeout_interval
+    if self._next_expiration is None:
+      self._next_expiration = self._get_next_expiration()
+    return self._next_expiration - _clock()
+
+  def _get_next_expiration(self):
+    """Returns when the next timer expires, or earlier if timers are to be cascaded down first"""
+    lowest = self._timer_wheels[0]
+    expirations = [timer.expiration for timer in lowest[self._current_tick & self.TIMER_WHEEL_MASK]
+                   if timer.task is not None]
+    if expirations:
+      return min(expirations)
+
+    next_tick = self._get_next_timer_tick()
+    if next_tick & self.TIMER_WHEEL_MASK != 0:
+      expirations = [timer.expiration for timer in lowest[next_tick & self.TIMER_WHEEL_MASK]
+                     if timer.task is not None]
+      if expirations:
+        return min(expirations)
+    return self._timer_origin + next_tick * self.TIMER_TICK_SEC
+
+  def _get_next_timer_tick(self):
+    """Returns the next tick with timers in its slot of the lowest level, or at which timers of
+    a higher level are cascaded down, whichever comes first; None if there are no such ticks
+    """
+    bits = self.TIMER_WHEEL_BITS
+    mask = self.TIMER_WHEEL_MASK
+    current_tick = self._current_tick
+    next_tick = None
+
+    lowest = self._timer_wheels[0]
+    for tick in range(current_tick + 1, current_tick + self.TIMER_WHEEL_SIZE):
+      if lowest[tick & mask]:
+        next_tick = tick
+        break
+
+    for level in range(1, self.TIMER_WHEEL_LEVELS):
+      shift = bits * level
+      first_slot = (current_tick >> shift) + 1
+      if next_tick is not None and next_tick < first_slot << shift:
+        # higher levels can't cascade any sooner
+        break
+      wheel = self._timer_wheels[level]
+      for slot in range(first_slot, first_slot + self.TIMER_WHEEL_SIZE):
+        if wheel[slot & mask]:
+          if next_tick is None or slot << shift < next_tick:
+            next_tick = slot << shift
+          break
+    return next_tick
 
   def _execute_wakeup_tasks(self):
     """Executes wakeup tasks, should only be called from loop()"""
@@ -147,7 +308,66 @@ class EventLooper(object):
 
   def _trigger_timers(self):
     """Triggers expired timers"""
-    current = time.time()
-    while len(self.timer_tasks) > 0 and (self.timer_tasks[0][0] - current <= 0):
-      task = heappop(self.timer_tasks)[1]
+    if self._num_timers == 0:
+      # nothing to trigger, just catch up with the clock
+      self._current_tick = int((_clock() - self._timer_origin) / self.TIMER_TICK_SEC)
+      self._next_expiration = None
+      return
+
+    current = _clock()
+    current_tick = int((current - self._timer_origin) / self.TIMER_TICK_SEC)
+    lowest = self._timer_wheels[0]
+    while self._current_tick < current_tick:
+      # all timers of a past tick are expired, including ones registered while triggering them
+      index = self._current_tick & self.TIMER_WHEEL_MASK
+      while lowest[index]:
+        self._run_timers(index)
+      # skip ticks that have nothing to trigger or to cascade
+      next_tick = self._get_next_timer_tick()
+      if next_tick is None or next_tick > current_tick:
+        next_tick = current_tick
+      self._current_tick = next_tick
+      self._next_expiration = None
+      if next_tick & self.TIMER_WHEEL_MASK == 0:
+        self._cascade_timers()
+
+    # timers of the current tick are only partially expired
+    index = self._current_tick & self.TIMER_WHEEL_MASK
+    if lowest[index]:
+      self._run_timers(index, current)
+
+  def _run_timers(self, index, current=None):
+    """Runs timers in the given slot of the lowest level
+
+    If ``current`` is given, only timers expired by then are run, and the others are kept.
+    """
+    lowest = self._timer_wheels[0]
+    bucket = lowest[index]
+    lowest[index] = []
+    if len(bucket) > 1:
+      bucket.sort(key=lambda timer: timer.expiration)
+    for timer in bucket:
+      task = timer.task
+      if task is None:
+        continue
+      if current is not None and timer.expiration > current:
+        lowest[index].append(timer)
+        continue
+      timer.task = None
+      self._num_timers -= 1
+      self._next_expiration = None
       task()
+
+  def _cascade_timers(self):
+    """Moves timers of the revolution that starts at the current tick down to lower levels"""
+    for level in range(1, self.TIMER_WHEEL_LEVELS):
+      index = (self._current_tick >> (self.TIMER_WHEEL_BITS * level)) & self.TIMER_WHEEL_MASK
+      wheel = self._timer_wheels[level]
+      bucket = wheel[index]
+      wheel[index] = []
+      for timer in bucket:
+        if timer.task is not None:
+          self._add_timer(timer)
+      if index != 0:
+        # higher levels only start a new revolution together with this one
+        break
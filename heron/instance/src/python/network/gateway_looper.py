@@ -53,6 +53,8 @@ class GatewayLooper(EventLooper):
 
     # Pipe used for wake up select
     self.pipe_r, self.pipe_w = os.pipe()
+    # set while a wake up byte is in the pipe, so that wake_up() writes at most one
+    self._wakeup_pending = False
 
     self.started = time.time()
     Log.debug("Gateway Looper started time: " + str(time.asctime()))
@@ -65,9 +67,20 @@ class GatewayLooper(EventLooper):
       self.poll(timeout=0.0)
 
   def wake_up(self):
+    if self._wakeup_pending:
+      # looper will wake up anyway, no need for another write
+      return
+    self._wakeup_pending = True
     os.write(self.pipe_w, "\n")
     Log.debug("Wake up called")
 
+  def _drain_wakeup_pipe(self):
+    """Consumes pending wake up bytes, should be called when pipe_r is readable"""
+    Log.debug("Read from pipe")
+    # cleared before reading, so that a concurrent wake_up() is never lost
+    self._wakeup_pending = False
+    os.read(self.pipe_r, 1024)
+
   def on_exit(self):
     super(GatewayLooper, self).on_exit()
     os.close(self.pipe_r)
@@ -110,8 +123,7 @@ class GatewayLooper(EventLooper):
               " [w]: " + str(writable_lst) + " [e]: " + str(error_lst))
 
     if self.pipe_r in readable_lst:
-      Log.debug("Read from pipe")
-      os.read(self.pipe_r, 1024)
+      self._drain_wakeup_pipe()
       readable_lst.remove(self.pipe_r)
 
     if self.sock_map is not None:
@@ -133,3 +145,98 @@ class GatewayLooper(EventLooper):
           continue
         # pylint: disable=W0212
         asyncore._exception(obj)
+
+class EpollGatewayLooper(GatewayLooper):
+  """A GatewayLooper using ``select.epoll`` instead of ``select.select``
+
+  File descriptors stay registered across iterations, and the interest set of a dispatcher
+  is modified only when its ``readable()`` or ``writable()`` changes, instead of rebuilding
+  the fd lists on every ``poll()``. Only available on Linux.
+  """
+  # epoll.poll() takes a timeout in seconds, but overflows on sys.maxsize
+  MAX_TIMEOUT_SEC = 3600.0
+
+  def __init__(self, socket_map):
+    super(EpollGatewayLooper, self).__init__(socket_map)
+    self._epoll = select.epoll()
+    self._epoll.register(self.pipe_r, select.EPOLLIN)
+    # fd -> (dispatcher, its socket, currently registered event mask)
+    self._registered = {}
+
+  def on_exit(self):
+    self._epoll.close()
+    super(EpollGatewayLooper, self).on_exit()
+
+  def _update_registrations(self):
+    """Syncs epoll registrations with the socket map and the dispatchers' interests"""
+    for fd, obj in self.sock_map.items():
+      mask = 0
+      if obj.readable():
+        mask |= select.EPOLLIN | select.EPOLLPRI
+      if obj.writable() and not obj.accepting:
+        mask |= select.EPOLLOUT
+
+      registered = self._registered.get(fd)
+      if registered is not None and registered[0] is obj and registered[1] is obj.socket:
+        if registered[2] == mask:
+          continue
+        try:
+          self._epoll.modify(fd, mask)
+        except IOError as err:
+          # closing a socket removes its fd from epoll behind our back
+          if err.errno != errno.ENOENT:
+            raise
+          self._epoll.register(fd, mask)
+      else:
+        # a new dispatcher, or a dispatcher reconnected with a new socket, possibly on the fd
+        # of a closed one, which closing removed from epoll
+        try:
+          self._epoll.register(fd, mask)
+        except IOError as err:
+          if err.errno != errno.EEXIST:
+            raise
+          self._epoll.modify(fd, mask)
+      self._registered[fd] = (obj, obj.socket, mask)
+
+    for fd in [fd for fd in self._registered if fd not in self.sock_map]:
+      del self._registered[fd]
+      try:
+        self._epoll.unregister(fd)
+      except (IOError, ValueError):
+        # closing the fd already removed it from epoll
+        pass
+
+  def poll(self, timeout=0.0):
+    """Waits for events with epoll and dispatches them to the dispatchers"""
+    if self.sock_map is None:
+      Log.warning("Socket map is not registered to Gateway Looper")
+    else:
+      self._update_registrations()
+
+    timeout = min(timeout, self.MAX_TIMEOUT_SEC)
+    try:
+      events = self._epoll.poll(timeout)
+    except IOError as err:
+      Log.debug("Trivial error: " + str(err))
+      if err.errno != errno.EINTR:
+        raise
+      else:
+        return
+
+    for fd, flags in events:
+      if fd == self.pipe_r:
+        self._drain_wakeup_pipe()
+        continue
+      if self.sock_map is None:
+        continue
+      obj = self.sock_map.get(fd)
+      if obj is None:
+        continue
+      # epoll flags have the same values as poll flags
+      asyncore.readwrite(obj, flags)
+
+def create_gateway_looper(socket_map):
+  """Creates the best GatewayLooper available on this platform"""
+  if hasattr(select, "epoll"):
+    return EpollGatewayLooper(socket_map)
+  return GatewayLooper(socket_map)
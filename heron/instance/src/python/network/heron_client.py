@@ -24,6 +24,8 @@ import asyncore
 import socket
 import traceback
 from abc import abstractmethod
+from collections import deque
+from itertools import islice
 
 import time
 from heron.common.src.python.utils.log import Log
@@ -53,13 +55,16 @@ class HeronClient(asyncore.dispatcher):
     self.hostname = hostname
     self.port = int(port)
     self.endpoint = (self.hostname, self.port)
-    self.out_buffer = []
+    # deque of OutgoingPacket, the head of which may be partially sent
+    self.out_buffer = deque()
     self.socket_options = socket_options
 
     # map <message name -> message.Message object>
     self.registered_message_map = dict()
     self.response_message_map = dict()
     self.context_map = dict()
+    # map <REQID -> TimerTask> of requests sent with a timeout
+    self.timeout_task_map = dict()
     self.incomplete_pkt = None
 
     self.total_bytes_written = 0
@@ -96,7 +101,7 @@ class HeronClient(asyncore.dispatcher):
     self.close()
 
   def _clean_up_state(self):
-    self.out_buffer = []
+    self.out_buffer = deque()
     self.total_bytes_written = 0
     self.total_pkt_written = 0
     self.total_bytes_received = 0
@@ -105,6 +110,9 @@ class HeronClient(asyncore.dispatcher):
     self.registered_message_map = dict()
     self.response_message_map = dict()
     self.context_map = dict()
+    for timeout_task in self.timeout_task_map.values():
+      timeout_task.cancel()
+    self.timeout_task_map = dict()
     self.incomplete_pkt = None
     self._connecting = False
 
@@ -159,20 +167,75 @@ class HeronClient(asyncore.dispatcher):
 
     while (time.time() - start_cycle_time - write_batch_time_sec) < 0 and \
             bytes_written < write_batch_size_bytes and len(self.out_buffer) > 0:
-      outgoing_pkt = self.out_buffer[0]
-      outgoing_pkt.send(self)
-
-      if outgoing_pkt.sent_complete:
-        num_pkt_written += 1
-        bytes_written += len(outgoing_pkt)
-        self.out_buffer.remove(outgoing_pkt)
-      else:
-        # sending this packet not complete yet, will continue later
+      sent, pkts_sent, complete = self._send_coalesced(write_batch_size_bytes - bytes_written)
+      bytes_written += sent
+      num_pkt_written += pkts_sent
+      if not complete:
+        # socket buffer is full, will continue later
         break
 
     self.total_bytes_written += bytes_written
     self.total_pkt_written += num_pkt_written
 
+  def _send_coalesced(self, max_bytes):
+    """Writes as many queued packets as fit in ``max_bytes`` with a single send() call
+
+    The head of ``out_buffer`` is sent from its current offset, and following packets are
+    appended as long as they fit in ``max_bytes``, so that many small packets cost one syscall.
+    The head is always sent, even if it is larger than ``max_bytes``.
+
+    :returns: (bytes sent, number of packets completed, whether everything gathered was sent)
+    """
+    head = self.out_buffer[0]
+    if len(self.out_buffer) == 1 or len(head) - head.offset >= max_bytes:
+      data = head.remaining()
+    else:
+      chunks = [head.raw[head.offset:]]
+      gathered = len(chunks[0])
+      for pkt in islice(self.out_buffer, 1, None):
+        gathered += len(pkt)
+        if gathered > max_bytes:
+          break
+        chunks.append(pkt.raw)
+      data = ''.join(chunks)
+
+    sent = self.send(data)
+
+    remaining = sent
+    pkts_sent = 0
+    while remaining > 0:
+      pkt = self.out_buffer[0]
+      remaining -= pkt.advance(remaining)
+      if pkt.sent_complete:
+        self.out_buffer.popleft()
+        pkts_sent += 1
+
+    self._on_write_syscall(sent, pkts_sent)
+    return sent, pkts_sent, sent == len(data)
+
+  def _on_write_syscall(self, bytes_sent, pkts_sent):
+    """Called after every send() syscall, so that subclasses can export write statistics"""
+    pass
+
+  def recv_into(self, buf, nbytes):
+    """Reads at most ``nbytes`` from the socket directly into ``buf``
+
+    Behaves like ``asyncore.dispatcher.recv()``, but returns the number of bytes read
+    instead of allocating a new string on every call.
+    """
+    try:
+      nread = self.socket.recv_into(buf, nbytes)
+      if nread == 0:
+        # a closed connection is signalled by reading zero bytes
+        self.handle_close()
+      return nread
+    except socket.error as why:
+      # pylint: disable=protected-access
+      if why.args[0] in asyncore._DISCONNECTED:
+        self.handle_close()
+        return 0
+      raise
+
   def writable(self):
     if self._connecting:
       return True
@@ -223,7 +286,8 @@ class HeronClient(asyncore.dispatcher):
     if timeout_sec > 0:
       def timeout_task():
         self.handle_timeout(reqid)
-      self.looper.register_timer_task_in_sec(timeout_task, timeout_sec)
+      self.timeout_task_map[reqid] = \
+        self.looper.register_timer_task_in_sec(timeout_task, timeout_sec)
 
     outgoing_pkt = OutgoingPacket.create_packet(reqid, request)
     self._send_packet(outgoing_pkt)
@@ -236,6 +300,7 @@ class HeronClient(asyncore.dispatcher):
 
   def handle_timeout(self, reqid):
     """Handles timeout"""
+    self.timeout_task_map.pop(reqid, None)
     if reqid in self.context_map:
       context = self.context_map.pop(reqid)
       self.response_message_map.pop(reqid)
@@ -262,10 +327,30 @@ class HeronClient(asyncore.dispatcher):
     # only called when packet.is_complete is True
     # otherwise, it's just an message -- call on_incoming_message()
     typename, reqid, serialized_msg = HeronProtocol.decode_packet(packet)
-    if reqid in self.context_map:
+    if reqid.is_zero():
+      # this is a Message -- no need to send back response
+      # checked first, as data messages never have a context to look up
+      try:
+        if typename not in self.registered_message_map:
+          raise ValueError("%s is not registered in message map" % typename)
+        msg_builder = self.registered_message_map[typename]
+        message = msg_builder()
+        message.ParseFromString(serialized_msg)
+        if message.IsInitialized():
+          self.on_incoming_message(message)
+        else:
+          raise RuntimeError("Message not initialized")
+      except Exception as e:
+        Log.error("Error when handling message packet: %s" % str(e))
+        Log.error(traceback.format_exc())
+        raise RuntimeError("Problem reading message")
+    elif reqid in self.context_map:
       # this incoming packet has the response of a request
       context = self.context_map.pop(reqid)
       response_msg = self.response_message_map.pop(reqid)
+      timeout_task = self.timeout_task_map.pop(reqid, None)
+      if timeout_task is not None:
+        timeout_task.cancel()
 
       try:
         response_msg.ParseFromString(serialized_msg)
@@ -281,22 +366,6 @@ class HeronClient(asyncore.dispatcher):
         Log.error("Response not initialized")
         self._handle_close()
         self.on_error()
-    elif reqid.is_zero():
-      # this is a Message -- no need to send back response
-      try:
-        if typename not in self.registered_message_map:
-          raise ValueError("%s is not registered in message map" % typename)
-        msg_builder = self.registered_message_map[typename]
-        message = msg_builder()
-        message.ParseFromString(serialized_msg)
-        if message.IsInitialized():
-          self.on_incoming_message(message)
-        else:
-          raise RuntimeError("Message not initialized")
-      except Exception as e:
-        Log.error("Error when handling message packet: %s" % str(e))
-        Log.error(traceback.format_exc())
-        raise RuntimeError("Problem reading message")
     else:
       # might be a timeout response
       Log.info("In handle_packet(): Received message whose REQID is not registered: %s"
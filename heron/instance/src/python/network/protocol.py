@@ -19,6 +19,8 @@
 #  under the License.
 
 """Implementation of Heron's application level protocol for Python"""
+import binascii
+import os
 import random
 import socket
 import struct
@@ -40,6 +42,11 @@ class HeronProtocol(object):
     """Unpacks bytestring to int"""
     return struct.unpack(HeronProtocol.INT_PACK_FMT, i)[0]
 
+  @staticmethod
+  def unpack_int_from(buf, offset):
+    """Unpacks int from a buffer at a given offset, without slicing the buffer"""
+    return struct.unpack_from(HeronProtocol.INT_PACK_FMT, buf, offset)[0]
+
   @staticmethod
   def get_size_to_pack_string(string):
     """Get size to pack string, four byte used for specifying length of the string"""
@@ -62,25 +69,34 @@ class HeronProtocol(object):
 
   @staticmethod
   def decode_packet(packet):
-    """Decodes an IncomingPacket object and returns (typename, reqid, serialized message)"""
+    """Decodes an IncomingPacket object and returns (typename, reqid, serialized message)
+
+    The serialized message is a read-only ``buffer`` over the packet's payload, which can
+    be passed to ``ParseFromString()`` without being copied first.
+    """
     if not packet.is_complete:
       raise RuntimeError("In decode_packet(): Packet corrupted")
 
-    data = packet.data
+    # all offsets index into the packet's own buffer, so nothing but the
+    # typename and the REQID is ever copied out of it
+    data = packet.payload
+    view = memoryview(data)
+    offset = 0
 
-    len_typename = HeronProtocol.unpack_int(data[:4])
-    data = data[4:]
+    len_typename = HeronProtocol.unpack_int_from(data, offset)
+    offset += 4
 
-    typename = data[:len_typename]
-    data = data[len_typename:]
+    typename = view[offset:offset + len_typename].tobytes()
+    offset += len_typename
 
-    reqid = REQID.unpack(data[:REQID.REQID_SIZE])
-    data = data[REQID.REQID_SIZE:]
+    reqid = REQID.unpack(view[offset:offset + REQID.REQID_SIZE].tobytes())
+    offset += REQID.REQID_SIZE
 
-    len_msg = HeronProtocol.unpack_int(data[:4])
-    data = data[4:]
+    len_msg = HeronProtocol.unpack_int_from(data, offset)
+    offset += 4
 
-    serialized_msg = data[:len_msg]
+    # read-only view which ParseFromString() accepts as is
+    serialized_msg = buffer(data, offset, len_msg)
 
     return typename, reqid, serialized_msg
 
@@ -88,61 +104,87 @@ class OutgoingPacket(object):
   """Wrapper class for outgoing packet"""
   def __init__(self, raw_data):
     self.raw = str(raw_data)
-    self.to_send = str(raw_data)
+    # number of bytes of ``raw`` already written to the socket
+    self.offset = 0
 
   def __len__(self):
     return len(self.raw)
 
+  # message type name -> packed length of the type name followed by the type name
+  _typename_prefix_cache = {}
+
+  @staticmethod
+  def get_typename_prefix(message):
+    """Returns the packed typename part of a packet for a given message, caching it per type"""
+    typename = message.DESCRIPTOR.full_name
+    prefix = OutgoingPacket._typename_prefix_cache.get(typename)
+    if prefix is None:
+      prefix = HeronProtocol.pack_int(len(typename)) + typename
+      OutgoingPacket._typename_prefix_cache[typename] = prefix
+    return prefix
+
   @staticmethod
   def create_packet(reqid, message):
     """Creates Outgoing Packet from a given reqid and message
 
+    The message is serialized exactly once, and the packet is assembled with a single
+    allocation sized up front.
+
     :param reqid: REQID object
     :param message: protocol buffer object
     """
     assert message.IsInitialized()
-    packet = ''
-
-    # calculate the totla size of the packet incl. header
-    typename = message.DESCRIPTOR.full_name
-
-    datasize = HeronProtocol.get_size_to_pack_string(typename) + \
-               REQID.REQID_SIZE + HeronProtocol.get_size_to_pack_message(message)
-
-    # first write out how much data is there as the header
-    packet += HeronProtocol.pack_int(datasize)
-
-    # next write the type string
-    packet += HeronProtocol.pack_int(len(typename))
-    packet += typename
-
-    # reqid
-    packet += reqid.pack()
-
-    # add the proto
-    packet += HeronProtocol.pack_int(message.ByteSize())
-    packet += message.SerializeToString()
+    serialized_msg = message.SerializeToString()
+    typename_prefix = OutgoingPacket.get_typename_prefix(message)
+
+    # calculate the total size of the packet excl. header
+    datasize = len(typename_prefix) + REQID.REQID_SIZE + \
+               HeronProtocol.get_size_to_pack_string(serialized_msg)
+
+    # header, type string, reqid and the proto
+    packet = ''.join((HeronProtocol.pack_int(datasize),
+                      typename_prefix,
+                      reqid.pack(),
+                      HeronProtocol.pack_int(len(serialized_msg)),
+                      serialized_msg))
     return OutgoingPacket(packet)
 
   @property
   def sent_complete(self):
     """Indicates whether this packet is successfully sent"""
-    return len(self.to_send) == 0
+    return self.offset == len(self.raw)
+
+  def remaining(self):
+    """Returns a zero-copy view of the bytes not yet sent"""
+    return buffer(self.raw, self.offset)
+
+  def advance(self, nbytes):
+    """Marks up to ``nbytes`` of this packet as sent and returns how many were consumed"""
+    consumed = min(nbytes, len(self.raw) - self.offset)
+    self.offset += consumed
+    return consumed
 
   def send(self, dispatcher):
     """Sends this outgoing packet to dispatcher's socket"""
     if self.sent_complete:
       return
 
-    sent = dispatcher.send(self.to_send)
-    self.to_send = self.to_send[sent:]
+    sent = dispatcher.send(self.remaining())
+    self.advance(sent)
 
 class IncomingPacket(object):
-  """Helper class for incoming packet"""
+  """Helper class for incoming packet
+
+  The payload is read in place into a single ``bytearray`` that is allocated once the
+  header is known, so each received byte is stored exactly once.
+  """
   def __init__(self):
     """Initializes IncomingPacket object"""
-    self.header = ''
-    self.data = ''
+    self.header = bytearray(HeronProtocol.HEADER_SIZE)
+    self.header_bytes_read = 0
+    # allocated when the header is read, then filled by recv_into()
+    self.payload = None
+    self.payload_bytes_read = 0
     self.is_header_read = False
     self.is_complete = False
     # for debugging identification purposes
@@ -155,22 +197,31 @@ class IncomingPacket(object):
     This method is for testing purposes
     """
     packet = IncomingPacket()
-    packet.header = header
-    packet.data = data
+    packet.header[:len(header)] = header
+    packet.header_bytes_read = len(header)
 
     if len(header) == HeronProtocol.HEADER_SIZE:
       packet.is_header_read = True
+      packet.payload = bytearray(data)
+      packet.payload_bytes_read = len(data)
       if len(data) == packet.get_datasize():
         packet.is_complete = True
 
     return packet
 
+  @property
+  def data(self):
+    """Returns a memoryview of the part of the payload read so far"""
+    if self.payload is None:
+      return memoryview(b'')
+    return memoryview(self.payload)[:self.payload_bytes_read]
+
   def convert_to_raw(self):
     """Converts this IncomingPacket object to raw string
 
     This method is for testing purposes
     """
-    return self.header + self.data
+    return bytes(self.header[:self.header_bytes_read]) + self.data.tobytes()
 
   def get_datasize(self):
     """Returns the datasize of the packet
@@ -179,30 +230,37 @@ class IncomingPacket(object):
     """
     if not self.is_header_read:
       return -1
-    return HeronProtocol.unpack_int(self.header)
+    return HeronProtocol.unpack_int_from(self.header, 0)
 
   def get_pktsize(self):
     """Returns the size of this packet, including header and data"""
-    return len(self.data) + len(self.header)
+    return self.header_bytes_read + self.payload_bytes_read
 
   def read(self, dispatcher):
-    """Reads incoming data from asyncore.dispatcher"""
+    """Reads incoming data from asyncore.dispatcher
+
+    ``dispatcher`` needs to support ``recv_into(buffer, nbytes)``.
+    """
     try:
       if not self.is_header_read:
         # try reading header
-        to_read = HeronProtocol.HEADER_SIZE - len(self.header)
-        self.header += dispatcher.recv(to_read)
-        if len(self.header) == HeronProtocol.HEADER_SIZE:
+        to_read = HeronProtocol.HEADER_SIZE - self.header_bytes_read
+        self.header_bytes_read += \
+          dispatcher.recv_into(memoryview(self.header)[self.header_bytes_read:], to_read)
+        if self.header_bytes_read == HeronProtocol.HEADER_SIZE:
           self.is_header_read = True
+          self.payload = bytearray(self.get_datasize())
         else:
-          Log.debug("Header read incomplete; read %d bytes of header" % len(self.header))
+          Log.debug("Header read incomplete; read %d bytes of header" % self.header_bytes_read)
           return
 
       if self.is_header_read and not self.is_complete:
         # try reading data
-        to_read = self.get_datasize() - len(self.data)
-        self.data += dispatcher.recv(to_read)
-        if len(self.data) == self.get_datasize():
+        to_read = len(self.payload) - self.payload_bytes_read
+        if to_read > 0:
+          self.payload_bytes_read += \
+            dispatcher.recv_into(memoryview(self.payload)[self.payload_bytes_read:], to_read)
+        if self.payload_bytes_read == len(self.payload):
           self.is_complete = True
     except socket.error as e:
       if e.errno == socket.errno.EAGAIN or e.errno == socket.errno.EWOULDBLOCK:
@@ -219,48 +277,68 @@ class IncomingPacket(object):
 
 
 class REQID(object):
-  """Helper class for REQID"""
+  """Immutable, hashable value type for REQID
+
+  The 32 bytes are held as a string, so hashing and comparison are done in C. Zero REQIDs
+  are always the ``REQID.ZERO`` singleton when created through this class.
+  """
   REQID_SIZE = 32
+  ZERO_BYTES = b'\x00' * REQID_SIZE
+  ZERO = None
+
+  __slots__ = ('_bytes', '_hash')
 
   def __init__(self, data_bytes):
-    self.bytes = data_bytes
+    self._bytes = str(data_bytes)
+    self._hash = hash(self._bytes)
+
+  @property
+  def bytes(self):
+    """Returns the raw bytes of this REQID"""
+    return self._bytes
 
   @staticmethod
   def generate():
     """Generates a random REQID for request"""
-    data_bytes = bytearray(random.getrandbits(8) for i in range(REQID.REQID_SIZE))
-    return REQID(data_bytes)
+    return REQID(os.urandom(REQID.REQID_SIZE))
 
   @staticmethod
   def generate_zero():
-    """Generates a zero REQID for message"""
-    data_bytes = bytearray(0 for i in range(REQID.REQID_SIZE))
-    return REQID(data_bytes)
+    """Returns the zero REQID for message"""
+    return REQID.ZERO
 
   def pack(self):
     """Packs this REQID to bytestring"""
-    return self.bytes
+    return self._bytes
 
   def is_zero(self):
     """Checks if this REQID is zero"""
-    return self == REQID.generate_zero()
+    return self is REQID.ZERO or self._bytes == REQID.ZERO_BYTES
 
   @staticmethod
   def unpack(raw_data):
     """Unpacks a given bytestring and returns REQID object"""
-    return REQID(bytearray(raw_data))
+    raw_data = str(raw_data)
+    if raw_data == REQID.ZERO_BYTES:
+      return REQID.ZERO
+    return REQID(raw_data)
 
   def __eq__(self, another):
-    return hasattr(another, 'bytes') and self.bytes == another.bytes
+    return isinstance(another, REQID) and self._bytes == another._bytes
+
+  def __ne__(self, another):
+    return not self.__eq__(another)
 
   def __hash__(self):
-    return hash(self.__str__())
+    return self._hash
 
   def __str__(self):
     if self.is_zero():
       return "ZERO"
     else:
-      return ''.join([str(i) for i in list(self.bytes)])
+      return binascii.hexlify(self._bytes)
+
+REQID.ZERO = REQID(REQID.ZERO_BYTES)
 
 class StatusCode(object):
   """StatusCode for Response"""
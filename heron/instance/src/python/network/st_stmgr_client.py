@@ -104,6 +104,9 @@ class SingleThreadStmgrClient(HeronClient):
     # retry again
     self.on_connect(StatusCode.CONNECT_ERROR)
 
+  def _on_write_syscall(self, bytes_sent, pkts_sent):
+    self.gateway_metrics.update_write_syscall(bytes_sent, pkts_sent)
+
   def _register_msg_to_handle(self):
     # pylint: disable=unnecessary-lambda
     new_instance_builder = lambda: stmgr_pb2.NewInstanceAssignmentMessage()
@@ -22,6 +22,8 @@ from .metrics_helper import (GatewayMetrics,
                              ComponentMetrics,
                              SpoutMetrics,
                              BoltMetrics,
+                             InputStreamMetrics,
+                             LatencySampler,
                              MetricsCollector)
 
 from .py_metrics import PyMetrics
@@ -20,14 +20,19 @@
 
 '''metrics_helper: helper classes for managing common metrics'''
 
+import random
+
 from heron.common.src.python.utils.log import Log
 import heron.instance.src.python.utils.system_constants as constants
 from heron.instance.src.python.utils import system_config
 
 from heron.proto import metrics_pb2
 
+import heronpy.api.api_constants as api_constants
+from heronpy.api.utils import overrides
 from heronpy.api.metrics import (CountMetric, MultiCountMetric, MeanReducedMetric,
-                                 ReducedMetric, MultiMeanReducedMetric, MultiReducedMetric)
+                                 ReducedMetric, MultiMeanReducedMetric, MultiReducedMetric,
+                                 AssignableMetrics, MultiHistogramMetric)
 
 class BaseMetricsHelper(object):
   """Helper class for metrics management
@@ -91,6 +96,8 @@ class GatewayMetrics(BaseMetricsHelper):
   SENT_PKT_SIZE = '__gateway-sent-packets-size'
   RECEIVED_PKT_COUNT = '__gateway-received-packets-count'
   SENT_PKT_COUNT = '__gateway-sent-packets-count'
+  SENT_BYTES_PER_SYSCALL = '__gateway-sent-bytes-per-syscall'
+  SENT_PKTS_PER_SYSCALL = '__gateway-sent-packets-per-syscall'
 
   SENT_METRICS_SIZE = '__gateway-sent-metrics-size'
   SENT_METRICS_PKT_COUNT = '__gateway-sent-metrics-packets-count'
@@ -109,6 +116,8 @@ class GatewayMetrics(BaseMetricsHelper):
              SENT_PKT_SIZE: CountMetric(),
              RECEIVED_PKT_COUNT: CountMetric(),
              SENT_PKT_COUNT: CountMetric(),
+             SENT_BYTES_PER_SYSCALL: MeanReducedMetric(),
+             SENT_PKTS_PER_SYSCALL: MeanReducedMetric(),
 
              SENT_METRICS_SIZE: CountMetric(),
              SENT_METRICS_PKT_COUNT: CountMetric(),
@@ -136,6 +145,11 @@ class GatewayMetrics(BaseMetricsHelper):
     self.update_count(self.SENT_PKT_COUNT)
     self.update_count(self.SENT_PKT_SIZE, incr_by=sent_pkt_size_bytes)
 
+  def update_write_syscall(self, bytes_sent, pkts_sent):
+    """Update metrics about a single socket write"""
+    self.update_reduced_metric(self.SENT_BYTES_PER_SYSCALL, bytes_sent)
+    self.update_reduced_metric(self.SENT_PKTS_PER_SYSCALL, pkts_sent)
+
   def update_sent_metrics_size(self, size):
     self.update_count(self.SENT_METRICS_SIZE, size)
 
@@ -158,17 +172,27 @@ class ComponentMetrics(BaseMetricsHelper):
   EMIT_COUNT = "__emit-count"
   TUPLE_SERIALIZATION_TIME_NS = "__tuple-serialization-time-ns"
   OUT_QUEUE_FULL_COUNT = "__out-queue-full-count"
+  BATCH_SIZE = "__batch-size"
+  BATCH_TIME_BUDGET_NS = "__batch-time-budget-ns"
+  LATENCY_SAMPLE_RATE = "__latency-sample-rate"
 
   component_metrics = {FAIL_LATENCY: MultiMeanReducedMetric(),
                        FAIL_COUNT: MultiCountMetric(),
                        EMIT_COUNT: MultiCountMetric(),
                        TUPLE_SERIALIZATION_TIME_NS: MultiCountMetric(),
-                       OUT_QUEUE_FULL_COUNT: CountMetric()}
+                       OUT_QUEUE_FULL_COUNT: CountMetric(),
+                       BATCH_SIZE: MeanReducedMetric(),
+                       BATCH_TIME_BUDGET_NS: MeanReducedMetric(),
+                       LATENCY_SAMPLE_RATE: AssignableMetrics(1.0)}
+
+  # MultiMeanReducedMetrics that are replaced by MultiHistogramMetrics if enabled
+  latency_metrics = [FAIL_LATENCY]
 
   def __init__(self, additional_metrics):
     metrics = self.component_metrics
     metrics.update(additional_metrics)
     super(ComponentMetrics, self).__init__(metrics)
+    self.serialize_sampler = LatencySampler()
 
   # pylint: disable=arguments-differ
   def register_metrics(self, context):
@@ -179,19 +203,45 @@ class ComponentMetrics(BaseMetricsHelper):
     sys_config = system_config.get_sys_config()
     interval = float(sys_config[constants.HERON_METRICS_EXPORT_INTERVAL_SEC])
     collector = context.get_metrics_collector()
+    cluster_config = context.get_cluster_config()
+    if cluster_config.get(api_constants.TOPOLOGY_METRICS_LATENCY_HISTOGRAMS, False):
+      for name in self.latency_metrics:
+        self.metrics[name] = MultiHistogramMetric()
     super(ComponentMetrics, self).register_metrics(collector, interval)
 
+    sample_interval = cluster_config.get(api_constants.TOPOLOGY_METRICS_LATENCY_SAMPLE_INTERVAL, 1)
+    randomized = cluster_config.get(api_constants.TOPOLOGY_METRICS_LATENCY_SAMPLE_RANDOM, False)
+    self.set_latency_sampling(int(sample_interval), bool(randomized))
+
+  def set_latency_sampling(self, interval, randomized=False):
+    """Sets how tuples are sampled for latency metrics, and reports the resulting sampling rate
+
+    :param interval: one of every ``interval`` tuples is sampled, 1 to sample every tuple
+    :param randomized: whether to sample each tuple with a probability of ``1 / interval`` instead
+    """
+    self.serialize_sampler = LatencySampler(interval, randomized)
+    self.metrics[self.LATENCY_SAMPLE_RATE].update(self.serialize_sampler.rate)
+
   def update_out_queue_full_count(self):
     """Apply update to the out-queue full count"""
     self.update_count(self.OUT_QUEUE_FULL_COUNT)
 
+  def update_batch(self, batch_size, time_budget_ns):
+    """Apply updates to the batch size and time budget chosen for a batch"""
+    self.update_reduced_metric(self.BATCH_SIZE, batch_size)
+    self.update_reduced_metric(self.BATCH_TIME_BUDGET_NS, time_budget_ns)
+
   def update_emit_count(self, stream_id):
     """Apply update to emit count"""
     self.update_count(self.EMIT_COUNT, key=stream_id)
 
-  def serialize_data_tuple(self, stream_id, latency_in_ns):
-    """Apply update to serialization metrics"""
-    self.update_count(self.TUPLE_SERIALIZATION_TIME_NS, incr_by=latency_in_ns, key=stream_id)
+  def serialize_data_tuple(self, stream_id, latency_in_ns, scale=1):
+    """Apply update to serialization metrics
+
+    :param scale: number of tuples the sampled tuple stands for, see ``LatencySampler``
+    """
+    self.update_count(self.TUPLE_SERIALIZATION_TIME_NS, incr_by=latency_in_ns * scale,
+                      key=stream_id)
 
 class SpoutMetrics(ComponentMetrics):
   """Metrics helper class for Spout"""
@@ -211,6 +261,7 @@ class SpoutMetrics(ComponentMetrics):
 
   to_multi_init = [ACK_COUNT, ComponentMetrics.FAIL_COUNT,
                    TIMEOUT_COUNT, ComponentMetrics.EMIT_COUNT]
+  latency_metrics = ComponentMetrics.latency_metrics + [COMPLETE_LATENCY]
 
   def __init__(self, pplan_helper):
     super(SpoutMetrics, self).__init__(self.spout_metrics)
@@ -225,10 +276,14 @@ class SpoutMetrics(ComponentMetrics):
       for metric in to_init:
         metric.add_key(stream_id)
 
-  def next_tuple(self, latency_in_ns):
-    """Apply updates to the next tuple metrics"""
+  def next_tuple(self, latency_in_ns, count=1):
+    """Apply updates to the next tuple metrics
+
+    :param latency_in_ns: mean latency of the ``count`` calls of ``next_tuple()``
+    :param count: number of calls of ``next_tuple()``. Default is 1.
+    """
     self.update_reduced_metric(self.NEXT_TUPLE_LATENCY, latency_in_ns)
-    self.update_count(self.NEXT_TUPLE_COUNT)
+    self.update_count(self.NEXT_TUPLE_COUNT, incr_by=count)
 
   def acked_tuple(self, stream_id, complete_latency_ns):
     """Apply updates to the ack metrics"""
@@ -267,10 +322,15 @@ class BoltMetrics(ComponentMetrics):
   inputs_init = [ACK_COUNT, ComponentMetrics.FAIL_COUNT,
                  EXEC_COUNT, EXEC_TIME_NS]
   outputs_init = [ComponentMetrics.EMIT_COUNT]
+  latency_metrics = ComponentMetrics.latency_metrics + [PROCESS_LATENCY, EXEC_LATENCY]
 
   def __init__(self, pplan_helper):
     super(BoltMetrics, self).__init__(self.bolt_metrics)
     self._init_multi_count_metrics(pplan_helper)
+    # map <(source component, stream id) -> InputStreamMetrics>
+    self._input_stream_metrics = {}
+    self.execute_sampler = LatencySampler()
+    self.ack_sampler = LatencySampler()
 
   def _init_multi_count_metrics(self, pplan_helper):
     """Initializes the default values for a necessary set of MultiCountMetrics"""
@@ -291,39 +351,151 @@ class BoltMetrics(ComponentMetrics):
       for metric in to_out_init:
         metric.add_key(stream_id)
 
-  def execute_tuple(self, stream_id, source_component, latency_in_ns):
+  def set_latency_sampling(self, interval, randomized=False):
+    super(BoltMetrics, self).set_latency_sampling(interval, randomized)
+    self.execute_sampler = LatencySampler(interval, randomized)
+    self.ack_sampler = LatencySampler(interval, randomized)
+
+  def get_input_stream_metrics(self, stream_id, source_component):
+    """Returns the InputStreamMetrics of a given input stream"""
+    key = (source_component, stream_id)
+    stream_metrics = self._input_stream_metrics.get(key)
+    if stream_metrics is None:
+      stream_metrics = InputStreamMetrics(self.metrics, stream_id, source_component)
+      self._input_stream_metrics[key] = stream_metrics
+    return stream_metrics
+
+  def execute_tuple(self, stream_id, source_component, latency_in_ns=None, scale=1):
     """Apply updates to the execute metrics"""
-    self.update_count(self.EXEC_COUNT, key=stream_id)
-    self.update_reduced_metric(self.EXEC_LATENCY, latency_in_ns, stream_id)
-    self.update_count(self.EXEC_TIME_NS, incr_by=latency_in_ns, key=stream_id)
-
-    global_stream_id = source_component + "/" + stream_id
-    self.update_count(self.EXEC_COUNT, key=global_stream_id)
-    self.update_reduced_metric(self.EXEC_LATENCY, latency_in_ns, global_stream_id)
-    self.update_count(self.EXEC_TIME_NS, incr_by=latency_in_ns, key=global_stream_id)
+    self.get_input_stream_metrics(stream_id, source_component).execute_tuple(latency_in_ns,
+                                                                             scale)
 
   def deserialize_data_tuple(self, stream_id, source_component, latency_in_ns):
     """Apply updates to the deserialization metrics"""
-    self.update_count(self.TUPLE_DESERIALIZATION_TIME_NS, incr_by=latency_in_ns, key=stream_id)
-    global_stream_id = source_component + "/" + stream_id
-    self.update_count(self.TUPLE_DESERIALIZATION_TIME_NS, incr_by=latency_in_ns,
-                      key=global_stream_id)
+    self.get_input_stream_metrics(stream_id, source_component).deserialize_data_tuple(
+        latency_in_ns)
 
-  def acked_tuple(self, stream_id, source_component, latency_in_ns):
+  def acked_tuple(self, stream_id, source_component, latency_in_ns=None):
     """Apply updates to the ack metrics"""
-    self.update_count(self.ACK_COUNT, key=stream_id)
-    self.update_reduced_metric(self.PROCESS_LATENCY, latency_in_ns, stream_id)
-    global_stream_id = source_component + '/' + stream_id
-    self.update_count(self.ACK_COUNT, key=global_stream_id)
-    self.update_reduced_metric(self.PROCESS_LATENCY, latency_in_ns, global_stream_id)
+    self.get_input_stream_metrics(stream_id, source_component).acked_tuple(latency_in_ns)
 
-  def failed_tuple(self, stream_id, source_component, latency_in_ns):
+  def failed_tuple(self, stream_id, source_component, latency_in_ns=None):
     """Apply updates to the fail metrics"""
-    self.update_count(self.FAIL_COUNT, key=stream_id)
-    self.update_reduced_metric(self.FAIL_LATENCY, latency_in_ns, stream_id)
-    global_stream_id = source_component + '/' + stream_id
-    self.update_count(self.FAIL_COUNT, key=global_stream_id)
-    self.update_reduced_metric(self.FAIL_LATENCY, latency_in_ns, global_stream_id)
+    self.get_input_stream_metrics(stream_id, source_component).failed_tuple(latency_in_ns)
+
+class InputStreamMetrics(object):
+  """Metric cells of a bolt that are updated for each tuple of an input stream
+
+  Each update applies to the cells of both the stream id and the global stream id,
+  ``<source component>/<stream id>``. The cells, ``CountMetric`` of a ``MultiCountMetric`` and
+  reducers of a ``MultiReducedMetric``, are looked up on their first update, so that further
+  updates involve no string building, key lookup or type check.
+
+  Tuples that are not sampled by a ``LatencySampler`` are only counted, with ``latency_in_ns``
+  left to None.
+  """
+  __slots__ = ('_metrics', '_keys',
+               '_execute_cells', '_deserialize_cells', '_ack_cells', '_fail_cells')
+
+  def __init__(self, metrics, stream_id, source_component):
+    self._metrics = metrics
+    self._keys = (stream_id, source_component + "/" + stream_id)
+    self._execute_cells = None
+    self._deserialize_cells = None
+    self._ack_cells = None
+    self._fail_cells = None
+
+  def _get_cells(self, *names):
+    """Returns the cells of given metrics, for the stream id and then the global stream id"""
+    cells = []
+    for name in names:
+      metric = self._metrics[name]
+      for key in self._keys:
+        metric.add_key(key)
+        cell = metric.value[key]
+        cells.append(cell.reducer if isinstance(cell, ReducedMetric) else cell)
+    return cells
+
+  def execute_tuple(self, latency_in_ns=None, scale=1):
+    """Apply updates to the execute metrics
+
+    :param scale: number of tuples the sampled tuple stands for in the execute time
+    """
+    if self._execute_cells is None:
+      self._execute_cells = self._get_cells(BoltMetrics.EXEC_COUNT, BoltMetrics.EXEC_LATENCY,
+                                            BoltMetrics.EXEC_TIME_NS)
+    count, global_count, latency, global_latency, time_ns, global_time_ns = self._execute_cells
+    count.incr()
+    global_count.incr()
+    if latency_in_ns is not None:
+      latency.reduce(latency_in_ns)
+      global_latency.reduce(latency_in_ns)
+      time_ns.incr(latency_in_ns * scale)
+      global_time_ns.incr(latency_in_ns * scale)
+
+  def deserialize_data_tuple(self, latency_in_ns):
+    """Apply updates to the deserialization metrics"""
+    if self._deserialize_cells is None:
+      self._deserialize_cells = self._get_cells(BoltMetrics.TUPLE_DESERIALIZATION_TIME_NS)
+    time_ns, global_time_ns = self._deserialize_cells
+    time_ns.incr(latency_in_ns)
+    global_time_ns.incr(latency_in_ns)
+
+  def acked_tuple(self, latency_in_ns=None):
+    """Apply updates to the ack metrics"""
+    if self._ack_cells is None:
+      self._ack_cells = self._get_cells(BoltMetrics.ACK_COUNT, BoltMetrics.PROCESS_LATENCY)
+    count, global_count, latency, global_latency = self._ack_cells
+    count.incr()
+    global_count.incr()
+    if latency_in_ns is not None:
+      latency.reduce(latency_in_ns)
+      global_latency.reduce(latency_in_ns)
+
+  def failed_tuple(self, latency_in_ns=None):
+    """Apply updates to the fail metrics"""
+    if self._fail_cells is None:
+      self._fail_cells = self._get_cells(BoltMetrics.FAIL_COUNT, BoltMetrics.FAIL_LATENCY)
+    count, global_count, latency, global_latency = self._fail_cells
+    count.incr()
+    global_count.incr()
+    if latency_in_ns is not None:
+      latency.reduce(latency_in_ns)
+      global_latency.reduce(latency_in_ns)
+
+class LatencySampler(object):
+  """Picks the tuples whose latencies are measured for metrics
+
+  Measuring a latency takes two clock reads, which may cost as much as processing a cheap tuple.
+  With an interval of N, only one of every N tuples is sampled, or, if ``randomized``, each tuple
+  is sampled with a probability of 1/N. Counts are still updated for every tuple, and mean
+  latencies are taken over sampled tuples, but time spent metrics, which sum latencies up, have
+  to be scaled by N to stand for all tuples.
+  """
+  __slots__ = ('interval', 'randomized', '_countdown')
+
+  def __init__(self, interval=1, randomized=False):
+    if interval < 1:
+      raise ValueError("Latency sample interval needs to be at least 1, given: %s" % str(interval))
+    self.interval = interval
+    self.randomized = randomized
+    # the first tuple is always sampled
+    self._countdown = 1
+
+  @property
+  def rate(self):
+    """Fraction of tuples that are sampled"""
+    return 1.0 / self.interval
+
+  def sample(self):
+    """Returns whether the latency of the next tuple should be measured"""
+    if self.randomized:
+      return random.random() * self.interval < 1.0
+    self._countdown -= 1
+    if self._countdown > 0:
+      return False
+    self._countdown = self.interval
+    return True
 
 class MetricsCollector(object):
   """Helper class for pushing metrics to Out-Metrics queue"""
@@ -333,6 +505,8 @@ class MetricsCollector(object):
     self.metrics_map = dict()
     # map <time_bucket_sec -> metrics name>
     self.time_bucket_in_sec_to_metrics_name = dict()
+    # map <metrics name -> map <key -> metrics name/key>>
+    self.key_names = dict()
     # out metrics queue
     self.out_metrics = out_metrics
 
@@ -373,35 +547,64 @@ class MetricsCollector(object):
     self.looper.register_timer_task_in_sec(task, time_bucket_in_sec)
 
   def _gather_one_metric(self, name, message):
-    metric_value = self.metrics_map[name].get_value_and_reset()
-    Log.debug("In gather_one_metric with name: %s, and value: %s", name, str(metric_value))
+    metric = self.metrics_map[name]
+    if self._has_stock_cells(metric):
+      # take the values of keys one by one, rather than building a dict of them
+      cells = metric.value
+      for key in cells:
+        self._add_keyed_value_to_message(message, name, key, cells[key].get_value_and_reset())
+      return
+
+    metric_value = metric.get_value_and_reset()
+    Log.debug("In gather_one_metric with name: %s, and value: %s", name, metric_value)
 
     if metric_value is None:
       return
-    elif isinstance(metric_value, dict):
-      for key, value in metric_value.items():
-        if key is not None and value is not None:
-          self._add_data_to_message(message, name + "/" + str(key), value)
-          self._add_data_to_message(message, "%s/%s" % (name, str(key)), value)
-        else:
-          Log.info("When gathering metric: %s, <%s:%s> is not a valid key-value to output "
-                   "as metric. Skipping...", name, str(key), str(value))
-          continue
+    self._add_value_to_message(message, name, metric_value)
+
+  @staticmethod
+  def _has_stock_cells(metric):
+    """Returns whether the values of a multi metric can be taken from its cells, as its class
+    does not override ``get_value_and_reset()``
+    """
+    for cls in (MultiCountMetric, MultiReducedMetric):
+      if isinstance(metric, cls):
+        return not overrides(metric, cls, 'get_value_and_reset')
+    return False
+
+  def _add_value_to_message(self, message, name, metric_value):
+    """Adds a metric value, each value of a dict (which may be a dict of a histogram in turn)
+    being added as ``<name>/<key>``
+    """
+    if isinstance(metric_value, dict):
+      for key in metric_value:
+        self._add_keyed_value_to_message(message, name, key, metric_value[key])
     else:
       self._add_data_to_message(message, name, metric_value)
 
+  def _add_keyed_value_to_message(self, message, name, key, value):
+    if key is None or value is None:
+      Log.debug("When gathering metric: %s, <%s:%s> is not a valid key-value to output "
+                "as metric. Skipping...", name, key, value)
+      return
+    # names of keyed values are built once, as the same keys come up every interval
+    key_names = self.key_names.get(name)
+    if key_names is None:
+      key_names = self.key_names[name] = {}
+    keyed_name = key_names.get(key)
+    if keyed_name is None:
+      keyed_name = key_names[key] = "%s/%s" % (name, str(key))
+    self._add_value_to_message(message, keyed_name, value)
+
   @staticmethod
   def _add_data_to_message(message, metric_name, metric_value):
     if isinstance(metric_value, metrics_pb2.MetricDatum):
-      to_add = message.metrics.add()
-      to_add.CopyFrom(metric_value)
+      message.metrics.add().CopyFrom(metric_value)
     elif isinstance(metric_value, metrics_pb2.ExceptionData):
-      to_add = message.exceptions.add()
-      to_add.CopyFrom(metric_value)
+      message.exceptions.add().CopyFrom(metric_value)
     else:
       assert metric_value is not None
-      datum = metrics_pb2.MetricDatum()
+      # filled in place, rather than copied from a temporary MetricDatum
+      datum = message.metrics.add()
       datum.name = metric_name
       datum.value = str(metric_value)
-      to_add = message.metrics.add()
-      to_add.CopyFrom(datum)
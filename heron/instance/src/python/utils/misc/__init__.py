@@ -15,11 +15,14 @@
 # specific language governing permissions and limitations
 # under the License.
 '''common module for miscellaneous classes'''
-__all__ = ['pplan_helper', 'communicator',
+__all__ = ['pplan_helper', 'communicator', 'batch_controller', 'pending_tuple_tracker',
            'outgoing_tuple_helper', 'custom_grouping_helper', 'serializer_helper']
 
 from .pplan_helper import PhysicalPlanHelper
 from .serializer_helper import SerializerHelper
 from .communicator import HeronCommunicator
+from .batch_controller import BatchController
+from .pending_tuple_tracker import PendingTupleTracker
+from .ack_batcher import AckBatcher
 from .outgoing_tuple_helper import OutgoingTupleHelper
 from .custom_grouping_helper import CustomGroupingHelper, Target
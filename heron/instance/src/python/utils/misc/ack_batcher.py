@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''ack_batcher.py: module for batching acks and fails of a bolt into a single tuple set'''
+from heron.proto import tuple_pb2
+
+def _get_varint_size(value):
+  """Returns the size in bytes of ``value`` encoded as a protobuf int32 varint"""
+  if value < 0:
+    # negative int32 values are sign extended to 64 bits
+    return 10
+  size = 1
+  while value >= 0x80:
+    value >>= 7
+    size += 1
+  return size
+
+# serialized size of a RootId without its taskid: one tag byte for each field and 8 bytes of key
+_ROOT_ID_SIZE_WITHOUT_TASKID = 1 + 1 + 8
+
+class AckBatcher(object):
+  """AckBatcher: collects the acks and fails of a bolt until they are flushed as one tuple set
+
+  Unlike ``OutgoingTupleHelper.add_new_control_tuple()``, which starts a new control tuple set
+  whenever an ack follows a fail or the other way round, acks and fails are all put into the same
+  ``HeronControlTupleSet``, as the stream manager handles the acks of a set before its fails anyway.
+  The roots of acked and failed tuples are only referred to until ``make_tuple_set()`` is called,
+  and the sizes accounted for them are worked out from their task ids rather than serialized.
+
+  With ``xor_combine``, the acks of a flush are merged by root. The stream manager XORs the acked
+  tuple id into the value of each root of an ack, so a single ack of the XOR of the acked tuple ids
+  of each root has the same effect as the acks it replaces, at the cost of one ``RootId`` per ack.
+  This pays off when the same roots are acked many times per flush, e.g. by a bolt acking all the
+  tuples it emits for each spout tuple.
+  """
+  def __init__(self, xor_combine=False):
+    self.xor_combine = xor_combine
+    # list of (acked tuple id, roots), unless xor_combine
+    self._acks = []
+    # map <(root task id, root key) -> XOR of the acked tuple ids>, if xor_combine
+    self._combined_acks = {}
+    # list of (failed tuple id, roots)
+    self._fails = []
+
+  def __len__(self):
+    """Returns the number of control tuples that the next tuple set will have"""
+    return len(self._acks) + len(self._combined_acks) + len(self._fails)
+
+  def add(self, acked_tuple_id, roots, is_ack):
+    """Adds an ack or a fail of a tuple
+
+    Tuples without roots are not added, as there is nothing to ack or fail for them.
+
+    :param acked_tuple_id: id of the acked or failed tuple
+    :param roots: an iterable of protobuf message ``RootId``
+    :param is_ack: ``True`` if Ack, ``False`` if Fail
+    :returns: size in bytes of the roots of the tuple
+    """
+    if not roots:
+      return 0
+    size = 0
+    if is_ack and self.xor_combine:
+      combined_acks = self._combined_acks
+      for root in roots:
+        taskid = root.taskid
+        size += _ROOT_ID_SIZE_WITHOUT_TASKID + _get_varint_size(taskid)
+        root_id = (taskid, root.key)
+        combined_acks[root_id] = combined_acks.get(root_id, 0) ^ acked_tuple_id
+      return size
+
+    for root in roots:
+      size += _ROOT_ID_SIZE_WITHOUT_TASKID + _get_varint_size(root.taskid)
+    if is_ack:
+      self._acks.append((acked_tuple_id, roots))
+    else:
+      self._fails.append((acked_tuple_id, roots))
+    return size
+
+  def make_tuple_set(self):
+    """Builds a HeronTupleSet out of the acks and fails added since the last call
+
+    :returns: ``HeronTupleSet`` whose control set holds the acks and fails, or ``None`` if there
+              are none
+    """
+    if not self:
+      return None
+    msg = tuple_pb2.HeronTupleSet()
+    control = msg.control
+
+    for acked_tuple_id, roots in self._acks:
+      ack = control.acks.add()
+      ack.ackedtuple = acked_tuple_id
+      ack.roots.extend(roots)
+    for (taskid, key), acked_tuple_id in self._combined_acks.items():
+      ack = control.acks.add()
+      ack.ackedtuple = acked_tuple_id
+      root = ack.roots.add()
+      root.taskid = taskid
+      root.key = key
+    for failed_tuple_id, roots in self._fails:
+      fail = control.fails.add()
+      fail.ackedtuple = failed_tuple_id
+      fail.roots.extend(roots)
+
+    self._acks = []
+    self._combined_acks = {}
+    self._fails = []
+    return msg
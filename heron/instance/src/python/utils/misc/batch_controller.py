@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''batch_controller.py: module for adaptively sizing batches of spout emit and bolt execute'''
+import time
+
+class BatchController(object):
+  """BatchController: decides how much work an instance does in a single wake up
+
+  A batch is a run of units of work, i.e. calls to ``next_tuple()`` for a spout or executed
+  tuples for a bolt, between ``start_batch()`` and ``finish_batch()``. It ends when ``add()``
+  returns True, that is when:
+
+  - the batch size, the number of units expected to fit in the time budget, is reached
+  - more than ``max_batch_bytes`` are emitted during the batch
+  - the time budget of the batch is used up
+
+  The time budget is ``max_batch_time``, shrunk as the out queue grows beyond
+  ``expected_queue_size``, as producing more then only fills up the out queue. The latency of
+  a unit is tracked as an exponential moving average, En = (1-w) * En-1 + w * An, sampled only
+  every ``check_interval`` units, so that the clock is read a few times per batch rather than
+  after each unit. The first batch is a single unit, to take the first sample.
+  """
+  # number of times the clock is read during a batch that fills its time budget
+  CHECKS_PER_BATCH = 8
+  MAX_CHECK_INTERVAL = 64
+  # lower bound of the per-unit latency, as the clock may not advance during a fast unit
+  MIN_UNIT_LATENCY = 1e-6
+
+  def __init__(self, max_batch_time, max_batch_bytes, expected_queue_size, sample_weight,
+               on_sample=None):
+    """Initialize BatchController
+
+    :param max_batch_time: Time budget of a batch in seconds, when the out queue is empty
+    :param max_batch_bytes: Maximum number of bytes emitted in a batch
+    :param expected_queue_size: Size of the out queue beyond which the time budget shrinks
+    :param sample_weight: Weight of a new latency sample in the moving average
+    :param on_sample: Callback function called with ``(units, latency_in_sec)`` of each
+           latency sample, where ``latency_in_sec`` is the mean latency of these ``units``.
+           Default ``None``
+    """
+    self.max_batch_time = max_batch_time
+    self.max_batch_bytes = max_batch_bytes
+    self.expected_queue_size = max(expected_queue_size, 1)
+    self.sample_weight = sample_weight
+    self._on_sample = on_sample
+
+    self.unit_latency = None
+    self.time_budget = max_batch_time
+    self.batch_size = 1
+    self.check_interval = 1
+
+    self._start_time = 0.0
+    self._start_bytes = 0
+    self._last_check_time = 0.0
+    self._units = 0
+    self._units_at_last_check = 0
+
+  def start_batch(self, queue_size, emitted_bytes):
+    """Starts a new batch
+
+    :param queue_size: Current size of the out queue
+    :param emitted_bytes: Total bytes emitted so far by the instance
+    """
+    self.time_budget = self.max_batch_time / (1.0 + float(queue_size) / self.expected_queue_size)
+    if self.unit_latency is not None:
+      self.batch_size = max(int(self.time_budget / self.unit_latency), 1)
+      self.check_interval = \
+        max(min(self.batch_size // self.CHECKS_PER_BATCH, self.MAX_CHECK_INTERVAL), 1)
+
+    self._start_time = self._last_check_time = time.time()
+    self._start_bytes = emitted_bytes
+    self._units = self._units_at_last_check = 0
+
+  def add(self, units, emitted_bytes):
+    """Records units of work done in the current batch
+
+    :param units: Number of units of work just done
+    :param emitted_bytes: Total bytes emitted so far by the instance
+    :returns: True if the batch is over
+    """
+    self._units += units
+    if self._units >= self.batch_size or \
+        emitted_bytes - self._start_bytes > self.max_batch_bytes:
+      return True
+    if self._units - self._units_at_last_check < self.check_interval:
+      return False
+
+    now = time.time()
+    self._sample(now)
+    return now - self._start_time > self.time_budget
+
+  def finish_batch(self):
+    """Finishes the current batch, sampling the latency of units since the last check"""
+    self._sample(time.time())
+
+  def _sample(self, now):
+    units = self._units - self._units_at_last_check
+    if units > 0:
+      latency = (now - self._last_check_time) / units
+      if self.unit_latency is None:
+        self.unit_latency = max(latency, self.MIN_UNIT_LATENCY)
+      else:
+        self.unit_latency = max((1 - self.sample_weight) * self.unit_latency +
+                                self.sample_weight * latency, self.MIN_UNIT_LATENCY)
+      if self._on_sample is not None:
+        self._on_sample(units, latency)
+    self._last_check_time = now
+    self._units_at_last_check = self._units
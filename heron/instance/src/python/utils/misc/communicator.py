@@ -21,6 +21,7 @@
 '''communicator.py: module responsible for communication between Python heron modules'''
 import sys
 import Queue
+from collections import deque
 
 from heron.common.src.python.utils.log import Log
 
@@ -29,18 +30,28 @@ class HeronCommunicator(object):
 
   Note that this class does not yet implement the dynamic tuning of expected available capacity,
   as it is not necessary for single thread instance.
+
+  By default the buffer is a thread-safe ``Queue.Queue``. With ``single_thread=True`` it is a
+  plain ``collections.deque``, which takes no lock on any operation and should be used when
+  the producer and the consumer run on the same thread, as in SingleThreadHeronInstance.
   """
-  def __init__(self, producer_cb=None, consumer_cb=None):
+  def __init__(self, producer_cb=None, consumer_cb=None, single_thread=False):
     """Initialize HeronCommunicator
 
     :param producer_cb: Callback function to be called (usually on producer thread)
            when ``poll()`` is called by the consumer. Default ``None``
     :param consumer_cb: Callback function to be called (usually on consumer thread)
            when ``offer()`` is called by the producer. Default ``None``
+    :param single_thread: Whether the buffer is accessed from a single thread only.
+           Default ``False``
     """
     self._producer_callback = producer_cb
     self._consumer_callback = consumer_cb
-    self._buffer = Queue.Queue()
+    self._single_thread = single_thread
+    if single_thread:
+      self._buffer = deque()
+    else:
+      self._buffer = Queue.Queue()
     self.capacity = sys.maxsize
 
   def register_capacity(self, capacity):
@@ -55,10 +66,14 @@ class HeronCommunicator(object):
 
   def get_size(self):
     """Returns the size of the buffer"""
+    if self._single_thread:
+      return len(self._buffer)
     return self._buffer.qsize()
 
   def is_empty(self):
     """Returns whether the buffer is empty"""
+    if self._single_thread:
+      return not self._buffer
     return self._buffer.empty()
 
   def poll(self):
@@ -68,7 +83,12 @@ class HeronCommunicator(object):
     """
     try:
       # non-blocking
-      ret = self._buffer.get(block=False)
+      if self._single_thread:
+        if not self._buffer:
+          raise Queue.Empty
+        ret = self._buffer.popleft()
+      else:
+        ret = self._buffer.get(block=False)
       if self._producer_callback is not None:
         self._producer_callback()
       return ret
@@ -76,6 +96,39 @@ class HeronCommunicator(object):
       Log.debug("%s: Empty in poll()" % str(self))
       raise Queue.Empty
 
+  def poll_many(self, max_items=None):
+    """Polls up to ``max_items`` items from the buffer, or all of them if ``None``
+
+    It is a non-blocking operation, and returns an empty list when the buffer is empty.
+    The producer callback is called once for the whole batch.
+    """
+    if max_items is None or max_items >= self.get_size():
+      if self._single_thread:
+        ret = list(self._buffer)
+        self._buffer.clear()
+      else:
+        ret = []
+        while True:
+          try:
+            ret.append(self._buffer.get(block=False))
+          except Queue.Empty:
+            break
+    else:
+      if self._single_thread:
+        popleft = self._buffer.popleft
+        ret = [popleft() for _ in xrange(max_items)]
+      else:
+        ret = []
+        for _ in xrange(max_items):
+          try:
+            ret.append(self._buffer.get(block=False))
+          except Queue.Empty:
+            break
+
+    if ret and self._producer_callback is not None:
+      self._producer_callback()
+    return ret
+
   def offer(self, item):
     """Offer to the buffer
 
@@ -83,7 +136,10 @@ class HeronCommunicator(object):
     """
     try:
       # non-blocking
-      self._buffer.put(item, block=False)
+      if self._single_thread:
+        self._buffer.append(item)
+      else:
+        self._buffer.put(item, block=False)
       if self._consumer_callback is not None:
         self._consumer_callback()
       return True
@@ -91,8 +147,27 @@ class HeronCommunicator(object):
       Log.debug("%s: Full in offer()" % str(self))
       raise Queue.Full
 
+  def offer_many(self, items):
+    """Offers all the given items to the buffer
+
+    It is a non-blocking operation. The consumer callback is called once for the whole batch.
+    """
+    if not items:
+      return True
+    if self._single_thread:
+      self._buffer.extend(items)
+    else:
+      for item in items:
+        self._buffer.put(item, block=False)
+    if self._consumer_callback is not None:
+      self._consumer_callback()
+    return True
+
   def clear(self):
     """Clear the buffer"""
+    if self._single_thread:
+      self._buffer.clear()
+      return
     while not self.is_empty():
       self.poll()
 
@@ -19,13 +19,16 @@
 #  under the License.
 
 '''custom_grouping_helper.py'''
-from collections import namedtuple
+from heronpy.api.custom_grouping import ICustomGrouping
+from heronpy.api.utils import overrides
 
 class CustomGroupingHelper(object):
   """Helper class for managing custom grouping"""
   def __init__(self):
     # map <stream_id -> list(targets)>
     self.targets = {}
+    # streams whose custom groupings all override choose_tasks_batch(), known once prepared
+    self.batched_streams = frozenset()
 
   def add(self, stream_id, task_ids, grouping, source_comp_name):
     """Adds the target component
@@ -48,6 +51,14 @@ class CustomGroupingHelper(object):
     for stream_id, targets in self.targets.items():
       for target in targets:
         target.prepare(context, stream_id)
+    self.batched_streams = frozenset(
+        stream_id for stream_id, targets in self.targets.items()
+        if all(overrides(target.grouping, ICustomGrouping, 'choose_tasks_batch')
+               for target in targets))
+
+  def is_batched(self, stream_id):
+    """Returns whether tuples of ``stream_id`` should be grouped by ``choose_tasks_batch()``"""
+    return stream_id in self.batched_streams
 
   def choose_tasks(self, stream_id, values):
     """Choose tasks for a given stream_id and values and Returns a list of target tasks"""
@@ -59,9 +70,37 @@ class CustomGroupingHelper(object):
       ret.extend(target.choose_tasks(values))
     return ret
 
-class Target(namedtuple('Target', 'task_ids, grouping, source_comp_name')):
-  """Named tuple class for Target"""
-  __slots__ = ()
+  def choose_tasks_batch(self, stream_id, values_list):
+    """Choose tasks for each of the given values of a stream_id
+
+    :returns: a list of lists of target tasks, in the same order as ``values_list``
+    """
+    targets = self.targets.get(stream_id)
+    if not targets:
+      return [[] for _ in values_list]
+    if len(targets) == 1:
+      return targets[0].choose_tasks_batch(values_list)
+
+    ret = [[] for _ in values_list]
+    for target in targets:
+      for tasks, chosen in zip(ret, target.choose_tasks_batch(values_list)):
+        tasks.extend(chosen)
+    return ret
+
+class Target(object):
+  """Target component of a custom grouping
+
+  The set of task ids to validate the chosen tasks against is built up front, so that valid
+  choices are checked with a single set lookup, and only invalid ones element by element.
+  """
+  __slots__ = ('task_ids', 'grouping', 'source_comp_name', '_task_id_set')
+
+  def __init__(self, task_ids, grouping, source_comp_name):
+    self.task_ids = task_ids
+    self.grouping = grouping
+    self.source_comp_name = source_comp_name
+    self._task_id_set = frozenset(task_ids)
+
   def prepare(self, context, stream_id):
     """Invoke prepare() of this custom grouping"""
     self.grouping.prepare(context, self.source_comp_name, stream_id, self.task_ids)
@@ -69,15 +108,31 @@ class Target(namedtuple('Target', 'task_ids, grouping, source_comp_name')):
   def choose_tasks(self, values):
     """Invoke choose_tasks() of this custom grouping"""
     ret = self.grouping.choose_tasks(values)
+    if not isinstance(ret, list) or not self._task_id_set.issuperset(ret):
+      self._validate(ret, "choose_tasks()")
+    return ret
+
+  def choose_tasks_batch(self, values_list):
+    """Invoke choose_tasks_batch() of this custom grouping"""
+    ret = self.grouping.choose_tasks_batch(values_list)
+    if not isinstance(ret, list) or len(ret) != len(values_list):
+      raise TypeError("Returned object after custom grouping's choose_tasks_batch() needs to be "
+                      "a list of as many lists as the given values, given: %s" % str(ret))
+    task_id_set = self._task_id_set
+    for tasks in ret:
+      if not isinstance(tasks, list) or not task_id_set.issuperset(tasks):
+        self._validate(tasks, "choose_tasks_batch()")
+    return ret
+
+  def _validate(self, ret, method):
+    """Raises an error explaining why the tasks returned by ``method`` are not valid"""
     if not isinstance(ret, list):
-      raise TypeError("Returned object after custom grouping's choose_tasks() "
-                      "needs to be a list, given: %s" % str(type(ret)))
-    else:
-      for i in ret:
-        if not isinstance(i, int):
-          raise TypeError("Returned object after custom grouping's choose_tasks() "
-                          "contained non-integer: %s" % str(i))
-        if i not in self.task_ids:
-          raise ValueError("Returned object after custom grouping's choose_tasks() contained "
-                           "a task id that is not registered: %d" % i)
-      return ret
+      raise TypeError("Returned object after custom grouping's %s "
+                      "needs to be a list, given: %s" % (method, str(type(ret))))
+    for i in ret:
+      if not isinstance(i, int):
+        raise TypeError("Returned object after custom grouping's %s "
+                        "contained non-integer: %s" % (method, str(i)))
+      if i not in self._task_id_set:
+        raise ValueError("Returned object after custom grouping's %s contained "
+                         "a task id that is not registered: %d" % (method, i))
@@ -22,10 +22,11 @@
 import sys
 
 from heron.common.src.python.utils.log import Log
-from heron.proto import tuple_pb2, topology_pb2, ckptmgr_pb2
+from heron.proto import tuple_pb2, ckptmgr_pb2
 
 import heron.instance.src.python.utils.system_constants as constants
 from heron.instance.src.python.utils import system_config
+from heron.instance.src.python.utils.misc.ack_batcher import AckBatcher
 
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=no-value-for-parameter
@@ -36,25 +37,33 @@ class OutgoingTupleHelper(object):
 
   Handles basic methods for sending out tuples
   1. ``init_new_control_tuple()`` or ``init_new_data_tuple()``
-  2. ``add_data_tuple()``, ``add_ack_tuple()`` and ``add_fail_tuple()``
+  2. ``add_new_data_tuple()`` and ``add_new_control_tuple()``, or ``add_ack_tuple()``
   3. ``flush_remaining()`` tuples and send out the tuples
 
+  Tuples are built directly inside the buffered sets, and each buffered set is owned by
+  the HeronTupleSet that is eventually pushed, so no tuple is copied on its way out.
+
   :ivar out_stream: (HeronCommunicator) Out-Stream. Pushed message is an instance of HeronTupleSet
   :ivar pplan_helper: (PhysicalPlanHelper) Physical Plan Helper for this component
   :ivar current_data_tuple_set: (HeronDataTupleSet) currently buffered data tuple
   :ivar current_control_tuple_set: (HeronControlTupleSet) currently buffered control tuple
+  :ivar ack_batcher: (AckBatcher) acks and fails buffered by ``add_ack_tuple()``
   """
-  make_data_tuple_set = lambda _: tuple_pb2.HeronDataTupleSet()
-  make_control_tuple_set = lambda _: tuple_pb2.HeronControlTupleSet()
   make_tuple_set = lambda _: tuple_pb2.HeronTupleSet()
-  make_stream_id = lambda _: topology_pb2.StreamId()
 
   def __init__(self, pplan_helper, out_stream):
     self.out_stream = out_stream
     self.pplan_helper = pplan_helper
 
+    # HeronTupleSet messages owning the current data and control tuple sets
+    self.current_data_msg = None
+    self.current_control_msg = None
     self.current_data_tuple_set = None
     self.current_control_tuple_set = None
+    # tuples of the current data tuple set whose custom grouping is done when it is flushed,
+    # and the values to group them on
+    self.current_grouped_tuples = []
+    self.current_grouping_values = []
 
     self.current_data_tuple_size_in_bytes = 0
     self.total_data_emitted_in_bytes = 0
@@ -66,18 +75,45 @@ class OutgoingTupleHelper(object):
     self.max_data_tuple_size_in_bytes =\
       self.sys_config.get(constants.INSTANCE_SET_DATA_TUPLE_SIZE_BYTES, sys.maxsize)
     self.control_tuple_set_capacity = self.sys_config[constants.INSTANCE_SET_CONTROL_TUPLE_CAPACITY]
+    self.ack_batcher = AckBatcher(
+        bool(self.sys_config.get(constants.INSTANCE_ACKNOWLEDGEMENT_XOR_COMBINE, False)))
 
   def send_out_tuples(self):
     """Sends out currently buffered tuples into the Out-Stream"""
     self._flush_remaining()
 
+  def add_new_data_tuple(self, stream_id, values, tuple_size_in_bytes,
+                         dest_task_ids=None, roots=None, grouping_values=None):
+    """Builds a new data tuple directly inside the currently buffered set of tuples
+
+    :param values: a list of serialized values
+    :param dest_task_ids: a list of destination task ids, or ``None``
+    :param roots: an iterable of protobuf message ``RootId``, or ``None``
+    :param grouping_values: values to choose the destination tasks of the tuple on by
+                            ``choose_tasks_batch()`` of the custom grouping of ``stream_id``
+                            when the set is flushed, or ``None``
+    :returns: the added ``HeronDataTuple``, owned by the buffered set
+    """
+    self._prepare_data_tuple_set(stream_id)
+
+    added_tuple = self.current_data_tuple_set.tuples.add()
+    added_tuple.key = 0
+    added_tuple.values.extend(values)
+    if dest_task_ids:
+      added_tuple.dest_task_ids.extend(dest_task_ids)
+    if roots:
+      added_tuple.roots.extend(roots)
+    if grouping_values is not None:
+      self.current_grouped_tuples.append(added_tuple)
+      self.current_grouping_values.append(grouping_values)
+
+    self.current_data_tuple_size_in_bytes += tuple_size_in_bytes
+    self.total_data_emitted_in_bytes += tuple_size_in_bytes
+    return added_tuple
+
   def add_data_tuple(self, stream_id, new_data_tuple, tuple_size_in_bytes):
-    """Add a new data tuple to the currently buffered set of tuples"""
-    if (self.current_data_tuple_set is None) or \
-        (self.current_data_tuple_set.stream.id != stream_id) or \
-        (len(self.current_data_tuple_set.tuples) >= self.data_tuple_set_capacity) or \
-        (self.current_data_tuple_size_in_bytes >= self.max_data_tuple_size_in_bytes):
-      self._init_new_data_tuple(stream_id)
+    """Add an already built data tuple to the currently buffered set of tuples"""
+    self._prepare_data_tuple_set(stream_id)
 
     added_tuple = self.current_data_tuple_set.tuples.add()
     added_tuple.CopyFrom(new_data_tuple)
@@ -85,20 +121,46 @@ class OutgoingTupleHelper(object):
     self.current_data_tuple_size_in_bytes += tuple_size_in_bytes
     self.total_data_emitted_in_bytes += tuple_size_in_bytes
 
+  def add_new_control_tuple(self, acked_tuple_id, roots, tuple_size_in_bytes, is_ack):
+    """Builds a new control (Ack/Fail) tuple directly inside the currently buffered set
+
+    :param acked_tuple_id: id of the acked or failed tuple
+    :param roots: an iterable of protobuf message ``RootId``
+    :param is_ack: ``True`` if Ack, ``False`` if Fail
+    :returns: the added ``AckTuple``, owned by the buffered set
+    """
+    self._prepare_control_tuple_set(is_ack)
+
+    if is_ack:
+      added_tuple = self.current_control_tuple_set.acks.add()
+    else:
+      added_tuple = self.current_control_tuple_set.fails.add()
+    added_tuple.ackedtuple = acked_tuple_id
+    added_tuple.roots.extend(roots)
+
+    self.total_data_emitted_in_bytes += tuple_size_in_bytes
+    return added_tuple
+
+  def add_ack_tuple(self, acked_tuple_id, roots, is_ack):
+    """Buffers an Ack/Fail of a received tuple, to be sent out with the others of this flush
+
+    Unlike ``add_new_control_tuple()``, acks and fails are sent out in the same control tuple set,
+    after the data tuple sets buffered so far, whatever the order they are added in.
+
+    :param acked_tuple_id: id of the acked or failed tuple
+    :param roots: an iterable of protobuf message ``RootId``, which is referred to until the flush
+    :param is_ack: ``True`` if Ack, ``False`` if Fail
+    """
+    if len(self.ack_batcher) >= self.control_tuple_set_capacity:
+      self._flush_remaining()
+    self.total_data_emitted_in_bytes += self.ack_batcher.add(acked_tuple_id, roots, is_ack)
+
   def add_control_tuple(self, new_control_tuple, tuple_size_in_bytes, is_ack):
-    """Add a new control (Ack/Fail) tuple to the currently buffered set of tuples
+    """Add an already built control (Ack/Fail) tuple to the currently buffered set of tuples
 
     :param is_ack: ``True`` if Ack, ``False`` if Fail
     """
-    if self.current_control_tuple_set is None:
-      self._init_new_control_tuple()
-    elif is_ack and (len(self.current_control_tuple_set.fails) > 0 or
-                     len(self.current_control_tuple_set.acks) >= self.control_tuple_set_capacity):
-      self._init_new_control_tuple()
-    elif not is_ack and \
-        (len(self.current_control_tuple_set.acks) > 0 or
-         len(self.current_control_tuple_set.fails) >= self.control_tuple_set_capacity):
-      self._init_new_control_tuple()
+    self._prepare_control_tuple_set(is_ack)
 
     if is_ack:
       added_tuple = self.current_control_tuple_set.acks.add()
@@ -109,6 +171,26 @@ class OutgoingTupleHelper(object):
 
     self.total_data_emitted_in_bytes += tuple_size_in_bytes
 
+  def _prepare_data_tuple_set(self, stream_id):
+    """Starts a new data tuple set if the current one cannot take a tuple for ``stream_id``"""
+    if (self.current_data_tuple_set is None) or \
+        (self.current_data_tuple_set.stream.id != stream_id) or \
+        (len(self.current_data_tuple_set.tuples) >= self.data_tuple_set_capacity) or \
+        (self.current_data_tuple_size_in_bytes >= self.max_data_tuple_size_in_bytes):
+      self._init_new_data_tuple(stream_id)
+
+  def _prepare_control_tuple_set(self, is_ack):
+    """Starts a new control tuple set if the current one cannot take an Ack/Fail tuple"""
+    if self.current_control_tuple_set is None:
+      self._init_new_control_tuple()
+    elif is_ack and (len(self.current_control_tuple_set.fails) > 0 or
+                     len(self.current_control_tuple_set.acks) >= self.control_tuple_set_capacity):
+      self._init_new_control_tuple()
+    elif not is_ack and \
+        (len(self.current_control_tuple_set.acks) > 0 or
+         len(self.current_control_tuple_set.fails) >= self.control_tuple_set_capacity):
+      self._init_new_control_tuple()
+
   def add_ckpt_state(self, ckpt_id, ckpt_state):
     """Add the checkpoint state message to be sent back the stmgr
 
@@ -133,37 +215,51 @@ class OutgoingTupleHelper(object):
     self._flush_remaining()
     self.current_data_tuple_size_in_bytes = 0
 
-    new_stream_id = self.make_stream_id()
-    new_stream_id.id = stream_id
-    new_stream_id.component_name = self.pplan_helper.my_component_name
-
-    new_data_tuple_set = self.make_data_tuple_set()
-    new_data_tuple_set.stream.CopyFrom(new_stream_id)
-    self.current_data_tuple_set = new_data_tuple_set
+    self.current_data_msg = self.make_tuple_set()
+    self.current_data_tuple_set = self.current_data_msg.data
+    self.current_data_tuple_set.stream.id = stream_id
+    self.current_data_tuple_set.stream.component_name = self.pplan_helper.my_component_name
 
   def _init_new_control_tuple(self):
     self._flush_remaining()
-    self.current_control_tuple_set = self.make_control_tuple_set()
+    self.current_control_msg = self.make_tuple_set()
+    self.current_control_tuple_set = self.current_control_msg.control
 
   def _flush_remaining(self):
     if self.current_data_tuple_set is not None:
       Log.debug("In flush_remaining() - flush data tuple set")
-      tuple_set = self.make_tuple_set()
-      tuple_set.data.CopyFrom(self.current_data_tuple_set)
-      self._push_tuple_to_stream(tuple_set)
+      if self.current_grouped_tuples:
+        self._choose_custom_grouping_tasks()
+      self._push_tuple_to_stream(self.current_data_msg)
+      self.current_data_msg = None
       self.current_data_tuple_set = None
       self.current_data_tuple_size_in_bytes = 0
 
-
     if self.current_control_tuple_set is not None:
       Log.debug("In flush_remaining() - flush control tuple set")
-      tuple_set = self.make_tuple_set()
-      tuple_set.control.CopyFrom(self.current_control_tuple_set)
-      self._push_tuple_to_stream(tuple_set)
+      self._push_tuple_to_stream(self.current_control_msg)
+      self.current_control_msg = None
       self.current_control_tuple_set = None
 
+    ack_msg = self.ack_batcher.make_tuple_set()
+    if ack_msg is not None:
+      Log.debug("In flush_remaining() - flush batched acks")
+      self._push_tuple_to_stream(ack_msg)
+
+  def _choose_custom_grouping_tasks(self):
+    """Sets the destination tasks of the tuples of the current data tuple set to be grouped"""
+    tasks_list = self.pplan_helper.choose_tasks_batch_for_custom_grouping(
+        self.current_data_tuple_set.stream.id, self.current_grouping_values)
+    for data_tuple, task_ids in zip(self.current_grouped_tuples, tasks_list):
+      data_tuple.dest_task_ids.extend(task_ids)
+    self.current_grouped_tuples = []
+    self.current_grouping_values = []
+
   def _push_tuple_to_stream(self, tuple_set):
     self.out_stream.offer(tuple_set)
 
   def is_out_queue_available(self):
     return self.out_stream.get_available_capacity() > 0
+
+  def get_out_queue_size(self):
+    return self.out_stream.get_size()
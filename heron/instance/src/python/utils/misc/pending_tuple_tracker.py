@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+'''pending_tuple_tracker.py: module for tracking tuples of a spout pending acknowledgement'''
+import array
+import random
+
+def _get_int64_typecode():
+  """Returns the array typecode of 64 bit signed integers"""
+  try:
+    array.array('q')
+    return 'q'
+  except ValueError:
+    # 'q' is only available from Python 3.3, 'l' is 64 bit on LP64 platforms
+    return 'l'
+
+_INT64 = _get_int64_typecode()
+
+class PendingTupleTracker(object):
+  """PendingTupleTracker: keeps the emitted tuples of a spout until they are acked or time out
+
+  Each tuple is kept in a slot of arrays of keys, insertion times, tuple ids and stream ids, which
+  is reused once the tuple is released, i.e. acked, failed or expired. The root key of a tuple
+  is the index of its slot and a generation of the slot, bumped whenever it is released, in
+  ``SLOT_BITS`` and the remaining bits respectively. So ``remove()`` is an O(1) lookup that needs
+  no hashing, and tells a late ack of an expired tuple from a tuple that reuses its slot. The
+  generation of a slot starts at random, so that a new incarnation of the spout does not reuse
+  the keys that its predecessor left in flight.
+
+  Keys are also appended to rotating buckets in the order of insertion, a new bucket being started
+  by ``rotate()``, called every ``timeout / nbuckets`` seconds, or when the current one is full.
+  ``expire()`` only looks at the oldest keys, and a bucket is cleared as soon as all of its tuples
+  are released, so keys of acked tuples do not pile up.
+  """
+  SLOT_BITS = 28
+  SLOT_MASK = (1 << SLOT_BITS) - 1
+  # the last three bits of sfixed64 root keys are reserved, as for random keys
+  KEY_MASK = (1 << 61) - 1
+  MAX_BUCKET_SIZE = 1 << 16
+
+  def __init__(self):
+    # key of the tuple in each slot, or the inverted next key of a free slot
+    self._keys = array.array(_INT64)
+    self._insertion_times = array.array('d')
+    # sequence number of the bucket of each slot
+    self._slot_buckets = array.array(_INT64)
+    self._tuple_ids = []
+    self._stream_ids = []
+    self._free_slots = array.array(_INT64)
+    self._size = 0
+
+    self._buckets = [array.array(_INT64)]
+    # number of pending tuples in each bucket
+    self._bucket_sizes = [0]
+    # sequence number of self._buckets[0]
+    self._first_bucket = 0
+    # index of the next key of self._buckets[0] for expire() to look at
+    self._expire_index = 0
+
+  def __len__(self):
+    return self._size
+
+  def add(self, stream_id, tuple_id, insertion_time):
+    """Adds a tuple pending acknowledgement
+
+    :returns: root key of the tuple, to be passed to ``remove()`` when it is acked or failed
+    """
+    if self._free_slots:
+      slot = self._free_slots.pop()
+      key = ~self._keys[slot]
+      self._keys[slot] = key
+      self._insertion_times[slot] = insertion_time
+      self._slot_buckets[slot] = self._first_bucket + len(self._buckets) - 1
+      self._tuple_ids[slot] = tuple_id
+      self._stream_ids[slot] = stream_id
+    else:
+      slot = len(self._keys)
+      if slot > self.SLOT_MASK:
+        raise RuntimeError("Cannot track more than %d pending tuples" % (self.SLOT_MASK + 1))
+      key = (random.randint(1, self.KEY_MASK >> self.SLOT_BITS) << self.SLOT_BITS) | slot
+      self._keys.append(key)
+      self._insertion_times.append(insertion_time)
+      self._slot_buckets.append(self._first_bucket + len(self._buckets) - 1)
+      self._tuple_ids.append(tuple_id)
+      self._stream_ids.append(stream_id)
+    self._size += 1
+
+    bucket = self._buckets[-1]
+    bucket.append(key)
+    self._bucket_sizes[-1] += 1
+    if len(bucket) >= self.MAX_BUCKET_SIZE:
+      self.rotate()
+    return key
+
+  def remove(self, key):
+    """Releases the tuple of a given root key
+
+    :returns: ``(stream_id, tuple_id, insertion_time)`` of the tuple, or None if it is not pending
+    """
+    slot = key & self.SLOT_MASK
+    if slot >= len(self._keys) or self._keys[slot] != key:
+      return None
+    return self._release(slot)
+
+  def expire(self, current_time, timeout_sec):
+    """Releases tuples added ``timeout_sec`` or more before ``current_time``
+
+    :returns: list of ``(stream_id, tuple_id, insertion_time)`` of expired tuples, oldest first
+    """
+    deadline = current_time - timeout_sec
+    keys = self._keys
+    expired = []
+    while True:
+      bucket = self._buckets[0]
+      while self._expire_index < len(bucket):
+        key = bucket[self._expire_index]
+        slot = key & self.SLOT_MASK
+        if keys[slot] == key:
+          if self._insertion_times[slot] > deadline:
+            return expired
+          # move on first, as releasing the last tuple of the bucket clears it
+          self._expire_index += 1
+          expired.append(self._release(slot))
+        else:
+          self._expire_index += 1
+      if len(self._buckets) == 1:
+        return expired
+      self._drop_first_bucket()
+
+  def rotate(self):
+    """Starts a new bucket for tuples added from now on"""
+    self._buckets.append(array.array(_INT64))
+    self._bucket_sizes.append(0)
+    while len(self._buckets) > 1 and self._bucket_sizes[0] == 0:
+      self._drop_first_bucket()
+
+  def _drop_first_bucket(self):
+    self._buckets.pop(0)
+    self._bucket_sizes.pop(0)
+    self._first_bucket += 1
+    self._expire_index = 0
+
+  def _release(self, slot):
+    key = self._keys[slot]
+    self._keys[slot] = ~((key + (1 << self.SLOT_BITS)) & self.KEY_MASK)
+    self._free_slots.append(slot)
+    self._size -= 1
+
+    index = self._slot_buckets[slot] - self._first_bucket
+    self._bucket_sizes[index] -= 1
+    if self._bucket_sizes[index] == 0:
+      # none of its keys need to be looked at any more
+      del self._buckets[index][:]
+      if index == 0:
+        self._expire_index = 0
+
+    tuple_id = self._tuple_ids[slot]
+    stream_id = self._stream_ids[slot]
+    # don't hold on to tuple ids of released tuples
+    self._tuple_ids[slot] = None
+    self._stream_ids[slot] = None
+    return stream_id, tuple_id, self._insertion_times[slot]
@@ -273,3 +273,14 @@ class PhysicalPlanHelper(object):
     :return: task ids
     """
     return self.custom_grouper.choose_tasks(stream_id, values)
+
+  def is_custom_grouping_batched(self, stream_id):
+    """Returns whether target task ids of ``stream_id`` are chosen when tuples are sent out"""
+    return self.custom_grouper.is_batched(stream_id)
+
+  def choose_tasks_batch_for_custom_grouping(self, stream_id, values_list):
+    """Choose target task ids for custom grouping of each of the given values
+
+    :return: list of task ids for each of the values
+    """
+    return self.custom_grouper.choose_tasks_batch(stream_id, values_list)
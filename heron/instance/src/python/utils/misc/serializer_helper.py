@@ -20,7 +20,7 @@
 
 '''serializer_helper.py'''
 
-from heronpy.api.serializer import PythonSerializer
+from heronpy.api.serializer import PythonSerializer, StructSerializer
 
 import heronpy.api.api_constants as constants
 
@@ -41,6 +41,9 @@ class SerializerHelper(object):
         pex_loader.load_pex(topo_pex_path)
         serializer_cls = pex_loader.import_and_get_class(topo_pex_path, serializer_clsname)
         serializer = serializer_cls()
+        serializer.initialize(cluster_config)
+        if isinstance(serializer, StructSerializer):
+          serializer.check_fields(context.component_to_out_fields)
         return serializer
       except Exception as e:
         raise RuntimeError("Error with loading custom serializer class: %s, with error message: %s"
@@ -111,6 +111,8 @@ INSTANCE_METRICS_SYSTEM_SAMPLE_INTERVAL_SEC = "heron.instance.metrics.system.sam
 # For instance, if a tuple's timeout is 30s, and NBUCKETS is 10
 # The spout instance will check whether there are timeout tuples every 3 seconds
 INSTANCE_ACKNOWLEDGEMENT_NBUCKETS = "heron.instance.acknowledgement.nbuckets"
+# Whether a bolt instance merges the acks of the same root into one per flush
+INSTANCE_ACKNOWLEDGEMENT_XOR_COMBINE = "heron.instance.acknowledgement.xor.combine"
 
 # The expected size on read queue in bolt
 INSTANCE_TUNING_EXPECTED_BOLT_READ_QUEUE_SIZE \
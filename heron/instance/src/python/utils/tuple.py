@@ -21,67 +21,239 @@
 '''tuple.py: heron's default data type'''
 
 import time
-import random
 
-from collections import namedtuple
+from collections import OrderedDict
+
+try:
+  from collections.abc import Sequence
+except ImportError:
+  from collections import Sequence
 from heronpy.api.tuple import Tuple
 
-HeronTuple = namedtuple('Tuple', Tuple._fields + ('creation_time', 'roots'))
-"""Internal manifestation of the Heron Tuple
-
-:ivar id: the ID of the Tuple
-:type id: str
-:ivar component: component that the Tuple was generated from.
-:type component: str
-:ivar stream: the stream that the Tuple was emitted into.
-:type stream: str
-:ivar task: the task the Tuple was generated from.
-:type task: int
-:ivar values: the payload of the Tuple where data is stored.
-:type values: tuple or list
-:ivar creation_time: the time the Tuple was created
-:type creation_time: float
-:ivar roots: a list of RootId (protobuf)
-:type roots: list
-"""
-
-class RootTupleInfo(namedtuple('RootTupleInfo', 'stream_id tuple_id insertion_time key')):
-  __slots__ = ()
-  def is_expired(self, current_time, timeout_sec):
-    return self.insertion_time + timeout_sec - current_time <= 0
+from heron.common.src.python.utils.log import Log
+from heron.proto import tuple_pb2
+
+# task of a HeronTuple that is looked up from its roots when asked for
+_TASK_FROM_ROOTS = object()
+
+class HeronTuple(object):
+  """Internal manifestation of the Heron Tuple
+
+  It has the fields of ``heronpy.api.tuple.Tuple`` and, like a namedtuple, can be indexed and
+  unpacked in the order of ``_fields``, and has its ``_make``, ``_asdict`` and ``_replace``.
+  Fields derived from the received ``HeronDataTuple``, ``id`` and ``task``, are only worked out
+  when asked for, and ``task`` is when the tuple is pickled.
+
+  :ivar id: the ID of the Tuple
+  :type id: str
+  :ivar component: component that the Tuple was generated from.
+  :type component: str
+  :ivar stream: the stream that the Tuple was emitted into.
+  :type stream: str
+  :ivar task: the task the Tuple was generated from.
+  :type task: int
+  :ivar values: the payload of the Tuple where data is stored.
+  :type values: list or LazyTupleValues
+  :ivar creation_time: the time the Tuple was created
+  :type creation_time: float
+  :ivar roots: a list of RootId (protobuf)
+  :type roots: list
+  """
+  __slots__ = ('_id', 'component', 'stream', '_task', 'values', 'creation_time', 'roots')
+  _fields = Tuple._fields + ('creation_time', 'roots')
+
+  # pylint: disable=redefined-builtin
+  def __init__(self, id, component, stream, task, values, creation_time, roots):
+    self._id = id
+    self.component = component
+    self.stream = stream
+    self._task = task
+    self.values = values
+    self.creation_time = creation_time
+    self.roots = roots
+
+  @property
+  def id(self):
+    return str(self._id)
+
+  @property
+  def key(self):
+    """Key of the received ``HeronDataTuple``, as acks and fails refer to it"""
+    return self._id
+
+  @property
+  def task(self):
+    if self._task is _TASK_FROM_ROOTS:
+      roots = self.roots
+      self._task = roots[0].taskid if roots is not None and len(roots) > 0 else None
+    return self._task
+
+  @classmethod
+  def _make(cls, iterable):
+    return cls(*iterable)
+
+  def _asdict(self):
+    return OrderedDict(zip(self._fields, self))
+
+  def _replace(self, **kwds):
+    args = self._get_args()
+    for index, field in enumerate(self._fields):
+      if field in kwds:
+        args[index] = kwds.pop(field)
+    if kwds:
+      raise ValueError("Got unexpected field names: %r" % list(kwds))
+    return HeronTuple(*args)
+
+  def _get_args(self):
+    """Returns the arguments of the tuple, with its id as received"""
+    return [self._id, self.component, self.stream, self.task, self.values, self.creation_time,
+            self.roots]
+
+  def __reduce__(self):
+    return (HeronTuple, tuple(self._get_args()))
+
+  def __iter__(self):
+    for field in self._fields:
+      yield getattr(self, field)
+
+  def __len__(self):
+    return len(self._fields)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return tuple(self)[index]
+    return getattr(self, self._fields[index])
+
+  def __eq__(self, other):
+    if isinstance(other, HeronTuple):
+      return tuple(self) == tuple(other)
+    return NotImplemented
+
+  def __ne__(self, other):
+    equal = self.__eq__(other)
+    return equal if equal is NotImplemented else not equal
+
+  __hash__ = None
+
+  def __repr__(self):
+    return "Tuple(%s)" % ", ".join("%s=%r" % (field, value)
+                                   for field, value in zip(self._fields, self))
+
+class LazyTupleValues(object):
+  """Read-only sequence of the values of a received tuple, each deserialized on first access
+
+  The serialized values stay in the ``HeronDataTuple`` they were received in, so a bolt that only
+  reads some of the fields of a tuple never pays for deserializing the others. It compares equal
+  to a list or tuple of the same values, and is pickled as a list.
+  """
+  __slots__ = ('_serialized_values', '_values', '_serializer', '_component', '_stream_id')
+  _NOT_DESERIALIZED = object()
+
+  def __init__(self, serialized_values, serializer, component, stream_id):
+    self._serialized_values = serialized_values
+    self._values = None
+    self._serializer = serializer
+    self._component = component
+    self._stream_id = stream_id
+
+  def __len__(self):
+    return len(self._serialized_values)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(len(self)))]
+    values = self._values
+    if values is None:
+      values = self._values = [self._NOT_DESERIALIZED] * len(self._serialized_values)
+    value = values[index]
+    if value is self._NOT_DESERIALIZED:
+      if index < 0:
+        index += len(values)
+      value = values[index] = self._serializer.deserialize_field(
+          self._component, self._stream_id, index, self._serialized_values[index])
+    return value
+
+  def __iter__(self):
+    for index in range(len(self)):
+      yield self[index]
+
+  def index(self, value):
+    return list(self).index(value)
+
+  def count(self, value):
+    return list(self).count(value)
+
+  def __eq__(self, other):
+    if isinstance(other, (LazyTupleValues, list, tuple)):
+      return list(self) == list(other)
+    return NotImplemented
+
+  def __ne__(self, other):
+    equal = self.__eq__(other)
+    return equal if equal is NotImplemented else not equal
+
+  __hash__ = None
+
+  def __repr__(self):
+    return repr(list(self))
+
+  def __reduce__(self):
+    return (list, (list(self),))
+
+# registered rather than subclassed, as abstract base classes come with a __dict__ in Python 2
+Sequence.register(LazyTupleValues)
+
+class LazyDataTupleSet(object):
+  """Read-only view over a ``HeronDataTupleSet2`` received from the Stream Manager
+
+  Each serialized ``HeronDataTuple`` is parsed only when iteration reaches it, so
+  incoming tuples are never assembled into, or copied through, a ``HeronDataTupleSet``.
+
+  :ivar stream: protobuf message ``StreamId`` of the tuples
+  """
+  __slots__ = ('stream', '_raw_tuples')
+
+  def __init__(self, data_tuple_set_2):
+    self.stream = data_tuple_set_2.stream
+    self._raw_tuples = data_tuple_set_2.tuples
+
+  def __len__(self):
+    return len(self._raw_tuples)
+
+  def __iter__(self):
+    for raw_tuple in self._raw_tuples:
+      data_tuple = tuple_pb2.HeronDataTuple()
+      try:
+        data_tuple.ParseFromString(raw_tuple)
+      except Exception:
+        Log.exception('Fail to deserialize HeronDataTuple')
+        continue
+      yield data_tuple
 
 class TupleHelper(object):
   """Tuple Helper, returns Heron Tuple compatible tuple"""
   TICK_TUPLE_ID = "__tick"
   TICK_SOURCE_COMPONENT = "__system"
 
-  #last three bits are used for type
-  MAX_SFIXED64_RAND_BITS = 61
-
   @staticmethod
-  def make_tuple(stream, tuple_key, values, roots=None):
+  def make_tuple(stream, tuple_key, values, roots=None, creation_time=None):
     """Creates a HeronTuple
 
     :param stream: protobuf message ``StreamId``
     :param tuple_key: tuple id
-    :param values: a list of values
-    :param roots: a list of protobuf message ``RootId``
+    :param values: a list of values, or LazyTupleValues
+    :param roots: a list of protobuf message ``RootId``, which is referred to rather than copied
+    :param creation_time: time the tuple was created, now if not given
     """
-    component_name = stream.component_name
-    stream_id = stream.id
-    gen_task = roots[0].taskid if roots is not None and len(roots) > 0 else None
-    return HeronTuple(id=str(tuple_key), component=component_name, stream=stream_id,
-                      task=gen_task, values=values, creation_time=time.time(), roots=roots)
+    if creation_time is None:
+      creation_time = time.time()
+    return HeronTuple(id=tuple_key, component=stream.component_name, stream=stream.id,
+                      task=_TASK_FROM_ROOTS, values=values, creation_time=creation_time,
+                      roots=roots)
+
   @staticmethod
   def make_tick_tuple():
     """Creates a TickTuple"""
     return HeronTuple(id=TupleHelper.TICK_TUPLE_ID, component=TupleHelper.TICK_SOURCE_COMPONENT,
                       stream=TupleHelper.TICK_TUPLE_ID, task=None, values=None,
                       creation_time=time.time(), roots=None)
-
-  @staticmethod
-  def make_root_tuple_info(stream_id, tuple_id):
-    """Creates a RootTupleInfo"""
-    key = random.getrandbits(TupleHelper.MAX_SFIXED64_RAND_BITS)
-    return RootTupleInfo(stream_id=stream_id, tuple_id=tuple_id,
-                         insertion_time=time.time(), key=key)
@@ -19,10 +19,14 @@
 #  under the License.
 
 '''Unittest for EventLooper'''
+import sys
 import time
 import unittest2 as unittest
 
+from mock import patch
+
 from heron.instance.src.python.network import EventLooper
+from heron.instance.src.python.network import event_looper
 
 # pylint: disable=missing-docstring
 # pylint: disable=W0212
@@ -120,3 +124,67 @@ class EventLooperTest(unittest.TestCase):
     self.looper._trigger_timers()
     self.looper._trigger_timers()
     self.assertEqual(10, self.global_value)
+
+  def test_cancel_timer_task(self):
+    def to_run():
+      self.global_value = 10
+
+    timer = self.looper.register_timer_task_in_sec(to_run, 0.0)
+    self.assertTrue(timer.pending)
+    self.assertEqual(len(self.looper.timer_tasks), 1)
+    self.assertTrue(timer.cancel())
+    self.assertFalse(timer.pending)
+    self.assertFalse(timer.cancel())
+    self.assertEqual(self.looper.timer_tasks, [])
+    self.assertEqual(self.looper._get_next_timeout_interval(), sys.maxsize)
+
+    self.looper._trigger_timers()
+    self.assertEqual(6, self.global_value)
+
+  def test_cancel_next_timer_task(self):
+    first = self.looper.register_timer_task_in_sec(lambda: None, 0.0)
+    self.looper.register_timer_task_in_sec(lambda: None, 1.0)
+    self.assertLessEqual(self.looper._get_next_timeout_interval(), 0.0)
+    first.cancel()
+    # the timeout is the one of the remaining timer, rather than the cancelled one
+    self.assertGreater(self.looper._get_next_timeout_interval(), 0.0)
+
+  @unittest.skipUnless(sys.platform.startswith('linux'), "monotonic clock is read on Linux")
+  def test_monotonic_clock(self):
+    self.assertIsNot(event_looper._clock, time.time)
+    with patch("time.time", lambda: 0.0):
+      # the system time going back in time leaves the clock unaffected
+      first = event_looper._clock()
+      second = event_looper._clock()
+    self.assertGreater(first, 0.0)
+    self.assertGreaterEqual(second, first)
+
+  def test_timer_wheel(self):
+    clock = [1000.0]
+    triggered = []
+    with patch("heron.instance.src.python.network.event_looper._clock", lambda: clock[0]):
+      looper = EventLooper()
+      # spread over all levels of the wheel, registered out of order
+      intervals = [3600.0, 0.5, 86400.0, 0.005, 60.0, 2.56, 0.0, 30.0, 86400.0 * 400]
+      for interval in intervals:
+        looper.register_timer_task_in_sec(lambda i=interval: triggered.append(i), interval)
+      self.assertEqual([round(task[0] - clock[0], 6) for task in looper.timer_tasks],
+                       sorted(intervals))
+      self.assertEqual(looper._get_next_timeout_interval(), 0.0)
+
+      # advance the clock to right before, then right at each expiration
+      for interval in sorted(intervals):
+        clock[0] = 1000.0 + interval - 0.001
+        looper._trigger_timers()
+        self.assertNotIn(interval, triggered)
+        clock[0] = 1000.0 + interval
+        looper._trigger_timers()
+        self.assertEqual(triggered[-1], interval)
+        if looper.timer_tasks:
+          # may wake up earlier to cascade timers down, but never later
+          next_timeout = looper._get_next_timeout_interval()
+          self.assertGreaterEqual(next_timeout, 0.0)
+          self.assertLessEqual(next_timeout, looper.timer_tasks[0][0] - clock[0] + 1e-6)
+
+    self.assertEqual(triggered, sorted(intervals))
+    self.assertEqual(looper.timer_tasks, [])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''Microbenchmark of GatewayLooper.poll() and wake_up()
+
+Idle sockets are polled repeatedly by each looper available, and wake ups are issued between
+polls. No timing is asserted; run with ``pytest --durations=0`` to see how long each takes.
+'''
+import asyncore
+import select
+import socket
+import unittest2 as unittest
+
+from mock import patch
+
+from heron.instance.src.python.network.gateway_looper import GatewayLooper, EpollGatewayLooper
+
+# pylint: disable=missing-docstring
+
+class IdleDispatcher(asyncore.dispatcher):
+  def __init__(self, sock, socket_map):
+    asyncore.dispatcher.__init__(self, sock=sock, map=socket_map)
+    self.reads = 0
+
+  def readable(self):
+    return True
+
+  def writable(self):
+    return False
+
+  def handle_read(self):
+    self.reads += 1
+    self.recv(1024)
+
+class GatewayLooperBenchmark(unittest.TestCase):
+  NUM_POLLS = 5000
+  NUM_WAKEUPS = 1000
+  NUM_SOCKETS = 16
+
+  def setUp(self):
+    self.socket_map = {}
+    self.peers = []
+    for _ in range(self.NUM_SOCKETS):
+      sock, peer = socket.socketpair()
+      IdleDispatcher(sock, self.socket_map)
+      self.peers.append(peer)
+
+  def tearDown(self):
+    for dispatcher in self.socket_map.values():
+      dispatcher.close()
+    for peer in self.peers:
+      peer.close()
+
+  def run_polls(self, looper):
+    for _ in range(self.NUM_POLLS):
+      looper.poll(timeout=0.0)
+    looper.on_exit()
+    # idle sockets are never dispatched
+    self.assertEqual([dispatcher.reads for dispatcher in self.socket_map.values()],
+                     [0] * self.NUM_SOCKETS)
+
+  def test_select_poll_iterations(self):
+    self.run_polls(GatewayLooper(self.socket_map))
+
+  @unittest.skipUnless(hasattr(select, "epoll"), "epoll is only available on Linux")
+  def test_epoll_poll_iterations(self):
+    self.run_polls(EpollGatewayLooper(self.socket_map))
+
+  def test_wakeup_syscalls(self):
+    looper = GatewayLooper(self.socket_map)
+    with patch("heron.instance.src.python.network.gateway_looper.os.write") as mock_write:
+      for _ in range(self.NUM_WAKEUPS):
+        looper.wake_up()
+      # wake ups between two polls write to the pipe once
+      self.assertEqual(mock_write.call_count, 1)
+    looper.on_exit()
@@ -19,11 +19,15 @@
 #  under the License.
 
 '''Unittest for GatewayLooper'''
+import asyncore
+import socket
 import threading
 import time
 import unittest2 as unittest
 
-from heron.instance.src.python.network.gateway_looper import GatewayLooper
+from mock import patch
+
+from heron.instance.src.python.network.gateway_looper import GatewayLooper, EpollGatewayLooper
 
 # pylint: disable=missing-docstring
 class GatewayLooperTest(unittest.TestCase):
@@ -43,8 +47,112 @@ class GatewayLooperTest(unittest.TestCase):
       start, end = self.prepare_wakeup_test(sleep)
       self.assertAlmostEqual(start + sleep, end, delta=0.05)
 
-  def prepare_wakeup_test(self, sleep, poll_timeout=30.0):
-    looper = GatewayLooper(socket_map={})
+  def test_epoll_wakeup(self):
+    sleep_times = [0.1, 0.3, 0.5]
+    for sleep in sleep_times:
+      start, end = self.prepare_wakeup_test(sleep, looper_cls=EpollGatewayLooper)
+      self.assertAlmostEqual(start + sleep, end, delta=0.05)
+
+  def test_wakeup_coalesced(self):
+    for looper_cls in (GatewayLooper, EpollGatewayLooper):
+      looper = looper_cls(socket_map={})
+      with patch("heron.instance.src.python.network.gateway_looper.os.write") as mock_write:
+        for _ in range(10):
+          looper.wake_up()
+        self.assertEqual(mock_write.call_count, 1)
+      # a real wake up byte, as the mocked write did not send one
+      looper._wakeup_pending = False
+      looper.wake_up()
+      looper.poll(timeout=0.0)
+      self.assertFalse(looper._wakeup_pending)
+      with patch("heron.instance.src.python.network.gateway_looper.os.write") as mock_write:
+        looper.wake_up()
+        self.assertEqual(mock_write.call_count, 1)
+
+  def test_epoll_dispatch(self):
+    socket_map = {}
+    looper = EpollGatewayLooper(socket_map)
+    sock, peer = socket.socketpair()
+    dispatcher = RecordingDispatcher(sock, socket_map)
+
+    # nothing to write and nothing to read
+    looper.poll(timeout=0.0)
+    self.assertEqual(dispatcher.events, [])
+
+    peer.send("data")
+    looper.poll(timeout=1.0)
+    self.assertEqual(dispatcher.events, ["read"])
+
+    # interest set is modified when writable() changes
+    dispatcher.want_write = True
+    looper.poll(timeout=1.0)
+    self.assertEqual(dispatcher.events, ["read", "write"])
+
+    # closed dispatchers are unregistered
+    dispatcher.close()
+    looper.poll(timeout=0.0)
+    self.assertEqual(looper._registered, {})
+    peer.close()
+
+  def test_epoll_reused_fd(self):
+    socket_map = {}
+    looper = EpollGatewayLooper(socket_map)
+    sock, peer = socket.socketpair()
+    dispatcher = RecordingDispatcher(sock, socket_map)
+    looper.poll(timeout=0.0)
+
+    # the fd is closed and reused by a new socket between two polls, with the same interests
+    fd = dispatcher.socket.fileno()
+    dispatcher.close()
+    peer.close()
+    sock, peer = socket.socketpair()
+    if peer.fileno() == fd:
+      sock, peer = peer, sock
+    self.assertEqual(sock.fileno(), fd)
+    new_dispatcher = RecordingDispatcher(sock, socket_map)
+    peer.send("data")
+    looper.poll(timeout=1.0)
+    self.assertEqual(new_dispatcher.events, ["read"])
+    new_dispatcher.close()
+    peer.close()
+
+  def test_epoll_reconnect_on_reused_fd(self):
+    socket_map = {}
+    looper = EpollGatewayLooper(socket_map)
+    sock, peer = socket.socketpair()
+    dispatcher = RecordingDispatcher(sock, socket_map)
+    looper.poll(timeout=0.0)
+
+    # the same dispatcher reconnects with a new socket on the same fd, as HeronClient does
+    fd = dispatcher.socket.fileno()
+    dispatcher.close()
+    peer.close()
+    sock, peer = socket.socketpair()
+    if peer.fileno() == fd:
+      sock, peer = peer, sock
+    self.assertEqual(sock.fileno(), fd)
+    dispatcher.set_socket(sock, socket_map)
+    peer.send("data")
+    looper.poll(timeout=1.0)
+    self.assertEqual(dispatcher.events, ["read"])
+
+    # and with different interests
+    fd = dispatcher.socket.fileno()
+    dispatcher.close()
+    peer.close()
+    sock, peer = socket.socketpair()
+    if peer.fileno() == fd:
+      sock, peer = peer, sock
+    self.assertEqual(sock.fileno(), fd)
+    dispatcher.set_socket(sock, socket_map)
+    dispatcher.want_write = True
+    looper.poll(timeout=1.0)
+    self.assertIn("write", dispatcher.events[1:])
+    dispatcher.close()
+    peer.close()
+
+  def prepare_wakeup_test(self, sleep, poll_timeout=30.0, looper_cls=GatewayLooper):
+    looper = looper_cls(socket_map={})
     waker = threading.Thread(target=self.sleep_and_call_wakeup, args=(sleep, looper))
     waker.start()
 
@@ -53,3 +161,23 @@ class GatewayLooperTest(unittest.TestCase):
     looper.poll(timeout=poll_timeout)
     end_time = time.time()
     return start_time, end_time
+
+class RecordingDispatcher(asyncore.dispatcher):
+  def __init__(self, sock, socket_map):
+    asyncore.dispatcher.__init__(self, sock=sock, map=socket_map)
+    self.events = []
+    self.want_write = False
+
+  def readable(self):
+    return True
+
+  def writable(self):
+    return self.want_write
+
+  def handle_read(self):
+    self.events.append("read")
+    self.recv(1024)
+
+  def handle_write(self):
+    self.events.append("write")
+    self.want_write = False
@@ -23,7 +23,7 @@
 # pylint: disable=protected-access
 
 import unittest2 as unittest
-from heron.instance.src.python.network import StatusCode
+from heron.instance.src.python.network import StatusCode, OutgoingPacket, REQID, EventLooper
 import heron.instance.tests.python.network.mock_generator_client as mock_generator
 import heron.instance.tests.python.mock_protobuf as mock_protobuf
 
@@ -67,6 +67,20 @@ class ClientTest(unittest.TestCase):
       self.mock_client._handle_packet(pkt)
       self.assertEqual(self.mock_client.incoming_msg, msg)
 
+  def test_timeout_task_cancelled_on_response(self):
+    self.mock_client.looper = EventLooper()
+    message = mock_protobuf.get_mock_register_response()
+    self.mock_client.send_request(message, None, message.__class__(), 10.0)
+    self.assertEqual(len(self.mock_client.looper.timer_tasks), 1)
+    reqid, timeout_task = self.mock_client.timeout_task_map.items()[0]
+
+    packet = mock_generator.convert_to_incoming_packet(reqid, message)
+    self.mock_client._handle_packet(packet)
+    self.assertEqual(self.mock_client.on_response_status, StatusCode.OK)
+    self.assertFalse(timeout_task.pending)
+    self.assertEqual(self.mock_client.timeout_task_map, {})
+    self.assertEqual(self.mock_client.looper.timer_tasks, [])
+
   def test_handle_read(self):
     # valid packets
     self.mock_client.dispatcher.prepare_valid_response()
@@ -79,3 +93,46 @@ class ClientTest(unittest.TestCase):
     self.assertIsNotNone(self.mock_client.incomplete_pkt)
     self.assertTrue(self.mock_client.incomplete_pkt.is_header_read)
     self.assertFalse(self.mock_client.incomplete_pkt.is_complete)
+
+  def test_handle_write(self):
+    # queued packets are coalesced into a single send()
+    raw_list = []
+    for message in [mock_protobuf.get_mock_config(), mock_protobuf.get_mock_bolt()]:
+      pkt = OutgoingPacket.create_packet(REQID.generate_zero(), message)
+      raw_list.append(pkt.raw)
+      self.mock_client._send_packet(pkt)
+    self.mock_client.handle_write()
+    self.assertEqual(self.mock_client.dispatcher.sent, [''.join(raw_list)])
+    self.assertEqual(len(self.mock_client.out_buffer), 0)
+    self.assertEqual(self.mock_client.total_pkt_written, 2)
+
+  def test_send_coalesced_max_bytes(self):
+    pkts = []
+    for _ in range(3):
+      pkt = OutgoingPacket.create_packet(REQID.generate_zero(), mock_protobuf.get_mock_config())
+      pkts.append(pkt)
+      self.mock_client._send_packet(pkt)
+    # packets are gathered only as long as they fit
+    sent, pkts_sent, _ = self.mock_client._send_coalesced(len(pkts[0]) * 2 + 1)
+    self.assertEqual(sent, len(pkts[0]) * 2)
+    self.assertEqual(pkts_sent, 2)
+    # the head is sent even when it is larger than the limit
+    sent, pkts_sent, _ = self.mock_client._send_coalesced(1)
+    self.assertEqual(sent, len(pkts[2]))
+    self.assertEqual(pkts_sent, 1)
+    self.assertEqual(''.join(self.mock_client.dispatcher.sent), ''.join(pkt.raw for pkt in pkts))
+
+  def test_handle_write_partial(self):
+    pkt = OutgoingPacket.create_packet(REQID.generate_zero(), mock_protobuf.get_mock_config())
+    self.mock_client._send_packet(pkt)
+    self.mock_client.dispatcher.prepare_partial_send(5)
+    self.mock_client.handle_write()
+    self.assertEqual(pkt.offset, 5)
+    self.assertFalse(pkt.sent_complete)
+    self.assertTrue(self.mock_client.writable())
+
+    self.mock_client.dispatcher.prepare_partial_send(None)
+    self.mock_client.handle_write()
+    self.assertTrue(pkt.sent_complete)
+    self.assertEqual(''.join(self.mock_client.dispatcher.sent), pkt.raw)
+    self.assertEqual(len(self.mock_client.out_buffer), 0)
@@ -42,8 +42,6 @@ def convert_to_incoming_packet(reqid, message):
   dispatcher.prepare_with_raw(raw)
   packet = IncomingPacket()
   packet.read(dispatcher)
-
-  packet.data = packet.data
   return packet
 
 # Returns a list of mock request packets (REQID is non-zero)
@@ -105,6 +103,8 @@ class MockDispatcher(object):
     self.to_be_received = ""
     self.eagain_test = False
     self.fatal_error_test = False
+    self.sent = []
+    self.max_send_size = None
 
   def prepare_with_raw(self, raw):
     """the content of ``raw`` will be prepared in the recv buffer"""
@@ -119,12 +119,16 @@ class MockDispatcher(object):
   def prepare_header_only(self):
     """a packet with just a header (incomplete packet) will be prepared in the recv buffer"""
     pkt = get_mock_requst_packets(is_message=False)[0][0]
-    self.to_be_received = pkt.header
+    self.to_be_received = bytes(pkt.header)
 
   def prepare_partial_data(self):
     """a partial data packet will be prepared in the recv buffer"""
     pkt = get_mock_requst_packets(is_message=False)[0][0]
-    self.to_be_received = pkt.header + pkt.data[:self.PARTIAL_DATA_SIZE]
+    self.to_be_received = bytes(pkt.header) + pkt.data[:self.PARTIAL_DATA_SIZE].tobytes()
+
+  def prepare_partial_send(self, max_send_size):
+    """prepare so that at most ``max_send_size`` bytes are sent per send() call"""
+    self.max_send_size = max_send_size
 
   def prepare_eagain(self):
     """prepare so that EAGAIN error is raised when recv() is called """
@@ -145,10 +149,19 @@ class MockDispatcher(object):
     self.to_be_received = self.to_be_received[numbytes:]
     return ret
 
-  # pylint: disable=no-self-use
+  def recv_into(self, buf, numbytes):
+    """reads ``numbytes`` from the recv buffer into ``buf``"""
+    ret = self.recv(numbytes)
+    buf[:len(ret)] = ret
+    return len(ret)
+
   def send(self, buf):
     """mock sends the content of a given buffer"""
-    return len(buf)
+    sent = len(buf)
+    if self.max_send_size is not None:
+      sent = min(sent, self.max_send_size)
+    self.sent.append(str(buf[:sent]))
+    return sent
 
 class MockHeronClient(HeronClient):
   HOST = '127.0.0.1'
@@ -179,6 +192,12 @@ class MockHeronClient(HeronClient):
   def recv(self, numbytes):
     return self.dispatcher.recv(numbytes)
 
+  def recv_into(self, buf, numbytes):
+    return self.dispatcher.recv_into(buf, numbytes)
+
+  def send(self, data):
+    return self.dispatcher.send(data)
+
   def _handle_packet(self, packet):
     # should only be called when packet is complete
     self.called_handle_packet = True
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''Microbenchmark of OutgoingPacket.create_packet()
+
+Packets of tuple sets of different sizes are created repeatedly, and checked to decode to the
+message. No timing is asserted; run with ``pytest --durations=0`` to see how long each takes.
+'''
+import unittest2 as unittest
+
+from heron.instance.src.python.network import HeronProtocol, IncomingPacket, OutgoingPacket, REQID
+from heron.proto import tuple_pb2
+from heron.instance.tests.python.network.mock_generator_client import MockDispatcher
+
+# pylint: disable=missing-docstring
+
+def make_tuple_set(num_tuples, value_size):
+  tuple_set = tuple_pb2.HeronTupleSet()
+  tuple_set.src_task_id = 1
+  tuple_set.data.stream.id = "default"
+  tuple_set.data.stream.component_name = "component"
+  for i in range(num_tuples):
+    data_tuple = tuple_set.data.tuples.add()
+    data_tuple.key = i
+    data_tuple.values.append("x" * value_size)
+  return tuple_set
+
+class CreatePacketBenchmark(unittest.TestCase):
+  NUM_RUNS = 2000
+
+  def run_benchmark(self, num_tuples, value_size):
+    reqid = REQID.generate()
+    message = make_tuple_set(num_tuples, value_size)
+    for _ in range(self.NUM_RUNS):
+      packet = OutgoingPacket.create_packet(reqid, message)
+
+    dispatcher = MockDispatcher()
+    dispatcher.prepare_with_raw(packet.raw)
+    incoming = IncomingPacket()
+    incoming.read(dispatcher)
+    typename, decoded_reqid, serialized_message = HeronProtocol.decode_packet(incoming)
+    self.assertEqual(typename, message.DESCRIPTOR.full_name)
+    self.assertEqual(decoded_reqid, reqid)
+    self.assertEqual(str(serialized_message), message.SerializeToString())
+
+  def test_small_tuple_set(self):
+    self.run_benchmark(num_tuples=10, value_size=16)
+
+  def test_large_tuple_set(self):
+    self.run_benchmark(num_tuples=1000, value_size=128)
@@ -42,6 +42,22 @@ class ProtocolTest(unittest.TestCase):
     self.assertEqual(packed_zero, bytearray(0 for i in range(32)))
     self.assertTrue(zero_reqid.is_zero())
 
+  def test_reqid_value_type(self):
+    reqid = REQID.generate()
+    same_reqid = REQID.unpack(bytearray(reqid.pack()))
+    self.assertIsNot(reqid, same_reqid)
+    self.assertEqual(hash(reqid), hash(same_reqid))
+    self.assertFalse(reqid != same_reqid)
+    self.assertIn(same_reqid, {reqid: None})
+
+    # zero REQIDs are always the same object
+    self.assertIs(REQID.generate_zero(), REQID.ZERO)
+    self.assertIs(REQID.unpack(bytearray(REQID.REQID_SIZE)), REQID.ZERO)
+    self.assertEqual(str(REQID.ZERO), "ZERO")
+
+    with self.assertRaises(AttributeError):
+      reqid.bytes = REQID.ZERO_BYTES
+
   def test_encode_decode_packet(self):
     # get_mock_packets() uses OutgoingPacket.create_packet() to encode
     pkt_list, raw_list = mock_generator.get_mock_requst_packets(is_message=False)
@@ -50,13 +66,33 @@ class ProtocolTest(unittest.TestCase):
       typename, reqid, seriazelid_msg = HeronProtocol.decode_packet(pkt)
       self.assertEqual(reqid, raw_reqid)
       self.assertEqual(typename, raw_message.DESCRIPTOR.full_name)
-      self.assertEqual(seriazelid_msg, raw_message.SerializeToString())
+      self.assertEqual(str(seriazelid_msg), raw_message.SerializeToString())
 
   def test_fail_decode_packet(self):
     packet = mock_generator.get_fail_packet()
     with self.assertRaises(RuntimeError):
       HeronProtocol.decode_packet(packet)
 
+  def test_read_in_chunks(self):
+    # the payload is filled in place across several reads
+    pkt_list, raw_list = mock_generator.get_mock_requst_packets(is_message=False)
+    raw = pkt_list[-1].convert_to_raw()
+    dispatcher = mock_generator.MockDispatcher()
+    dispatcher.prepare_with_raw(raw)
+
+    pkt = IncomingPacket()
+    chunk_size = 3
+    while not pkt.is_complete:
+      pkt.read(ChunkedDispatcher(dispatcher, chunk_size))
+    self.assertEqual(pkt.get_pktsize(), len(raw))
+    self.assertEqual(pkt.convert_to_raw(), raw)
+
+    typename, reqid, serialized_msg = HeronProtocol.decode_packet(pkt)
+    raw_reqid, raw_message = raw_list[-1]
+    self.assertEqual(reqid, raw_reqid)
+    self.assertEqual(typename, raw_message.DESCRIPTOR.full_name)
+    self.assertEqual(str(serialized_msg), raw_message.SerializeToString())
+
   def test_read(self):
     # complete packets are prepared
     normal_dispatcher = mock_generator.MockDispatcher()
@@ -98,3 +134,12 @@ class ProtocolTest(unittest.TestCase):
       fatal_dispatcher.prepare_fatal()
       pkt = IncomingPacket()
       pkt.read(fatal_dispatcher)
+
+class ChunkedDispatcher(object):
+  """Limits each recv_into() on a wrapped dispatcher to ``chunk_size`` bytes"""
+  def __init__(self, dispatcher, chunk_size):
+    self.dispatcher = dispatcher
+    self.chunk_size = chunk_size
+
+  def recv_into(self, buf, numbytes):
+    return self.dispatcher.recv_into(buf, min(numbytes, self.chunk_size))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''Microbenchmark of the acks and fails of a bolt, batched into control tuple sets
+
+Many tuples are acked or failed, with tuple sets flushed regularly, and the control tuples sent
+are checked. No timing is asserted; run with ``pytest --durations=0`` to see how long each takes.
+'''
+import unittest2 as unittest
+
+from heron.proto import topology_pb2, tuple_pb2
+
+from heron.instance.src.python.utils.tuple import TupleHelper
+import heron.instance.tests.python.utils.mock_generator as mock_generator
+
+# pylint: disable=missing-docstring
+
+class AckBatcherBenchmark(unittest.TestCase):
+  NUM_TUPLES = 100000
+  FLUSH_INTERVAL = 1000
+  # one tuple in FAIL_INTERVAL is failed
+  FAIL_INTERVAL = 100
+
+  def make_tuples(self, tuples_per_root):
+    stream = topology_pb2.StreamId(id="default", component_name="spout")
+    tuples = []
+    for i in range(self.NUM_TUPLES):
+      holder = tuple_pb2.HeronDataTuple()
+      root = holder.roots.add()
+      root.taskid = (i // tuples_per_root) % 8
+      root.key = i // tuples_per_root
+      tuples.append(TupleHelper.make_tuple(stream, i + 1, [], roots=holder.roots))
+    return tuples
+
+  def run_acks(self, tuples, xor_combine):
+    """Returns the number of tuple sets sent, and of the acks and fails they hold"""
+    out_helper = mock_generator.MockOutgoingTupleHelper()
+    out_helper.ack_batcher.xor_combine = xor_combine
+    for i, tup in enumerate(tuples):
+      out_helper.add_ack_tuple(tup.key, tup.roots, i % self.FAIL_INTERVAL != 0)
+      if i % self.FLUSH_INTERVAL == 0:
+        out_helper.send_out_tuples()
+    out_helper.send_out_tuples()
+
+    sent = out_helper.out_stream.poll_many()
+    return (len(sent), sum(len(msg.control.acks) for msg in sent),
+            sum(len(msg.control.fails) for msg in sent))
+
+  def test_ack_throughput_distinct_roots(self):
+    tuples = self.make_tuples(1)
+    num_fails = self.NUM_TUPLES // self.FAIL_INTERVAL
+    # one tuple set for each flush, holding an ack or fail for each root
+    for xor_combine in [False, True]:
+      self.assertEqual(self.run_acks(tuples, xor_combine),
+                       (self.NUM_TUPLES // self.FLUSH_INTERVAL + 1,
+                        self.NUM_TUPLES - num_fails, num_fails))
+
+  def test_ack_throughput_shared_roots(self):
+    tuples = self.make_tuples(10)
+    num_fails = self.NUM_TUPLES // self.FAIL_INTERVAL
+    num_sets = self.NUM_TUPLES // self.FLUSH_INTERVAL + 1
+    self.assertEqual(self.run_acks(tuples, False),
+                     (num_sets, self.NUM_TUPLES - num_fails, num_fails))
+    # acks of the tuples of a root in a tuple set are combined into one
+    self.assertEqual(self.run_acks(tuples, True), (num_sets, self.NUM_TUPLES // 10, num_fails))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+# pylint: disable=missing-docstring
+
+import unittest
+
+from heron.proto import tuple_pb2
+from heron.instance.src.python.utils.misc import AckBatcher
+
+def make_roots(*root_ids):
+  holder = tuple_pb2.HeronDataTuple()
+  for taskid, key in root_ids:
+    root = holder.roots.add()
+    root.taskid = taskid
+    root.key = key
+  return holder.roots
+
+class AckBatcherTest(unittest.TestCase):
+  def test_acks_and_fails_in_one_set(self):
+    batcher = AckBatcher()
+    roots = make_roots((1, 10), (2, 20))
+    batcher.add(100, roots, True)
+    batcher.add(101, roots, False)
+    batcher.add(102, roots, True)
+    self.assertEqual(len(batcher), 3)
+
+    control = batcher.make_tuple_set().control
+    self.assertEqual([ack.ackedtuple for ack in control.acks], [100, 102])
+    self.assertEqual([fail.ackedtuple for fail in control.fails], [101])
+    self.assertEqual(list(control.acks[0].roots), list(roots))
+    self.assertEqual(list(control.fails[0].roots), list(roots))
+
+    # the batcher starts over once the tuple set is made
+    self.assertEqual(len(batcher), 0)
+    self.assertIsNone(batcher.make_tuple_set())
+
+  def test_size_of_roots(self):
+    batcher = AckBatcher()
+    roots = make_roots((1, 10), (300, -1), (-1, 1 << 60))
+    self.assertEqual(batcher.add(100, roots, True), sum(root.ByteSize() for root in roots))
+    self.assertEqual(batcher.add(101, roots, False), sum(root.ByteSize() for root in roots))
+
+    xor_batcher = AckBatcher(xor_combine=True)
+    self.assertEqual(xor_batcher.add(100, roots, True), sum(root.ByteSize() for root in roots))
+
+  def test_tuples_without_roots(self):
+    batcher = AckBatcher()
+    self.assertEqual(batcher.add(100, make_roots(), True), 0)
+    self.assertEqual(batcher.add(101, None, False), 0)
+    self.assertEqual(len(batcher), 0)
+    self.assertIsNone(batcher.make_tuple_set())
+
+  def test_xor_combine(self):
+    batcher = AckBatcher(xor_combine=True)
+    batcher.add(0b0011, make_roots((1, 10), (2, 20)), True)
+    batcher.add(0b0101, make_roots((1, 10)), True)
+    batcher.add(-8, make_roots((2, 20)), True)
+    batcher.add(0b1000, make_roots((1, 10)), False)
+    self.assertEqual(len(batcher), 3)
+
+    control = batcher.make_tuple_set().control
+    combined = dict(((ack.roots[0].taskid, ack.roots[0].key), ack.ackedtuple)
+                    for ack in control.acks)
+    self.assertTrue(all(len(ack.roots) == 1 for ack in control.acks))
+    self.assertEqual(combined, {(1, 10): 0b0011 ^ 0b0101, (2, 20): 0b0011 ^ -8})
+    # fails are not combined
+    self.assertEqual([fail.ackedtuple for fail in control.fails], [0b1000])
+    self.assertEqual(len(batcher), 0)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''Unittest for BatchController'''
+import unittest2 as unittest
+
+from mock import patch
+
+from heron.instance.src.python.utils.misc import BatchController
+
+# pylint: disable=missing-docstring
+# pylint: disable=protected-access
+class BatchControllerTest(unittest.TestCase):
+  def setUp(self):
+    self.clock = [0.0]
+    self.samples = []
+    patcher = patch("heron.instance.src.python.utils.misc.batch_controller.time.time",
+                    side_effect=lambda: self.clock[0])
+    self.mock_time = patcher.start()
+    self.addCleanup(patcher.stop)
+    # binary fractions, so that latencies add up exactly
+    self.slow = 2 ** -10
+    self.fast = 2 ** -17
+    self.controller = BatchController(max_batch_time=0.125, max_batch_bytes=1000,
+                                      expected_queue_size=8, sample_weight=1.0,
+                                      on_sample=lambda *sample: self.samples.append(sample))
+
+  def run_batch(self, unit_latency, queue_size=0, unit_bytes=0, max_units=100000):
+    """Runs a batch of units taking unit_latency each, returns the number of units run"""
+    self.controller.start_batch(queue_size, 0)
+    units = 0
+    while units < max_units:
+      self.clock[0] += unit_latency
+      units += 1
+      if self.controller.add(1, units * unit_bytes):
+        break
+    self.controller.finish_batch()
+    return units
+
+  def test_first_batch_is_a_single_unit(self):
+    self.assertEqual(self.run_batch(self.slow), 1)
+    self.assertEqual(self.samples, [(1, self.slow)])
+    self.assertEqual(self.controller.unit_latency, self.slow)
+
+  def test_batch_size_fits_time_budget(self):
+    self.run_batch(self.slow)
+    self.assertEqual(self.run_batch(self.slow), 128)
+    self.assertEqual(self.controller.batch_size, 128)
+    self.assertEqual(self.controller.check_interval, 16)
+
+  def test_clock_read_every_check_interval(self):
+    self.run_batch(self.fast)
+    self.mock_time.reset_mock()
+    units = self.run_batch(self.fast)
+    self.assertEqual(units, 16384)
+    self.assertEqual(self.controller.check_interval, BatchController.MAX_CHECK_INTERVAL)
+    # once at start and finish, and every 64 units but the last, which ends the batch anyway
+    self.assertEqual(self.mock_time.call_count, 16384 // 64 - 1 + 2)
+    self.assertEqual(sum(sample[0] for sample in self.samples), units + 1)
+
+  def test_slower_units_stop_at_time_budget(self):
+    self.run_batch(self.fast)
+    # units are suddenly 128 times slower, the batch stops at the first check past the budget
+    self.assertEqual(self.run_batch(self.slow), 192)
+    self.assertEqual(self.controller.unit_latency, self.slow)
+    # and the next batch is sized accordingly
+    self.assertEqual(self.run_batch(self.slow), 128)
+
+  def test_time_budget_shrinks_with_out_queue(self):
+    self.run_batch(self.slow)
+    self.assertEqual(self.run_batch(self.slow, queue_size=8), 64)
+    self.assertEqual(self.controller.time_budget, 0.0625)
+    self.assertEqual(self.run_batch(self.slow, queue_size=24), 32)
+    self.assertEqual(self.controller.time_budget, 0.03125)
+
+  def test_max_batch_bytes(self):
+    self.run_batch(self.slow)
+    self.assertEqual(self.run_batch(self.slow, unit_bytes=100), 11)
@@ -65,3 +65,32 @@ class CommunicatorTest(unittest.TestCase):
     self.assertEqual(self.global_value, 6)
     communicator.offer("object")
     self.assertEqual(self.global_value, 10)
+
+  def test_single_thread(self):
+    communicator = HeronCommunicator(producer_cb=None, consumer_cb=None, single_thread=True)
+    self.assertTrue(communicator.is_empty())
+    with self.assertRaises(Queue.Empty):
+      communicator.poll()
+
+    for obj in mock_generator.prim_list:
+      communicator.offer(obj)
+    self.assertEqual(communicator.get_size(), len(mock_generator.prim_list))
+    for obj in mock_generator.prim_list:
+      self.assertEqual(obj, communicator.poll())
+    self.assertTrue(communicator.is_empty())
+
+  def test_poll_many_offer_many(self):
+    for single_thread in (False, True):
+      calls = []
+      communicator = HeronCommunicator(producer_cb=lambda: calls.append("producer"),
+                                       consumer_cb=lambda: calls.append("consumer"),
+                                       single_thread=single_thread)
+      communicator.offer_many(mock_generator.prim_list)
+      self.assertEqual(calls, ["consumer"])
+      self.assertEqual(communicator.get_size(), len(mock_generator.prim_list))
+
+      self.assertEqual(communicator.poll_many(2), mock_generator.prim_list[:2])
+      self.assertEqual(communicator.poll_many(), mock_generator.prim_list[2:])
+      self.assertEqual(calls, ["consumer", "producer", "producer"])
+      self.assertEqual(communicator.poll_many(), [])
+      self.assertEqual(calls, ["consumer", "producer", "producer"])
@@ -23,6 +23,7 @@
 import unittest
 from heron.instance.src.python.utils.misc import CustomGroupingHelper
 from heron.instance.tests.python.utils.mock_generator import MockCustomGrouping
+from heron.instance.tests.python.utils.mock_generator import MockBatchedGrouping
 
 class CustomGroupingTest(unittest.TestCase):
   STREAM_ID = "default"
@@ -74,3 +75,49 @@ class CustomGroupingTest(unittest.TestCase):
 
     with self.assertRaises(ValueError):
       self.grouper.choose_tasks(self.STREAM_ID, self.VALUES)
+
+  def test_batch_with_choose_tasks(self):
+    # custom groupings that don't override choose_tasks_batch() are asked tuple by tuple
+    all_grouping = MockCustomGrouping(MockCustomGrouping.ALL_TARGET_MODE)
+    self.grouper.add(self.STREAM_ID, self.TASK_IDS, all_grouping, self.SRC_COMP_NAME)
+    self.grouper.prepare(None)
+    self.assertFalse(self.grouper.is_batched(self.STREAM_ID))
+
+    ret = self.grouper.choose_tasks_batch(self.STREAM_ID, [self.VALUES, self.VALUES])
+    self.assertEqual(ret, [self.TASK_IDS, self.TASK_IDS])
+    self.assertEqual(self.grouper.choose_tasks_batch("not_registered_stream", [self.VALUES]), [[]])
+
+  def test_batched_target(self):
+    batched_grouping = MockBatchedGrouping(MockCustomGrouping.ALL_TARGET_MODE)
+    other_grouping = MockBatchedGrouping(MockCustomGrouping.ALL_TARGET_MODE)
+    self.grouper.add(self.STREAM_ID, self.TASK_IDS, batched_grouping, self.SRC_COMP_NAME)
+    self.grouper.add(self.STREAM_ID, [23, 29], other_grouping, self.SRC_COMP_NAME)
+    self.assertFalse(self.grouper.is_batched(self.STREAM_ID))
+    self.grouper.prepare(None)
+    self.assertTrue(self.grouper.is_batched(self.STREAM_ID))
+    self.assertFalse(self.grouper.is_batched("not_registered_stream"))
+
+    ret = self.grouper.choose_tasks_batch(self.STREAM_ID, [[0], [1], [9]])
+    self.assertEqual(ret, [[2, 23], [3, 29], [5, 29]])
+    self.assertEqual(batched_grouping.num_batches, 1)
+    self.assertEqual(other_grouping.num_batches, 1)
+
+  def test_batch_wrong_return_type(self):
+    wrong_rettype = MockBatchedGrouping(MockCustomGrouping.WRONG_RETURN_TYPE_MODE)
+    self.grouper.add(self.STREAM_ID, self.TASK_IDS, wrong_rettype, self.SRC_COMP_NAME)
+    self.grouper.prepare(None)
+
+    # one list of tasks for two values
+    with self.assertRaises(TypeError):
+      self.grouper.choose_tasks_batch(self.STREAM_ID, [[0], [1]])
+
+  def test_batch_wrong_return_value(self):
+    wrong_retvalue = MockBatchedGrouping(MockCustomGrouping.WRONG_CHOOSE_TASK_MODE)
+    self.grouper.add(self.STREAM_ID, self.TASK_IDS, wrong_retvalue, self.SRC_COMP_NAME)
+    self.grouper.prepare(None)
+
+    self.assertEqual(self.grouper.choose_tasks_batch(self.STREAM_ID, [[2], [3]]), [[2], [3]])
+    with self.assertRaises(ValueError):
+      self.grouper.choose_tasks_batch(self.STREAM_ID, [[2], [4]])
+    with self.assertRaises(TypeError):
+      self.grouper.choose_tasks_batch(self.STREAM_ID, [["2"]])
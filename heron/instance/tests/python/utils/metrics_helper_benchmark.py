@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''Microbenchmarks of per-tuple metrics updates of BoltMetrics,
+and of the per-interval gathering of MetricsCollector
+
+The metrics of many executed and acked tuples are updated, and the keyed values of many streams
+gathered, and checked. No timing is asserted; run with ``pytest --durations=0`` to see how long
+each takes.
+'''
+import unittest2 as unittest
+
+from mock import Mock
+
+from heronpy.api.metrics import MultiCountMetric, MultiMeanReducedMetric
+from heron.instance.src.python.utils.metrics import BoltMetrics
+from heron.proto import metrics_pb2
+import heron.instance.tests.python.mock_protobuf as mock_protobuf
+import heron.instance.tests.python.utils.mock_generator as mock_generator
+
+# pylint: disable=missing-docstring
+
+class BoltMetricsBenchmark(unittest.TestCase):
+  NUM_TUPLES = 50000
+
+  def setUp(self):
+    pplan_helper = Mock()
+    pplan_helper.get_my_bolt.return_value = mock_protobuf.get_mock_bolt()
+    self.bolt_metrics = BoltMetrics(pplan_helper)
+
+  def test_per_tuple_overhead(self):
+    bolt_metrics = self.bolt_metrics
+    stream_metrics = bolt_metrics.get_input_stream_metrics("default", "word-spout")
+    for _ in range(self.NUM_TUPLES):
+      stream_metrics.deserialize_data_tuple(1000)
+      stream_metrics.execute_tuple(1000)
+      bolt_metrics.acked_tuple("default", "word-spout", 1000)
+
+    exec_counts = bolt_metrics.metrics[BoltMetrics.EXEC_COUNT].get_value_and_reset()
+    ack_counts = bolt_metrics.metrics[BoltMetrics.ACK_COUNT].get_value_and_reset()
+    for key in ["default", "word-spout/default"]:
+      self.assertEqual(exec_counts[key], self.NUM_TUPLES)
+      self.assertEqual(ack_counts[key], self.NUM_TUPLES)
+
+class MetricsCollectorBenchmark(unittest.TestCase):
+  NUM_RUNS = 20
+
+  def setUp(self):
+    self.metrics_collector = mock_generator.MockMetricsCollector()
+
+  def run_benchmark(self, num_keys):
+    count = MultiCountMetric()
+    latency = MultiMeanReducedMetric()
+    self.metrics_collector.register_metric("__count", count, 60)
+    self.metrics_collector.register_metric("__latency", latency, 60)
+    keys = ["component/stream-%d" % i for i in range(num_keys)]
+    for _ in range(self.NUM_RUNS):
+      for key in keys:
+        count.incr(key)
+        latency.update(key, 1000)
+      message = metrics_pb2.MetricPublisherPublishMessage()
+      # pylint: disable=protected-access
+      for name in ["__count", "__latency"]:
+        self.metrics_collector._gather_one_metric(name, message)
+      # each keyed value is added once
+      self.assertEqual(len(message.metrics), 2 * num_keys)
+    self.assertEqual(message.metrics[0].value, "1")
+
+  def test_gather_10_streams(self):
+    self.run_benchmark(10)
+
+  def test_gather_100_streams(self):
+    self.run_benchmark(100)
+
+  def test_gather_1000_streams(self):
+    self.run_benchmark(1000)
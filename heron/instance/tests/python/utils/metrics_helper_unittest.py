@@ -21,13 +21,20 @@
 
 # pylint: disable=missing-docstring
 
+import random
 import unittest
 
+from mock import Mock, patch
+
 from heronpy.api.metrics import (CountMetric, MultiCountMetric,
-                                          MeanReducedMetric, MultiMeanReducedMetric)
-from heron.instance.src.python.utils.metrics import BaseMetricsHelper
+                                          MeanReducedMetric, MultiMeanReducedMetric,
+                                          MultiHistogramMetric)
+import heronpy.api.api_constants as api_constants
+import heron.instance.src.python.utils.system_constants as constants
+from heron.instance.src.python.utils.metrics import BaseMetricsHelper, BoltMetrics, LatencySampler
 from heron.proto import metrics_pb2
 import heron.instance.tests.python.utils.mock_generator as mock_generator
+import heron.instance.tests.python.mock_protobuf as mock_protobuf
 
 class BaseMetricsHelperTest(unittest.TestCase):
   def setUp(self):
@@ -81,6 +88,116 @@ class BaseMetricsHelperTest(unittest.TestCase):
                                                                      "key2": None,
                                                                      "key3": None})
 
+class BoltMetricsTest(unittest.TestCase):
+  def setUp(self):
+    pplan_helper = Mock()
+    pplan_helper.get_my_bolt.return_value = mock_protobuf.get_mock_bolt()
+    self.bolt_metrics = BoltMetrics(pplan_helper)
+    # metrics of BoltMetrics are shared by its instances
+    self.get_values()
+
+  def get_values(self):
+    return dict((name, metric.get_value_and_reset())
+                for name, metric in self.bolt_metrics.metrics.items())
+
+  def test_input_stream_metrics(self):
+    stream_metrics = self.bolt_metrics.get_input_stream_metrics("stream", "component")
+    self.assertIs(self.bolt_metrics.get_input_stream_metrics("stream", "component"),
+                  stream_metrics)
+    stream_metrics.execute_tuple(10)
+    self.bolt_metrics.execute_tuple("stream", "component", 20)
+    self.bolt_metrics.deserialize_data_tuple("stream", "component", 5)
+    self.bolt_metrics.acked_tuple("stream", "component", 100)
+
+    values = self.get_values()
+    for key in ["stream", "component/stream"]:
+      self.assertEqual(values[BoltMetrics.EXEC_COUNT][key], 2)
+      self.assertEqual(values[BoltMetrics.EXEC_LATENCY][key], 15.0)
+      self.assertEqual(values[BoltMetrics.EXEC_TIME_NS][key], 30)
+      self.assertEqual(values[BoltMetrics.TUPLE_DESERIALIZATION_TIME_NS][key], 5)
+      self.assertEqual(values[BoltMetrics.ACK_COUNT][key], 1)
+      self.assertEqual(values[BoltMetrics.PROCESS_LATENCY][key], 100.0)
+    # cells are only added on their first update
+    self.assertNotIn("component/stream", values[BoltMetrics.FAIL_LATENCY])
+
+    # cells are still referenced after reset
+    stream_metrics.failed_tuple(50)
+    values = self.get_values()
+    self.assertEqual(values[BoltMetrics.EXEC_COUNT]["component/stream"], 0)
+    self.assertEqual(values[BoltMetrics.FAIL_COUNT]["component/stream"], 1)
+    self.assertEqual(values[BoltMetrics.FAIL_LATENCY]["component/stream"], 50.0)
+
+  def test_sampled_latencies(self):
+    self.bolt_metrics.set_latency_sampling(4)
+    self.addCleanup(self.bolt_metrics.set_latency_sampling, 1)
+    self.assertEqual(self.get_values()[BoltMetrics.LATENCY_SAMPLE_RATE], 0.25)
+
+    stream_metrics = self.bolt_metrics.get_input_stream_metrics("stream", "component")
+    sampler = self.bolt_metrics.execute_sampler
+    for _ in range(8):
+      if sampler.sample():
+        stream_metrics.execute_tuple(10, sampler.interval)
+      else:
+        stream_metrics.execute_tuple()
+    stream_metrics.acked_tuple()
+    self.bolt_metrics.serialize_data_tuple("out", 5, 4)
+
+    values = self.get_values()
+    for key in ["stream", "component/stream"]:
+      # counts are exact, time spent is scaled up from the sampled tuples
+      self.assertEqual(values[BoltMetrics.EXEC_COUNT][key], 8)
+      self.assertEqual(values[BoltMetrics.EXEC_LATENCY][key], 10.0)
+      self.assertEqual(values[BoltMetrics.EXEC_TIME_NS][key], 80)
+      self.assertEqual(values[BoltMetrics.ACK_COUNT][key], 1)
+      self.assertIsNone(values[BoltMetrics.PROCESS_LATENCY][key])
+    self.assertEqual(values[BoltMetrics.TUPLE_SERIALIZATION_TIME_NS]["out"], 20)
+
+  def test_latency_histograms(self):
+    latency_metrics = dict((name, self.bolt_metrics.metrics[name])
+                           for name in BoltMetrics.latency_metrics)
+    self.addCleanup(self.bolt_metrics.metrics.update, latency_metrics)
+    context = Mock()
+    context.get_cluster_config.return_value = {
+        api_constants.TOPOLOGY_METRICS_LATENCY_HISTOGRAMS: True}
+    with patch("heron.instance.src.python.utils.system_config.get_sys_config",
+               return_value={constants.HERON_METRICS_EXPORT_INTERVAL_SEC: 60}):
+      self.bolt_metrics.register_metrics(context)
+
+    registered = dict((args[0], args[1])
+                      for args, _ in context.get_metrics_collector().register_metric.call_args_list)
+    for name in [BoltMetrics.EXEC_LATENCY, BoltMetrics.PROCESS_LATENCY, BoltMetrics.FAIL_LATENCY]:
+      self.assertIs(registered[name], self.bolt_metrics.metrics[name])
+      self.assertNotIn(self.bolt_metrics.metrics[name], latency_metrics.values())
+
+    stream_metrics = self.bolt_metrics.get_input_stream_metrics("stream", "component")
+    for i in range(1, 101):
+      stream_metrics.execute_tuple(i)
+    latency = self.get_values()[BoltMetrics.EXEC_LATENCY]["component/stream"]
+    self.assertEqual(latency["max"], 100)
+    self.assertLessEqual(abs(latency["p99"] - 99), 99 / 32.0)
+
+class LatencySamplerTest(unittest.TestCase):
+  def test_sample_every_tuple(self):
+    sampler = LatencySampler()
+    self.assertEqual(sampler.rate, 1.0)
+    self.assertTrue(all(sampler.sample() for _ in range(10)))
+    self.assertTrue(all(LatencySampler(randomized=True).sample() for _ in range(10)))
+
+  def test_sample_interval(self):
+    sampler = LatencySampler(3)
+    self.assertEqual([sampler.sample() for _ in range(7)],
+                     [True, False, False, True, False, False, True])
+
+  def test_sample_randomized(self):
+    random.seed(1)
+    sampler = LatencySampler(10, randomized=True)
+    sampled = sum(1 for _ in range(10000) if sampler.sample())
+    self.assertTrue(900 < sampled < 1100)
+
+  def test_invalid_interval(self):
+    with self.assertRaises(ValueError):
+      LatencySampler(0)
+
 class MetricsCollectorTest(unittest.TestCase):
   def setUp(self):
     self.metrics_collector = mock_generator.MockMetricsCollector()
@@ -123,3 +240,35 @@ class MetricsCollectorTest(unittest.TestCase):
     self.assertEqual(message.metrics[0].name, name)
     self.assertEqual(message.metrics[0].value, str(10))
     self.assertEqual(metric.get_value_and_reset(), 0)
+
+  # pylint: disable=protected-access
+  def test_gather_multi_metrics(self):
+    metric1 = MultiCountMetric()
+    metric1.incr("key", to_add=3)
+    self.metrics_collector.register_metric("metric1", metric1, 60)
+    metric2 = MultiHistogramMetric()
+    metric2.update("key", 5)
+    self.metrics_collector.register_metric("metric2", metric2, 60)
+    self.metrics_collector._gather_metrics(60)
+
+    message = self.metrics_collector.out_metrics.poll()
+    self.assertEqual(dict((datum.name, datum.value) for datum in message.metrics),
+                     {"metric1/key": "3",
+                      "metric2/key/p50": "5.0", "metric2/key/p90": "5.0",
+                      "metric2/key/p99": "5.0", "metric2/key/max": "5.0"})
+
+  # pylint: disable=protected-access
+  def test_gather_overridden_multi_metric(self):
+    class PrefixedCountMetric(MultiCountMetric):
+      def get_value_and_reset(self):
+        values = super(PrefixedCountMetric, self).get_value_and_reset()
+        return dict(("prefix-" + key, value) for key, value in values.items())
+
+    metric = PrefixedCountMetric()
+    metric.incr("key", to_add=3)
+    self.metrics_collector.register_metric("metric", metric, 60)
+    self.metrics_collector._gather_metrics(60)
+
+    message = self.metrics_collector.out_metrics.poll()
+    self.assertEqual([(datum.name, datum.value) for datum in message.metrics],
+                     [("metric/prefix-key", "3")])
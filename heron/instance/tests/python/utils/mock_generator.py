@@ -179,6 +179,20 @@ class MockCustomGrouping(ICustomGrouping):
           continue
       return ret
 
+class MockBatchedGrouping(MockCustomGrouping):
+  """Creates a mock ICustomGrouping overriding choose_tasks_batch(), for unittesting"""
+  def __init__(self, mode):
+    super(MockBatchedGrouping, self).__init__(mode)
+    self.num_batches = 0
+
+  def choose_tasks_batch(self, values_list):
+    self.num_batches += 1
+    if self.mode == self.WRONG_RETURN_TYPE_MODE:
+      return [[self.target_tasks[0]]]
+    if self.mode == self.WRONG_CHOOSE_TASK_MODE:
+      return [[values[0]] for values in values_list]
+    return [[self.target_tasks[values[0] % len(self.target_tasks)]] for values in values_list]
+
 class MockTaskHook(ITaskHook):
   def prepare(self, conf, context):
     self.clean_up_called = False
@@ -51,3 +51,96 @@ class OutgoingTupleHelperTest(unittest.TestCase):
     sent_data_tuple_set = out_helper.out_stream.poll().data
     self.assertEqual(sent_data_tuple_set.stream.id, self.DEFAULT_STREAM_ID)
     self.assertEqual(sent_data_tuple_set.tuples[0], prim_data_tuple)
+
+  def test_add_new_data_tuple(self):
+    out_helper = mock_generator.MockOutgoingTupleHelper()
+    prim_data_tuple, size = mock_generator.make_data_tuple_from_list(mock_generator.prim_list)
+    root = prim_data_tuple.roots.add()
+    root.taskid = 1
+    root.key = 2
+    prim_data_tuple.dest_task_ids.append(3)
+
+    added_tuple = out_helper.add_new_data_tuple(self.DEFAULT_STREAM_ID,
+                                                prim_data_tuple.values, size,
+                                                dest_task_ids=[3], roots=[root])
+    self.assertEqual(added_tuple, prim_data_tuple)
+    self.assertEqual(out_helper.current_data_tuple_size_in_bytes, size)
+
+    # the flushed tuple set is the one the tuple was built in
+    tuple_set = out_helper.current_data_msg
+    out_helper.send_out_tuples()
+    sent = out_helper.out_stream.poll()
+    self.assertIs(sent, tuple_set)
+    self.assertEqual(sent.data.stream.id, self.DEFAULT_STREAM_ID)
+    self.assertEqual(sent.data.tuples[0], prim_data_tuple)
+
+  def test_add_new_control_tuple(self):
+    out_helper = mock_generator.MockOutgoingTupleHelper()
+    root_holder, _ = mock_generator.make_data_tuple_from_list([])
+    root = root_holder.roots.add()
+    root.taskid = 1
+    root.key = 2
+
+    out_helper.add_new_control_tuple(10, root_holder.roots, 16, True)
+    out_helper.add_new_control_tuple(11, root_holder.roots, 16, True)
+    self.assertTrue(out_helper.called_init_new_control)
+    # a fail after acks starts a new control tuple set
+    out_helper.add_new_control_tuple(12, root_holder.roots, 16, False)
+    out_helper.send_out_tuples()
+
+    acks = out_helper.out_stream.poll().control
+    self.assertEqual([ack.ackedtuple for ack in acks.acks], [10, 11])
+    self.assertEqual(list(acks.acks[0].roots), [root])
+    fails = out_helper.out_stream.poll().control
+    self.assertEqual([fail.ackedtuple for fail in fails.fails], [12])
+    self.assertEqual(out_helper.total_data_emitted_in_bytes, 48)
+
+  def test_add_ack_tuple(self):
+    out_helper = mock_generator.MockOutgoingTupleHelper()
+    out_helper.control_tuple_set_capacity = 3
+    prim_data_tuple, size = mock_generator.make_data_tuple_from_list(mock_generator.prim_list)
+    root = prim_data_tuple.roots.add()
+    root.taskid = 1
+    root.key = 2
+
+    out_helper.add_data_tuple(self.DEFAULT_STREAM_ID, prim_data_tuple, size)
+    out_helper.add_ack_tuple(10, prim_data_tuple.roots, True)
+    out_helper.add_ack_tuple(11, prim_data_tuple.roots, False)
+    out_helper.add_ack_tuple(12, prim_data_tuple.roots, True)
+    # the batch is full, so buffered tuples are sent out before the next ack
+    out_helper.add_ack_tuple(13, prim_data_tuple.roots, True)
+    self.assertFalse(out_helper.called_init_new_control)
+
+    # data tuples go out before the acks that follow them
+    self.assertEqual(out_helper.out_stream.poll().data.tuples[0], prim_data_tuple)
+    control = out_helper.out_stream.poll().control
+    self.assertEqual([ack.ackedtuple for ack in control.acks], [10, 12])
+    self.assertEqual([fail.ackedtuple for fail in control.fails], [11])
+    self.assertEqual(list(control.acks[0].roots), [root])
+    self.assertEqual(out_helper.out_stream.get_size(), 0)
+
+    out_helper.send_out_tuples()
+    control = out_helper.out_stream.poll().control
+    self.assertEqual([ack.ackedtuple for ack in control.acks], [13])
+    self.assertEqual(out_helper.total_data_emitted_in_bytes, size + 4 * root.ByteSize())
+
+  def test_custom_grouping_on_flush(self):
+    out_helper = mock_generator.MockOutgoingTupleHelper()
+    grouping = mock_generator.MockBatchedGrouping(
+        mock_generator.MockBatchedGrouping.ALL_TARGET_MODE)
+    custom_grouper = out_helper.pplan_helper.custom_grouper
+    custom_grouper.add(self.DEFAULT_STREAM_ID, [3, 5], grouping, "component")
+    custom_grouper.prepare(None)
+
+    for i in range(3):
+      out_helper.add_new_data_tuple(self.DEFAULT_STREAM_ID, [], 0, grouping_values=[i])
+    out_helper.add_new_data_tuple(self.DEFAULT_STREAM_ID, [], 0, dest_task_ids=[7])
+    # tasks are only chosen when the tuple set is sent out
+    self.assertEqual(grouping.num_batches, 0)
+    out_helper.send_out_tuples()
+
+    self.assertEqual(grouping.num_batches, 1)
+    sent = out_helper.out_stream.poll().data
+    self.assertEqual([list(data_tuple.dest_task_ids) for data_tuple in sent.tuples],
+                     [[3], [5], [3], [7]])
+    self.assertEqual(out_helper.current_grouping_values, [])
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''Microbenchmark of PendingTupleTracker
+
+Many tuples are added and removed, and the memory they take while pending is checked to be
+that of their slots. No timing is asserted; run with ``pytest --durations=0`` to see how long
+each takes.
+'''
+import sys
+import time
+import unittest2 as unittest
+
+from heron.instance.src.python.utils.misc import PendingTupleTracker
+
+# pylint: disable=missing-docstring
+
+def get_deep_size(obj, seen):
+  """Returns the size of an object and of everything it refers to, that is not in ``seen``"""
+  size = 0
+  to_visit = [obj]
+  while to_visit:
+    obj = to_visit.pop()
+    if id(obj) in seen:
+      continue
+    seen.add(id(obj))
+    size += sys.getsizeof(obj)
+    if isinstance(obj, dict):
+      to_visit.extend(obj.keys())
+      to_visit.extend(obj.values())
+    elif isinstance(obj, (list, tuple)):
+      to_visit.extend(obj)
+    if hasattr(obj, '__dict__'):
+      to_visit.append(vars(obj))
+  return size
+
+class PendingTupleTrackerBenchmark(unittest.TestCase):
+  STREAM_ID = "default"
+  # 8 bytes for each of the key, insertion time, bucket, tuple id and stream id of a slot,
+  # and for the key in its bucket, with room for the arrays and lists growing
+  MAX_BYTES_PER_TUPLE = 100
+
+  def setUp(self):
+    self.tuple_ids = list(range(100000))
+
+  def test_memory_per_pending_tuple(self):
+    tracker = PendingTupleTracker()
+    now = time.time()
+    for tuple_id in self.tuple_ids:
+      tracker.add(self.STREAM_ID, tuple_id, now)
+    # tuple ids and stream ids belong to the spout
+    seen = set(id(tuple_id) for tuple_id in self.tuple_ids)
+    seen.add(id(self.STREAM_ID))
+    size_per_tuple = float(get_deep_size(tracker, seen)) / len(self.tuple_ids)
+    self.assertLess(size_per_tuple, self.MAX_BYTES_PER_TUPLE)
+
+  def test_add_and_remove(self):
+    tracker = PendingTupleTracker()
+    for _ in range(3):
+      now = time.time()
+      keys = [tracker.add(self.STREAM_ID, tuple_id, now) for tuple_id in self.tuple_ids]
+      for key, tuple_id in zip(keys, self.tuple_ids):
+        self.assertEqual(tracker.remove(key), (self.STREAM_ID, tuple_id, now))
+    self.assertEqual(len(tracker), 0)
+    # slots are reused
+    self.assertEqual(len(tracker._keys), len(self.tuple_ids))  # pylint: disable=protected-access
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+# pylint: disable=missing-docstring
+# pylint: disable=protected-access
+
+import unittest
+
+from heron.instance.src.python.utils.misc import PendingTupleTracker
+
+class PendingTupleTrackerTest(unittest.TestCase):
+  def setUp(self):
+    self.tracker = PendingTupleTracker()
+
+  def test_add_and_remove(self):
+    keys = [self.tracker.add("stream", "tuple-%d" % i, float(i)) for i in range(10)]
+    self.assertEqual(len(set(keys)), 10)
+    self.assertEqual(len(self.tracker), 10)
+    for key in keys:
+      self.assertGreater(key, 0)
+      self.assertLess(key, 1 << 61)
+
+    self.assertEqual(self.tracker.remove(keys[3]), ("stream", "tuple-3", 3.0))
+    self.assertEqual(len(self.tracker), 9)
+    # already removed, or never added
+    self.assertIsNone(self.tracker.remove(keys[3]))
+    self.assertIsNone(self.tracker.remove(keys[9] + 1))
+    self.assertIsNone(self.tracker.remove(-1))
+    self.assertEqual(len(self.tracker), 9)
+
+  def test_slot_reuse(self):
+    key = self.tracker.add("stream", "tuple-1", 1.0)
+    self.tracker.remove(key)
+    new_key = self.tracker.add("stream", "tuple-2", 2.0)
+    # same slot, different generation
+    self.assertEqual(new_key & PendingTupleTracker.SLOT_MASK, key & PendingTupleTracker.SLOT_MASK)
+    self.assertNotEqual(new_key, key)
+    # a late ack of the released tuple doesn't release the new one
+    self.assertIsNone(self.tracker.remove(key))
+    self.assertEqual(self.tracker.remove(new_key), ("stream", "tuple-2", 2.0))
+    self.assertEqual(len(self.tracker._keys), 1)
+
+  def test_new_tracker_keys(self):
+    # a restarted spout doesn't reuse the keys of the tuples its predecessor left in flight
+    keys = set(self.tracker.add("stream", i, 0.0) for i in range(100))
+    new_keys = set(PendingTupleTracker().add("stream", i, 0.0) for i in range(100))
+    self.assertFalse(keys & new_keys)
+
+  def test_expire(self):
+    keys = {}
+    for i in range(10):
+      keys[i] = self.tracker.add("stream", i, float(i))
+      if i % 3 == 2:
+        self.tracker.rotate()
+    self.tracker.remove(keys[1])
+    self.tracker.remove(keys[4])
+
+    # tuples added at or before 5.0 expire with a timeout of 3.0 at 8.0
+    expired = self.tracker.expire(8.0, 3.0)
+    self.assertEqual([tuple_id for _, tuple_id, _ in expired], [0, 2, 3, 5])
+    self.assertEqual(len(self.tracker), 4)
+    self.assertEqual(self.tracker.expire(8.0, 3.0), [])
+    self.assertIsNone(self.tracker.remove(keys[5]))
+
+    expired = self.tracker.expire(20.0, 3.0)
+    self.assertEqual([tuple_id for _, tuple_id, _ in expired], [6, 7, 8, 9])
+    self.assertEqual(len(self.tracker), 0)
+    self.assertEqual(len(self.tracker._buckets), 1)
+
+  def test_expire_while_adding(self):
+    # the current bucket gets cleared and reused
+    for i in range(5):
+      self.tracker.add("stream", i, float(i))
+      self.assertEqual([tuple_id for _, tuple_id, _ in self.tracker.expire(i + 1.0, 1.0)], [i])
+    self.tracker.add("stream", 5, 5.0)
+    self.tracker.add("stream", 6, 6.0)
+    self.assertEqual([tuple_id for _, tuple_id, _ in self.tracker.expire(10.0, 1.0)], [5, 6])
+
+  def test_released_buckets_are_dropped(self):
+    keys = []
+    for _ in range(3):
+      keys.extend(self.tracker.add("stream", i, 0.0) for i in range(4))
+      self.tracker.rotate()
+    for key in keys[:8]:
+      self.tracker.remove(key)
+    # keys of the released tuples are not kept
+    self.assertEqual([len(bucket) for bucket in self.tracker._buckets], [0, 0, 4, 0])
+    self.tracker.rotate()
+    self.assertEqual([len(bucket) for bucket in self.tracker._buckets], [4, 0, 0])
+
+  def test_full_bucket_rotates(self):
+    for i in range(PendingTupleTracker.MAX_BUCKET_SIZE + 1):
+      self.tracker.add("stream", i, 0.0)
+    self.assertEqual([len(bucket) for bucket in self.tracker._buckets],
+                     [PendingTupleTracker.MAX_BUCKET_SIZE, 1])
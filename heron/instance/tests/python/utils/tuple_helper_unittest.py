@@ -21,10 +21,13 @@
 
 # pylint: disable=missing-docstring
 
+import pickle
 import unittest
 
 import time
-from heron.instance.src.python.utils.tuple import TupleHelper
+from heronpy.api.serializer import PythonSerializer
+from heron.instance.src.python.utils.tuple import TupleHelper, LazyDataTupleSet, LazyTupleValues
+from heron.proto import tuple_pb2
 import heron.instance.tests.python.mock_protobuf as mock_protobuf
 import heron.instance.tests.python.utils.mock_generator as mock_generator
 
@@ -44,6 +47,73 @@ class TupleHelperTest(unittest.TestCase):
     self.assertAlmostEqual(tup.creation_time, time.time(), delta=0.01)
     self.assertIsNone(tup.roots)
 
+  def test_tuple_from_roots(self):
+    STREAM = mock_protobuf.get_mock_stream_id(id="stream_id", component_name="comp_name")
+    data_tuple, _ = mock_generator.make_data_tuple_from_list([1])
+    root = data_tuple.roots.add()
+    root.taskid = 5
+    root.key = 42
+
+    tup = TupleHelper.make_tuple(STREAM, 123, [1], roots=data_tuple.roots, creation_time=10.0)
+    self.assertEqual(tup.id, "123")
+    self.assertEqual(tup.task, 5)
+    self.assertIs(tup.roots, data_tuple.roots)
+    self.assertEqual(tup.creation_time, 10.0)
+    # fields can be unpacked like a namedtuple
+    tup_id, component, stream, task, values, creation_time, roots = tup
+    self.assertEqual((tup_id, component, stream, task, values, creation_time),
+                     ("123", "comp_name", "stream_id", 5, [1], 10.0))
+    self.assertIs(roots, tup.roots)
+    self.assertEqual(tup[4], [1])
+    self.assertEqual(tup[-2], 10.0)
+    self.assertEqual(tup[1:3], ("comp_name", "stream_id"))
+    with self.assertRaises(IndexError):
+      tup[7]  # pylint: disable=pointless-statement
+    self.assertEqual(tup, TupleHelper.make_tuple(STREAM, 123, [1], roots=data_tuple.roots,
+                                                 creation_time=10.0))
+    self.assertFalse(hasattr(tup, "__dict__"))
+    self.assertEqual(tup._asdict()["task"], 5)
+    self.assertEqual(tup._replace(values=[2]).values, [2])
+    self.assertEqual(tup._replace(values=[2]).key, 123)
+
+  def test_pickle_tuple(self):
+    STREAM = mock_protobuf.get_mock_stream_id(id="stream_id", component_name="comp_name")
+    # the task was never read, so is looked up from the roots while pickled
+    tup = TupleHelper.make_tuple(STREAM, 123, [1], creation_time=10.0)
+    restored = pickle.loads(pickle.dumps(tup, protocol=2))
+    self.assertIsNone(restored.task)
+    self.assertEqual(restored.key, 123)
+    self.assertEqual(restored, tup)
+
+  def test_lazy_tuple_values(self):
+    deserialized = []
+    class CountingSerializer(PythonSerializer):
+      def deserialize_field(self, component, stream_id, index, serialized_value):
+        deserialized.append((stream_id, index))
+        return self.deserialize(serialized_value)
+
+    serializer = CountingSerializer()
+    values = [1, "two", [3]]
+    serialized = serializer.serialize_tuple("spout", "stream", values)
+    lazy_values = LazyTupleValues(serialized, serializer, "spout", "stream")
+    self.assertEqual(len(lazy_values), 3)
+    self.assertEqual(deserialized, [])
+
+    self.assertEqual(lazy_values[-1], [3])
+    self.assertEqual(lazy_values[2], [3])
+    self.assertEqual(deserialized, [("stream", 2)])
+    with self.assertRaises(IndexError):
+      lazy_values[3]  # pylint: disable=pointless-statement
+
+    self.assertEqual(lazy_values, values)
+    self.assertEqual(lazy_values[:2], values[:2])
+    self.assertEqual(list(lazy_values), values)
+    self.assertEqual(sorted(deserialized), [("stream", 0), ("stream", 1), ("stream", 2)])
+    self.assertIn("two", lazy_values)
+    self.assertEqual(lazy_values.index("two"), 1)
+    self.assertEqual(pickle.loads(pickle.dumps(lazy_values)), values)
+    self.assertFalse(hasattr(lazy_values, "__dict__"))
+
   def test_tick_tuple(self):
     tup = TupleHelper.make_tick_tuple()
     self.assertEqual(tup.id, "__tick")
@@ -54,10 +124,19 @@ class TupleHelperTest(unittest.TestCase):
     self.assertIsNone(tup.roots)
     self.assertAlmostEqual(tup.creation_time, time.time(), delta=0.01)
 
-  def test_root_tuple_info(self):
-    STREAM_ID = "stream id"
-    TUPLE_ID = "tuple_id"
+  def test_lazy_data_tuple_set(self):
+    hts2 = tuple_pb2.HeronTupleSet2()
+    hts2.data.stream.CopyFrom(mock_protobuf.get_mock_stream_id())
+    expected = []
+    for i in range(5):
+      data_tuple, _ = mock_generator.make_data_tuple_from_list([i, str(i)])
+      data_tuple.key = i
+      expected.append(data_tuple)
+      hts2.data.tuples.append(data_tuple.SerializeToString())
+    # a corrupted tuple is skipped
+    hts2.data.tuples.append("corrupted")
 
-    root_info = TupleHelper.make_root_tuple_info(STREAM_ID, TUPLE_ID)
-    self.assertEqual(root_info.stream_id, STREAM_ID)
-    self.assertEqual(root_info.tuple_id, TUPLE_ID)
+    data_tuple_set = LazyDataTupleSet(hts2.data)
+    self.assertEqual(data_tuple_set.stream, hts2.data.stream)
+    self.assertEqual(len(data_tuple_set), 6)
+    self.assertEqual(list(data_tuple_set), expected)
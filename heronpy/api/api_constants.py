@@ -51,6 +51,23 @@ TOPOLOGY_MAX_SPOUT_PENDING = "topology.max.spout.pending"
 TOPOLOGY_AUTO_TASK_HOOKS = "topology.auto.task.hooks"
 # The serialization class that is used to serialize/deserialize tuples
 TOPOLOGY_SERIALIZER_CLASSNAME = "topology.serializer.classname"
+# Struct schemas of streams used by heronpy.api.serializer.StructSerializer, as a dict mapping
+# a component id to a dict mapping the id of one of its streams to a list of struct format
+# characters, one for each field of the stream
+TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS = "topology.serializer.struct.schemas"
+# If true, python bolts deserialize each value of a received tuple only when it is first read,
+# so that values which are never read are never deserialized. The deserialization time is then
+# part of the execute latency of the bolt, and __tuple-deserialization-time-ns stays at 0.
+TOPOLOGY_SERIALIZER_LAZY_DESERIALIZATION = "topology.serializer.lazy.deserialization"
+# Latencies of python instances are measured for only one of every this many tuples, and time
+# spent metrics are scaled up accordingly. Default 1, i.e. every tuple is measured.
+TOPOLOGY_METRICS_LATENCY_SAMPLE_INTERVAL = "topology.metrics.latency.sample.interval"
+# If true, tuples are sampled at random with a probability of 1 / sample interval,
+# rather than strictly one of every sample interval tuples
+TOPOLOGY_METRICS_LATENCY_SAMPLE_RANDOM = "topology.metrics.latency.sample.random"
+# If true, latency metrics of python instances are collected as histograms, published as the
+# p50, p90, p99 and max of each interval, rather than as means
+TOPOLOGY_METRICS_LATENCY_HISTOGRAMS = "topology.metrics.latency.histograms"
 # Which reliability mode to run the topology?
 # Valid ones are all the enums in TopologyReliabilityMode
 TOPOLOGY_RELIABILITY_MODE = "topology.reliability.mode"
@@ -21,21 +21,121 @@
 '''window_bolt.py: API for defining windowed bolts in Heron'''
 from abc import abstractmethod
 from collections import namedtuple, deque
+import heapq
+import itertools
 import time
 from heronpy.api.bolt.bolt import Bolt
 import heronpy.api.api_constants as api_constants
+from heronpy.api.metrics import IMetric
 from heronpy.api.state.stateful_component import StatefulComponent
+from heronpy.api.utils import overrides
 
 WindowContext = namedtuple('WindowContext', ('start', 'end'))
 
+class WindowPane(object):
+  """Tuples that a SlidingWindowBolt received during one slide interval
+
+  :ivar start: (int) time the pane was opened at, or start of its slide interval in event time,
+               in seconds
+  :ivar tuples: (list of Tuples) tuples received into the pane, acked once it leaves the window
+  :ivar aggregate: aggregate of the tuples, built by ``aggregatePane()`` of the bolt
+  """
+  __slots__ = ('start', 'tuples', 'aggregate')
+
+  def __init__(self, start, tuples=None, aggregate=None):
+    self.start = start
+    self.tuples = tuples if tuples is not None else []
+    self.aggregate = aggregate
+
+class WindowSession(WindowPane):
+  """Tuples of a key that a SlidingWindowBolt received less than a session gap apart
+
+  :ivar key: key of the tuples of the session
+  :ivar end: (int) time of the latest tuple of the session, in seconds
+  """
+  __slots__ = ('key', 'end')
+
+  def __init__(self, key, start, end, tuples=None, aggregate=None):
+    super(WindowSession, self).__init__(start, tuples, aggregate)
+    self.key = key
+    self.end = end
+
+class WindowSizeMetric(IMetric):
+  """Gauge of the tuples that a SlidingWindowBolt holds, and of the panes they are in"""
+  def __init__(self, bolt):
+    self.bolt = bolt
+
+  def get_value_and_reset(self):
+    return {'tuples': self.bolt.num_tuples,
+            'panes': len(self.bolt.panes) + len(self.bolt._get_open_panes())}
+
 class SlidingWindowBolt(Bolt, StatefulComponent):
   """SlidingWindowBolt is a higer level bolt for Heron users who want to deal with
      batches of tuples belonging to a certain time window. This bolt keeps track of
      managing the window, adding/expiring tuples based on window configuration.
      This way users will just have to deal with writing processWindow function
+
+     The window is made of panes, each holding the tuples received during one slide interval.
+     On every slide, the current pane is closed and the window spanning the last
+     ceil(WINDOW_DURATION_SECS / WINDOW_SLIDEINTERVAL_SECS) panes is processed. The oldest
+     pane then leaves the window, and its tuples are acked.
+
+     Instead of processWindow, which is handed all the tuples of the window on every slide,
+     a bolt can implement either of:
+
+     - processWindowIncremental, which is only handed the tuples that entered and left the
+       window since the previous slide
+     - aggregatePane and processWindowAggregates, which aggregate tuples into their pane as
+       they are received, and combine the aggregates of the panes on every slide
+
+     If combineAggregates is implemented as well, the aggregates of the panes are combined by
+     the bolt with two stacks: the combined aggregates of the older panes, from each pane to the
+     newest of them, and the combined aggregate of the panes closed since. So the aggregate of
+     the window is worked out with a couple of combinations per slide, and the older panes are
+     only combined again once all of them have left the window.
+
+     By default, windows follow processing time: tuples go to the pane open when they are
+     received, and the bolt slides on tick tuples. If WINDOW_TIMESTAMP_EXTRACTOR is set,
+     windows follow event time instead: each tuple goes to the pane of the slide interval its
+     timestamp is in, and the bolt slides as the watermark, the greatest timestamp received
+     less WINDOW_MAX_OUT_OF_ORDERNESS_SECS, passes the end of the windows, without tick tuples.
+     A tuple whose pane was already closed is late, and is handled as WINDOW_LATE_TUPLE_POLICY
+     says: dropped, emitted as is on WINDOW_LATE_TUPLE_STREAM, or added to its pane if that is
+     still part of the window, so that the windows processed from then on include it. The
+     windows already processed are not updated, and a tuple whose pane left the window, as
+     every closed pane of tumbling windows did, is emitted as if the policy was to emit it.
+
+     Windows can count tuples instead, if WINDOW_COUNT is set: the current pane is closed
+     once it holds WINDOW_SLIDE_COUNT tuples, and the window spans the last WINDOW_COUNT ones.
+     Or they can be sessions, if WINDOW_SESSION_GAP_SECS is set: the tuples of each key
+     returned by WINDOW_SESSION_KEY_EXTRACTOR, if any, make up a session until none is received
+     for the gap, or the session reaches WINDOW_SESSION_MAX_COUNT tuples. Sessions are handed
+     to processWindow, or processWindowAggregates for a bolt aggregating panes, when they end.
+     In event time, they end once the watermark is a gap after them, so a key can have several
+     sessions open, which a tuple less than a gap apart from each of them merges together.
+
+     The number of tuples the bolt holds is reported by the WINDOW_SIZE_METRIC metric.
   """
   WINDOW_DURATION_SECS = 'slidingwindowbolt_duration_secs'
   WINDOW_SLIDEINTERVAL_SECS = 'slidingwindowbolt_slideinterval_secs'
+  # function returning the event time of a tuple in seconds
+  WINDOW_TIMESTAMP_EXTRACTOR = 'windowbolt_timestamp_extractor'
+  WINDOW_MAX_OUT_OF_ORDERNESS_SECS = 'windowbolt_max_out_of_orderness_secs'
+  WINDOW_LATE_TUPLE_POLICY = 'windowbolt_late_tuple_policy'
+  WINDOW_LATE_TUPLE_STREAM = 'windowbolt_late_tuple_stream'
+  # late tuple policies
+  LATE_TUPLE_DROP = 'drop'
+  LATE_TUPLE_EMIT = 'emit'
+  LATE_TUPLE_UPDATE = 'update'
+  DEFAULT_LATE_TUPLE_STREAM = 'late'
+  WINDOW_COUNT = 'slidingwindowbolt_window_count'
+  WINDOW_SLIDE_COUNT = 'slidingwindowbolt_slide_count'
+  WINDOW_SESSION_GAP_SECS = 'slidingwindowbolt_session_gap_secs'
+  # function returning the key of a tuple, whose tuples make up sessions of their own
+  WINDOW_SESSION_KEY_EXTRACTOR = 'slidingwindowbolt_session_key_extractor'
+  WINDOW_SESSION_MAX_COUNT = 'slidingwindowbolt_session_max_count'
+  WINDOW_SIZE_METRIC = '__window-size'
+  METRICS_INTERVAL_SECS = 60
 
   # pylint: disable=attribute-defined-outside-init
   def init_state(self, stateful_state):
@@ -43,7 +143,17 @@ class SlidingWindowBolt(Bolt, StatefulComponent):
 
   # pylint: disable=unused-argument
   def pre_save(self, checkpoint_id):
-    self.saved_state['tuples'] = self.current_tuples
+    self.saved_state['panes'] = [(pane.start, pane.tuples, pane.aggregate)
+                                 for pane in self.panes]
+    if self.is_session:
+      self.saved_state['open_panes'] = []
+      self.saved_state['sessions'] = [(session.key, session.start, session.end, session.tuples,
+                                       session.aggregate) for session in self._get_open_panes()]
+    else:
+      self.saved_state['open_panes'] = [(pane.start, pane.tuples, pane.aggregate)
+                                        for pane in self._get_open_panes()]
+    self.saved_state['max_timestamp'] = self.max_timestamp
+    self.saved_state['next_window_end'] = self.next_window_end
 
   @abstractmethod
   def processWindow(self, window_info, tuples):
@@ -61,10 +171,69 @@ class SlidingWindowBolt(Bolt, StatefulComponent):
     """
     pass
 
+  def processWindowIncremental(self, window_info, added, expired):
+    """Incremental alternative to processWindow, used instead of it if implemented
+
+    This function is called every WINDOW_SLIDEINTERVAL_SECS seconds, with the tuples
+    that entered and left the window since it was last called.
+
+    :type window_info: :class:`WindowContext`
+    :param window_info: The information about the window
+
+    :type added: :class:`list of Tuples`
+    :param added: The list of tuples received since the previous slide
+
+    :type expired: :class:`list of Tuples`
+    :param expired: The list of tuples that left the window on this slide
+    """
+    raise NotImplementedError()
+
+  def aggregatePane(self, aggregate, tup):
+    """Adds a tuple to the aggregate of its pane, implemented with processWindowAggregates
+
+    :param aggregate: The aggregate of the tuples of the pane so far, None for the first one
+    :type tup: :class:`Tuple`
+    :param tup: The tuple received into the pane
+    :return: The new aggregate of the pane
+    """
+    raise NotImplementedError()
+
+  def processWindowAggregates(self, window_info, aggregates):
+    """Aggregate alternative to processWindow, used instead of it if implemented
+
+    This function is called every WINDOW_SLIDEINTERVAL_SECS seconds, with the
+    aggregates built by aggregatePane for the panes of the window.
+
+    :type window_info: :class:`WindowContext`
+    :param window_info: The information about the window
+
+    :type aggregates: list
+    :param aggregates: The aggregates of the panes of the window that received tuples,
+                       from the oldest to the newest, or only the aggregate of the whole
+                       window if combineAggregates is implemented
+    """
+    raise NotImplementedError()
+
+  def combineAggregates(self, older, newer):
+    """Combines the aggregates of two runs of panes, implemented with processWindowAggregates
+
+    The aggregates must be left unchanged, as they may be combined again.
+
+    :param older: The aggregate of the older panes
+    :param newer: The aggregate of the panes right after them
+    :return: The aggregate of both runs of panes
+    """
+    raise NotImplementedError()
+
   # pylint: disable=unused-argument
   def initialize(self, config, context):
     """We initialize the window duration and slide interval
     """
+    if SlidingWindowBolt.WINDOW_COUNT in config or \
+        SlidingWindowBolt.WINDOW_SESSION_GAP_SECS in config:
+      self.window_duration = self.slide_interval = None
+      self._init_panes(config, context)
+      return
     if SlidingWindowBolt.WINDOW_DURATION_SECS in config:
       self.window_duration = int(config[SlidingWindowBolt.WINDOW_DURATION_SECS])
     else:
@@ -75,62 +244,411 @@ class SlidingWindowBolt(Bolt, StatefulComponent):
       self.slide_interval = self.window_duration
     if self.slide_interval > self.window_duration:
       self.logger.fatal("Slide Interval should be <= Window Duration")
+    self._init_panes(config, context)
+
+  def _init_panes(self, config, context):
+    """Sets up the panes of windows of window_duration sliding every slide_interval, or of
+    the windows counting tuples or the sessions the config asks for
+    """
+    self.is_count_based = SlidingWindowBolt.WINDOW_COUNT in config
+    self.is_session = not self.is_count_based and \
+                      SlidingWindowBolt.WINDOW_SESSION_GAP_SECS in config
+    if self.is_count_based:
+      self.window_count = int(config[SlidingWindowBolt.WINDOW_COUNT])
+      self.slide_count = int(config.get(SlidingWindowBolt.WINDOW_SLIDE_COUNT, self.window_count))
+      if self.slide_count > self.window_count:
+        self.logger.fatal("Slide Count should be <= Window Count")
+      self.panes_per_window = -(-self.window_count // self.slide_count)
+    elif self.is_session:
+      self.session_gap = int(config[SlidingWindowBolt.WINDOW_SESSION_GAP_SECS])
+      self.session_key_extractor = config.get(SlidingWindowBolt.WINDOW_SESSION_KEY_EXTRACTOR)
+      self.session_max_count = int(config.get(SlidingWindowBolt.WINDOW_SESSION_MAX_COUNT, 0))
+      self.panes_per_window = 1
+    else:
+      self.panes_per_window = -(-self.window_duration // self.slide_interval)
+
+    self.timestamp_extractor = config.get(SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR)
+    self.is_event_time = self.timestamp_extractor is not None
+    if self.is_event_time:
+      if self.is_count_based:
+        raise RuntimeError("Windows counting tuples cannot follow event time")
+      self.max_out_of_orderness = \
+        float(config.get(SlidingWindowBolt.WINDOW_MAX_OUT_OF_ORDERNESS_SECS, 0))
+      self.late_tuple_policy = config.get(SlidingWindowBolt.WINDOW_LATE_TUPLE_POLICY,
+                                          SlidingWindowBolt.LATE_TUPLE_DROP)
+      if self.late_tuple_policy not in [SlidingWindowBolt.LATE_TUPLE_DROP,
+                                        SlidingWindowBolt.LATE_TUPLE_EMIT,
+                                        SlidingWindowBolt.LATE_TUPLE_UPDATE]:
+        raise RuntimeError("Unknown late tuple policy %s" % str(self.late_tuple_policy))
+      self.late_tuple_stream = config.get(SlidingWindowBolt.WINDOW_LATE_TUPLE_STREAM,
+                                          SlidingWindowBolt.DEFAULT_LATE_TUPLE_STREAM)
+    elif not self.is_count_based:
+      # By modifying the config, we are able to setup the tick timer
+      config[api_constants.TOPOLOGY_TICK_TUPLE_FREQ_SECS] = \
+        str(self.session_gap if self.is_session else self.slide_interval)
+    self.is_aggregating = overrides(self, SlidingWindowBolt, 'aggregatePane') and \
+                          overrides(self, SlidingWindowBolt, 'processWindowAggregates')
+    self.is_incremental = not self.is_session and \
+                          overrides(self, SlidingWindowBolt, 'processWindowIncremental')
+    self.is_combining = self.is_aggregating and not self.is_session and \
+                        overrides(self, SlidingWindowBolt, 'combineAggregates')
+    # combined aggregates of the older panes of the window, the last one of all of them,
+    # and combined aggregate of the panes after them
+    self._front_aggregates = []
+    self._back_aggregate = None
+    # closed panes that are part of the next window
+    self.panes = deque()
+    # panes that left the window and late tuples added to closed panes since the last slide,
+    # kept to be handed to processWindowIncremental
+    self._expired_panes = []
+    self._late_tuples = []
+    # map <start -> pane> of the panes that are not closed yet in event time
+    self.open_panes = {}
+    self.current_pane = None
+    # map <key -> list of sessions> of the open sessions, of which there may be several per key
+    # in event time, and heap of (time, sequence number, session) for the sessions to be closed
+    # at that time, left there when a session is extended or merged
+    self.sessions = {}
+    self._session_expirations = []
+    self._session_sequence = itertools.count()
+    # greatest event time received, and end of the next window to be processed
+    self.max_timestamp = None
+    self.next_window_end = None
+    # number of tuples held in panes until they are acked
+    self.num_tuples = 0
+    if not self.is_event_time and not self.is_session:
+      self._open_current_pane(int(time.time()))
 
-    # By modifying the config, we are able to setup the tick timer
-    config[api_constants.TOPOLOGY_TICK_TUPLE_FREQ_SECS] = str(self.slide_interval)
-    self.current_tuples = deque()
     if hasattr(self, 'saved_state'):
-      if 'tuples' in self.saved_state:
-        self.current_tuples = self.saved_state['tuples']
+      if 'panes' in self.saved_state:
+        self.panes = deque(WindowPane(*pane) for pane in self.saved_state['panes'])
+        open_panes = [WindowPane(*pane) for pane in self.saved_state['open_panes']]
+        for session in self.saved_state.get('sessions', []):
+          self._open_session(WindowSession(*session))
+        if self.is_event_time:
+          self.open_panes = dict((pane.start, pane) for pane in open_panes)
+          self.max_timestamp = self.saved_state['max_timestamp']
+          self.next_window_end = self.saved_state['next_window_end']
+        else:
+          for pane in open_panes:
+            for tup in pane.tuples:
+              self._add_to_pane(self.current_pane, tup)
+      elif 'tuples' in self.saved_state:
+        for tup in self._get_saved_tuples():
+          if self.is_event_time:
+            self._add_to_open_pane(tup, self.timestamp_extractor(tup))
+          else:
+            self._add_to_pane(self.current_pane, tup)
+        if self.open_panes:
+          self.next_window_end = min(self.open_panes) + self.slide_interval
+    if self.is_combining:
+      self._flip_aggregates()
+    self.num_tuples = sum(len(pane.tuples) for pane in self.panes) + \
+                      sum(len(pane.tuples) for pane in self._get_open_panes())
+    if context is not None:
+      context.register_metric(SlidingWindowBolt.WINDOW_SIZE_METRIC, WindowSizeMetric(self),
+                              SlidingWindowBolt.METRICS_INTERVAL_SECS)
+
+  def _get_saved_tuples(self):
+    """Returns the tuples of a window checkpointed before windows were split into panes"""
+    return [tup for (tup, _) in self.saved_state['tuples']]
+
+  def _get_open_panes(self):
+    """Returns the panes that are not closed yet, or the open sessions"""
+    if self.is_session:
+      return [session for sessions in self.sessions.values() for session in sessions]
+    if self.is_event_time:
+      return [self.open_panes[start] for start in sorted(self.open_panes)]
+    return [self.current_pane]
+
+  def _open_current_pane(self, start):
+    self.current_pane = WindowPane(start)
+    if not self.is_count_based:
+      self.next_window_end = start + self.slide_interval
+
+  def _add_to_pane(self, pane, tup):
+    pane.tuples.append(tup)
+    self.num_tuples += 1
+    if self.is_aggregating:
+      pane.aggregate = self.aggregatePane(pane.aggregate, tup)
+
+  def _ack_pane(self, pane):
+    """Acks the tuples of a pane, that the bolt is done with"""
+    for tup in pane.tuples:
+      self.ack(tup)
+    self.num_tuples -= len(pane.tuples)
+
+  def _get_pane_start(self, timestamp):
+    return int(timestamp // self.slide_interval) * self.slide_interval
+
+  def _add_to_open_pane(self, tup, timestamp):
+    """Adds a tuple to the pane of its event time, opening it if needed"""
+    start = self._get_pane_start(timestamp)
+    pane = self.open_panes.get(start)
+    if pane is None:
+      pane = self.open_panes[start] = WindowPane(start)
+    self._add_to_pane(pane, tup)
+    if self.max_timestamp is None or timestamp > self.max_timestamp:
+      self.max_timestamp = timestamp
+    return pane
+
+  def _on_tuple_added(self, tup, window_info, pane):
+    """Called once a tuple received is added to a pane, before the windows closed by it
+    are processed
+
+    :param window_info: The first window the tuple is part of
+    :param pane: The pane, or session, the tuple was added to
+    """
+    pass
 
   def process(self, tup):
     """Process a single tuple of input
 
-    We add the (time, tuple) pair into our current_tuples. And then look for expiring
-    elemnents
+    We add the tuple into its pane, and aggregate it if the bolt aggregates panes. In event
+    time, the windows that the watermark passed are then processed, as is the window closed
+    by the tuple for windows counting tuples.
+
+    :return: whether the tuple was added to a pane, rather than dropped or emitted as late
     """
-    curtime = int(time.time())
-    self.current_tuples.append((tup, curtime))
-    self._expire(curtime)
-
-  def _expire(self, tm):
-    while len(self.current_tuples) > 0:
-      if tm - self.window_duration > self.current_tuples[0][1]:
-        (tup, _) = self.current_tuples.popleft()
-        self.ack(tup)
+    if self.is_session:
+      return self._process_session(tup)
+
+    if not self.is_event_time:
+      pane = self.current_pane
+      self._add_to_pane(pane, tup)
+      if not self.is_count_based:
+        end = self.next_window_end
+        self._on_tuple_added(tup, WindowContext(end - self.window_duration, end), pane)
       else:
-        break
+        curtime = int(time.time())
+        window_info = WindowContext(self.panes[0].start if self.panes else pane.start, curtime)
+        self._on_tuple_added(tup, window_info, pane)
+        if len(pane.tuples) >= self.slide_count:
+          self._open_current_pane(curtime)
+          self._slide(pane, window_info)
+      return True
+
+    timestamp = self.timestamp_extractor(tup)
+    if self.next_window_end is None:
+      self.next_window_end = \
+        self._get_pane_start(timestamp - self.max_out_of_orderness) + self.slide_interval
+    elif timestamp < self.next_window_end - self.slide_interval:
+      return self._process_late(tup, timestamp)
+    pane = self._add_to_open_pane(tup, timestamp)
+    end = pane.start + self.slide_interval
+    self._on_tuple_added(tup, WindowContext(end - self.window_duration, end), pane)
+    self._advance_watermark()
+    return True
+
+  def _get_session_key(self, tup):
+    """Returns the key of the session of a tuple"""
+    if self.session_key_extractor is None:
+      return None
+    return self.session_key_extractor(tup)
+
+  def _process_session(self, tup):
+    """Adds a tuple to the session of its key, and processes the sessions that ended"""
+    key = self._get_session_key(tup)
+    timestamp = self.timestamp_extractor(tup) if self.is_event_time else int(time.time())
+    sessions = self.sessions.get(key, [])
+    # sessions that the tuple was received less than a gap apart from, which it joins together
+    joined = []
+    for session in list(sessions):
+      if not session.start - self.session_gap < timestamp < session.end + self.session_gap:
+        if not self.is_event_time:
+          # in processing time, no tuple of the key was received for a gap
+          self._close_session(session)
+      elif 0 < self.session_max_count <= len(session.tuples):
+        self._close_session(session)
+      else:
+        joined.append(session)
+
+    if not joined:
+      if self.is_event_time and self.max_timestamp is not None and \
+          timestamp + self.session_gap <= self.max_timestamp - self.max_out_of_orderness:
+        return self._process_late(tup, timestamp)
+      session = self._open_session(WindowSession(key, timestamp, timestamp))
+    else:
+      session = joined[0]
+      end = session.end
+      for other in joined[1:]:
+        self._merge_sessions(session, other)
+      session.start = min(session.start, timestamp)
+      session.end = max(session.end, timestamp)
+      if session.end != end:
+        self._push_session_expiration(session)
+    self._add_to_pane(session, tup)
+    self._on_tuple_added(tup, WindowContext(session.start, session.end + self.session_gap),
+                         session)
+
+    if self.is_event_time:
+      if self.max_timestamp is None or timestamp > self.max_timestamp:
+        self.max_timestamp = timestamp
+      self._close_sessions(self.max_timestamp - self.max_out_of_orderness)
+    return True
+
+  def _open_session(self, session):
+    self.sessions.setdefault(session.key, []).append(session)
+    self._push_session_expiration(session)
+    return session
+
+  def _merge_sessions(self, session, other):
+    """Moves the tuples of another session of the key into a session, as a tuple joined them"""
+    self._on_sessions_merged(session, other)
+    self.sessions[other.key].remove(other)
+    self.num_tuples -= len(other.tuples)
+    for tup in other.tuples:
+      self._add_to_pane(session, tup)
+    session.start = min(session.start, other.start)
+    session.end = max(session.end, other.end)
+
+  def _on_sessions_merged(self, session, other):
+    """Called before the tuples of another session are moved into a session"""
+    pass
+
+  def _push_session_expiration(self, session):
+    heapq.heappush(self._session_expirations, (session.end + self.session_gap,
+                                               next(self._session_sequence), session))
+
+  def _close_sessions(self, current):
+    """Processes the sessions that no tuple was received for a gap before ``current``"""
+    expirations = self._session_expirations
+    while expirations and expirations[0][0] <= current:
+      expiration, _, session = heapq.heappop(expirations)
+      if session.end + self.session_gap == expiration and \
+          session in self.sessions.get(session.key, []):
+        self._close_session(session)
+
+  def _close_session(self, session):
+    sessions = self.sessions[session.key]
+    sessions.remove(session)
+    if not sessions:
+      del self.sessions[session.key]
+    window_info = WindowContext(session.start, session.end + self.session_gap)
+    if self.is_aggregating:
+      self.processWindowAggregates(window_info, [session.aggregate])
+    else:
+      self.processWindow(window_info, session.tuples)
+    self._ack_pane(session)
+
+  def _process_late(self, tup, timestamp):
+    """Handles a tuple whose pane was closed, as the late tuple policy says"""
+    if self.late_tuple_policy == SlidingWindowBolt.LATE_TUPLE_UPDATE and self.panes and \
+        timestamp >= self.panes[0].start:
+      # closed panes are contiguous, the ones before the window having left it
+      pane = self.panes[int((timestamp - self.panes[0].start) // self.slide_interval)]
+      self._add_to_pane(pane, tup)
+      if self.is_incremental:
+        self._late_tuples.append(tup)
+      if self.is_combining:
+        self._flip_aggregates()
+      end = self.next_window_end
+      self._on_tuple_added(tup, WindowContext(end - self.window_duration, end), pane)
+      return True
+
+    # tuples that cannot be added to a pane any more are not dropped when updating either
+    if self.late_tuple_policy != SlidingWindowBolt.LATE_TUPLE_DROP:
+      self.emit(list(tup.values), stream=self.late_tuple_stream, anchors=[tup])
+    self.ack(tup)
+    return False
+
+  def _advance_watermark(self):
+    """Closes the panes and processes the windows that the watermark passed the end of"""
+    watermark = self.max_timestamp - self.max_out_of_orderness
+    while self.next_window_end <= watermark:
+      end = self.next_window_end
+      added = self.open_panes.pop(end - self.slide_interval, None)
+      if added is None and not any(pane.tuples for pane in self.panes):
+        # the windows up to the next open pane have no tuples, so they are skipped
+        self.panes.clear()
+        self._front_aggregates = []
+        self._back_aggregate = None
+        self.next_window_end = min(self.open_panes) + self.slide_interval
+        continue
+      self.next_window_end = end + self.slide_interval
+      self._slide(added if added is not None else WindowPane(end - self.slide_interval),
+                  WindowContext(end - self.window_duration, end))
 
   # pylint: disable=unused-argument
   # pylint: disable=unused-variable
   def process_tick(self, tup):
-    """Called every slide_interval
+    """Called every slide_interval, or session gap, unless windows follow event time or
+    count tuples
     """
+    if self.is_event_time or self.is_count_based:
+      return
+    if self.is_session:
+      self._close_sessions(int(time.time()))
+      return
     curtime = int(time.time())
-    window_info = WindowContext(curtime - self.window_duration, curtime)
-    tuple_batch = []
-    for (tup, tm) in self.current_tuples:
-      tuple_batch.append(tup)
-    self.processWindow(window_info, tuple_batch)
-    self._expire(curtime)
+    added = self.current_pane
+    self._open_current_pane(curtime)
+    self._slide(added, WindowContext(curtime - self.window_duration, curtime))
+
+  def _slide(self, added, window_info):
+    """Processes the window ending with the pane closed, whose panes are then the latest ones"""
+    self.panes.append(added)
+    if self.is_combining:
+      self._back_aggregate = self._combine(self._back_aggregate, added.aggregate)
 
+    if self.is_combining:
+      front_aggregate = self._front_aggregates[-1] if self._front_aggregates else None
+      window_aggregate = self._combine(front_aggregate, self._back_aggregate)
+      self.processWindowAggregates(window_info,
+                                   [window_aggregate] if window_aggregate is not None else [])
+    elif self.is_aggregating:
+      self.processWindowAggregates(window_info,
+                                   [pane.aggregate for pane in self.panes if pane.tuples])
+    elif self.is_incremental:
+      added_tuples = self._late_tuples + added.tuples if self._late_tuples else added.tuples
+      self.processWindowIncremental(window_info, added_tuples,
+                                    [tup for pane in self._expired_panes for tup in pane.tuples])
+      self._late_tuples = []
+      self._expired_panes = []
+    else:
+      self.processWindow(window_info, [tup for pane in self.panes for tup in pane.tuples])
+
+    # the oldest pane is not part of the next window, so its tuples are done with
+    while len(self.panes) >= self.panes_per_window:
+      if self.is_combining:
+        if not self._front_aggregates:
+          self._flip_aggregates()
+        self._front_aggregates.pop()
+      expired = self.panes.popleft()
+      if self.is_incremental:
+        self._expired_panes.append(expired)
+      self._ack_pane(expired)
+
+  def _combine(self, older, newer):
+    """Combines two aggregates, either of which is None if it has no tuples"""
+    if newer is None:
+      return older
+    if older is None:
+      return newer
+    return self.combineAggregates(older, newer)
+
+  def _flip_aggregates(self):
+    """Makes all the panes of the window the older ones, that are combined from the newest"""
+    aggregate = None
+    front_aggregates = []
+    for pane in reversed(self.panes):
+      aggregate = self._combine(pane.aggregate, aggregate)
+      front_aggregates.append(aggregate)
+    self._front_aggregates = front_aggregates
+    self._back_aggregate = None
 
-class TumblingWindowBolt(Bolt, StatefulComponent):
+
+class TumblingWindowBolt(SlidingWindowBolt):
   """TumblingWindowBolt is a higer level bolt for Heron users who want to deal with
      batches of tuples belonging to a certain time window. This bolt keeps track of
      managing the window, adding/expiring tuples based on window configuration.
      This way users will just have to deal with writing processWindow function
+
+     Its windows are those of a SlidingWindowBolt sliding by their whole duration, made of a
+     single pane, so they can follow event time with the same configuration.
   """
   WINDOW_DURATION_SECS = 'tumblingwindowbolt_duration_secs'
 
-  # pylint: disable=attribute-defined-outside-init
-  def init_state(self, stateful_state):
-    self.saved_state = stateful_state
-
-  # pylint: disable=unused-argument
-  def pre_save(self, checkpoint_id):
-    self.saved_state['tuples'] = self.current_tuples
-
   @abstractmethod
   def processWindow(self, window_info, tuples):
     """The main interface that needs to be implemented.
@@ -155,29 +673,8 @@ class TumblingWindowBolt(Bolt, StatefulComponent):
       self.window_duration = int(config[TumblingWindowBolt.WINDOW_DURATION_SECS])
     else:
       self.logger.fatal("Window Duration has to be specified in the config")
+    self.slide_interval = self.window_duration
+    self._init_panes(config, context)
 
-    # By modifying the config, we are able to setup the tick timer
-    config[api_constants.TOPOLOGY_TICK_TUPLE_FREQ_SECS] = str(self.window_duration)
-    self.current_tuples = deque()
-    if hasattr(self, 'saved_state'):
-      if 'tuples' in self.saved_state:
-        self.current_tuples = self.saved_state['tuples']
-
-  def process(self, tup):
-    """Process a single tuple of input
-
-    We simply add the tuple into our current_tuples.
-    """
-    self.current_tuples.append(tup)
-
-  # pylint: disable=unused-argument
-  # pylint: disable=unused-variable
-  def process_tick(self, tup):
-    """Called every window_duration
-    """
-    curtime = int(time.time())
-    window_info = WindowContext(curtime - self.window_duration, curtime)
-    self.processWindow(window_info, list(self.current_tuples))
-    for tup in self.current_tuples:
-      self.ack(tup)
-    self.current_tuples.clear()
+  def _get_saved_tuples(self):
+    return list(self.saved_state['tuples'])
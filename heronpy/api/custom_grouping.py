@@ -47,3 +47,19 @@ class ICustomGrouping(object):
     :return: list of task ids to which these values are emitted
     """
     pass
+
+  def choose_tasks_batch(self, values_list):
+    """Implements a custom stream grouping for many tuples at once
+
+    By default, ``choose_tasks()`` is called for each of the values. A custom grouping can
+    override this method to work on the whole list at once, in which case the tuples emitted
+    into its stream are grouped together when they are sent out, rather than one by one as they
+    are emitted, unless the emitter asks for the task ids. The values must therefore not be
+    modified after they are emitted.
+
+    :type values_list: list of list
+    :param values_list: the values of each tuple to group on
+    :rtype: list of list of int
+    :return: list of task ids to which each of the values is emitted, in the same order
+    """
+    return [self.choose_tasks(values) for values in values_list]
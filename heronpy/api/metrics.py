@@ -19,6 +19,7 @@
 #  under the License.
 
 """metrics.py: common heron metric"""
+import math
 from abc import abstractmethod
 
 # pylint: disable=attribute-defined-outside-init
@@ -101,6 +102,65 @@ class MeanReducer(IReducer):
     else:
       return None
 
+class HistogramReducer(IReducer):
+  """Histogram Reducer
+
+  Values are counted in logarithmic buckets: each power of two is split into
+  ``2 ** SUB_BUCKET_BITS`` buckets of equal width, so a percentile is estimated to within about
+  ``2 ** -(SUB_BUCKET_BITS + 1)`` of its relative value, and a reduction is O(1). Only buckets
+  that have values are kept, and there are at most ``MAX_EXPONENT * 2 ** SUB_BUCKET_BITS`` of
+  them, as values below 1 and at or above ``2 ** MAX_EXPONENT`` share the first and last buckets.
+
+  Extracts a dict of the ``PERCENTILES`` and the exact max, or None if nothing was reduced.
+  """
+  SUB_BUCKET_BITS = 4
+  SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+  MAX_EXPONENT = 64
+  PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+  def init(self):
+    # map <bucket index -> count>
+    self.buckets = {}
+    self.count = 0
+    self.max = None
+
+  def reduce(self, value):
+    value = float(value)
+    if value < 1.0:
+      index = 0
+    else:
+      # value == mantissa * 2 ** exponent, where 0.5 <= mantissa < 1
+      mantissa, exponent = math.frexp(value)
+      if exponent > self.MAX_EXPONENT:
+        index = self.MAX_EXPONENT * self.SUB_BUCKETS - 1
+      else:
+        index = (exponent - 1) * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+    self.buckets[index] = self.buckets.get(index, 0) + 1
+    self.count += 1
+    if self.max is None or value > self.max:
+      self.max = value
+
+  def _get_bucket_value(self, index):
+    """Returns the middle of the values counted in a given bucket"""
+    exponent, sub_bucket = divmod(index, self.SUB_BUCKETS)
+    return (1.0 + (sub_bucket + 0.5) / self.SUB_BUCKETS) * 2.0 ** exponent
+
+  def extract(self):
+    if self.count == 0:
+      return None
+
+    ret = {"max": self.max}
+    ranks = [(name, max(int(math.ceil(self.count * quantile)), 1))
+             for name, quantile in self.PERCENTILES]
+    seen = 0
+    for index in sorted(self.buckets):
+      seen += self.buckets[index]
+      while ranks and ranks[0][1] <= seen:
+        ret[ranks.pop(0)[0]] = min(self._get_bucket_value(index), self.max)
+      if not ranks:
+        break
+    return ret
+
 class ReducedMetric(IMetric):
   """Reduced Metric"""
   def __init__(self, reducer_cls):
@@ -146,7 +206,6 @@ class MultiReducedMetric(IMetric):
     ret = {}
     for key, value in self.value.items():
       ret[key] = value.get_value_and_reset()
-      self.value[key] = value
     return ret
 
 class AssignableMetrics(IMetric):
@@ -179,3 +238,5 @@ class MultiAssignableMetrics(IMetric):
 
 MeanReducedMetric = lambda: ReducedMetric(MeanReducer)
 MultiMeanReducedMetric = lambda: MultiReducedMetric(MeanReducer)
+HistogramMetric = lambda: ReducedMetric(HistogramReducer)
+MultiHistogramMetric = lambda: MultiReducedMetric(HistogramReducer)
@@ -19,6 +19,7 @@
 #  under the License.
 
 '''serializer.py: common python serializer for heron'''
+import struct
 from abc import abstractmethod
 
 try:
@@ -26,6 +27,12 @@ try:
 except:
   import pickle
 
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+
+import heronpy.api.api_constants as api_constants
 import heronpy.api.cloudpickle as cloudpickle
 
 class IHeronSerializer(object):
@@ -53,6 +60,69 @@ class IHeronSerializer(object):
     """
     pass
 
+  def serialize_tuple(self, component, stream_id, values):
+    """Serialize the values of a tuple emitted to a given stream
+
+    Each value is serialized on its own, as the stream manager hashes values individually
+    for fields grouping. Override to serialize a whole tuple at a lower cost per value.
+
+    :param component: Id of the component emitting the tuple
+    :param stream_id: Id of the stream the tuple is emitted to
+    :param values: Values of the tuple
+    :returns: List of serialized values as byte strings
+    """
+    serialize = self.serialize
+    return [serialize(value) for value in values]
+
+  def deserialize_tuple(self, component, stream_id, serialized_values):
+    """Deserialize the values of a tuple received from a given stream
+
+    :param component: Id of the component that emitted the tuple
+    :param stream_id: Id of the stream the tuple is received from
+    :param serialized_values: Serialized values as byte strings
+    :returns: List of deserialized values
+    """
+    deserialize = self.deserialize
+    return [deserialize(value) for value in serialized_values]
+
+  def deserialize_field(self, component, stream_id, index, serialized_value):
+    """Deserialize a single value of a tuple received from a given stream
+
+    Used when the values of a tuple are deserialized lazily, one at a time.
+
+    :param component: Id of the component that emitted the tuple
+    :param stream_id: Id of the stream the tuple is received from
+    :param index: Index of the value in the tuple
+    :param serialized_value: Serialized value as byte string
+    :returns: Deserialized value
+    """
+    return self.deserialize(serialized_value)
+
+  def serialize_batch(self, component, stream_id, tuples):
+    """Serialize a batch of tuples emitted to a given stream
+
+    Override to amortize the cost of a call across the tuples, for instance with a serializer
+    backed by C code.
+
+    :param component: Id of the component emitting the tuples
+    :param stream_id: Id of the stream the tuples are emitted to
+    :param tuples: List of tuples, each a sequence of values
+    :returns: List of lists of serialized values as byte strings, one for each tuple
+    """
+    serialize_tuple = self.serialize_tuple
+    return [serialize_tuple(component, stream_id, values) for values in tuples]
+
+  def deserialize_batch(self, component, stream_id, serialized_tuples):
+    """Deserialize a batch of tuples received from a given stream
+
+    :param component: Id of the component that emitted the tuples
+    :param stream_id: Id of the stream the tuples are received from
+    :param serialized_tuples: List of lists of serialized values as byte strings
+    :returns: List of lists of deserialized values, one for each tuple
+    """
+    deserialize_tuple = self.deserialize_tuple
+    return [deserialize_tuple(component, stream_id, values) for values in serialized_tuples]
+
 class PythonSerializer(IHeronSerializer):
   """Default serializer"""
   def initialize(self, config=None):
@@ -64,4 +134,187 @@ class PythonSerializer(IHeronSerializer):
   def deserialize(self, input_str):
     return pickle.loads(input_str)
 
+class PickleSerializer(IHeronSerializer):
+  """Serializer based on protocol 2 of cPickle
+
+  It is much faster than PythonSerializer, but unlike cloudpickle it can't serialize lambdas,
+  nested functions or classes defined interactively.
+  """
+  PROTOCOL = 2
+
+  def initialize(self, config=None):
+    pass
+
+  def serialize(self, obj):
+    return pickle.dumps(obj, self.PROTOCOL)
+
+  def deserialize(self, input_str):
+    return pickle.loads(input_str)
+
+  def serialize_tuple(self, component, stream_id, values):
+    dumps = pickle.dumps
+    return [dumps(value, self.PROTOCOL) for value in values]
+
+  def deserialize_tuple(self, component, stream_id, serialized_values):
+    loads = pickle.loads
+    return [loads(value) for value in serialized_values]
+
+  def serialize_batch(self, component, stream_id, tuples):
+    dumps = pickle.dumps
+    protocol = self.PROTOCOL
+    return [[dumps(value, protocol) for value in values] for values in tuples]
+
+  def deserialize_batch(self, component, stream_id, serialized_tuples):
+    loads = pickle.loads
+    return [[loads(value) for value in values] for values in serialized_tuples]
+
+class MsgpackSerializer(IHeronSerializer):
+  """Serializer based on msgpack, which requires the ``msgpack`` package
+
+  It only supports None, booleans, numbers, strings, lists and dicts of these, and deserializes
+  tuples as lists. Byte strings and unicode strings are told apart.
+  """
+  def __init__(self):
+    self._packer = None
+
+  def initialize(self, config=None):
+    if msgpack is None:
+      raise RuntimeError("MsgpackSerializer requires the msgpack package")
+    self._packer = msgpack.Packer(use_bin_type=True)
+
+  def serialize(self, obj):
+    return self._packer.pack(obj)
+
+  def deserialize(self, input_str):
+    return msgpack.unpackb(input_str, raw=False)
+
+  def serialize_tuple(self, component, stream_id, values):
+    pack = self._packer.pack
+    return [pack(value) for value in values]
+
+  def deserialize_tuple(self, component, stream_id, serialized_values):
+    unpackb = msgpack.unpackb
+    return [unpackb(value, raw=False) for value in serialized_values]
+
+  def serialize_batch(self, component, stream_id, tuples):
+    pack = self._packer.pack
+    return [[pack(value) for value in values] for values in tuples]
+
+  def deserialize_batch(self, component, stream_id, serialized_tuples):
+    unpackb = msgpack.unpackb
+    return [[unpackb(value, raw=False) for value in values] for values in serialized_tuples]
+
+class StructSerializer(PickleSerializer):
+  """Serializer packing the values of streams with a fixed schema using ``struct``
+
+  Schemas are given in the topology config under ``TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS``, as a
+  dict mapping a component id to a dict mapping the id of one of its streams to a list of struct
+  format characters, one for each field the stream declares with ``Stream(fields=...)``, in the
+  same order. For example, ``{"spout": {"default": ["q", "d"]}}`` packs the values of the
+  ``default`` stream of ``spout``, declared with ``fields=["id", "score"]``, as a 64-bit integer
+  and a double. Schemas are checked against the declared streams by ``check_fields()``.
+
+  Values of streams without a schema, and objects serialized on their own, are serialized as
+  by PickleSerializer.
+  """
+  def __init__(self):
+    # map <(component id, stream id) -> list of struct.Struct, one for each field>
+    self._schemas = {}
+    # map <(component id, stream id) -> tuple of field names>, of the checked schemas
+    self._field_names = {}
+
+  def initialize(self, config=None):
+    schemas = {}
+    if config is not None:
+      schemas = config.get(api_constants.TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS) or {}
+    if not isinstance(schemas, dict) or \
+        not all(isinstance(streams, dict) for streams in schemas.values()):
+      raise TypeError("%s must be a dict of dicts, given: %s"
+                      % (api_constants.TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS, str(schemas)))
+    self._schemas = dict(((component, stream_id), [self._get_field_struct(fmt) for fmt in formats])
+                         for component, streams in schemas.items()
+                         for stream_id, formats in streams.items())
+    self._field_names = {}
+
+  def check_fields(self, out_fields):
+    """Checks that each schema has a format for every field its stream declares
+
+    :param out_fields: map <component id -> map <stream id -> tuple of field names>> of the
+                       streams declared in the topology
+    """
+    for (component, stream_id), schema in self._schemas.items():
+      fields = out_fields.get(component, {}).get(stream_id)
+      if fields is None:
+        raise ValueError("Struct schema given for stream %s of component %s, which is not declared"
+                         % (stream_id, component))
+      if len(fields) != len(schema):
+        raise ValueError("Struct schema of stream %s of component %s has %d fields, declared: %s"
+                         % (stream_id, component, len(schema), ", ".join(fields)))
+      self._field_names[(component, stream_id)] = tuple(fields)
+
+  @staticmethod
+  def _get_field_struct(fmt):
+    """Returns a struct.Struct for a field, which must consist of a single value"""
+    try:
+      # standard sizes and no alignment, so that all instances agree on the layout
+      field = struct.Struct("<" + fmt)
+      num_values = len(field.unpack(b"\0" * field.size))
+    except struct.error as e:
+      raise ValueError("Invalid struct format of a field: %s, %s" % (fmt, str(e)))
+    if num_values != 1:
+      raise ValueError("Struct format of a field must have a single value, given: %s" % fmt)
+    return field
+
+  def _pack(self, key, schema, values):
+    """Packs the values of a tuple, naming the field whose value does not match its format"""
+    try:
+      return [field.pack(value) for field, value in zip(schema, values)]
+    except struct.error:
+      pass
+    names = self._field_names.get(key)
+    for index, (field, value) in enumerate(zip(schema, values)):
+      try:
+        field.pack(value)
+      except struct.error as e:
+        raise ValueError("Value %r of field %s of stream %s of component %s does not match struct "
+                         "format %s: %s" % (value, names[index] if names else index, key[1],
+                                            key[0], field.format, str(e)))
+
+  def serialize_tuple(self, component, stream_id, values):
+    key = (component, stream_id)
+    schema = self._schemas.get(key)
+    if schema is None:
+      return super(StructSerializer, self).serialize_tuple(component, stream_id, values)
+    if len(values) != len(schema):
+      raise ValueError("Tuple of %d values does not match struct schema of stream %s of "
+                       "component %s: %d fields" % (len(values), stream_id, component, len(schema)))
+    return self._pack(key, schema, values)
+
+  def deserialize_tuple(self, component, stream_id, serialized_values):
+    schema = self._schemas.get((component, stream_id))
+    if schema is None:
+      return super(StructSerializer, self).deserialize_tuple(component, stream_id,
+                                                             serialized_values)
+    return [field.unpack(value)[0] for field, value in zip(schema, serialized_values)]
+
+  def deserialize_field(self, component, stream_id, index, serialized_value):
+    schema = self._schemas.get((component, stream_id))
+    if schema is None:
+      return self.deserialize(serialized_value)
+    return schema[index].unpack(serialized_value)[0]
+
+  def serialize_batch(self, component, stream_id, tuples):
+    schema = self._schemas.get((component, stream_id))
+    if schema is None:
+      return super(StructSerializer, self).serialize_batch(component, stream_id, tuples)
+    return [self.serialize_tuple(component, stream_id, values) for values in tuples]
+
+  def deserialize_batch(self, component, stream_id, serialized_tuples):
+    schema = self._schemas.get((component, stream_id))
+    if schema is None:
+      return super(StructSerializer, self).deserialize_batch(component, stream_id,
+                                                             serialized_tuples)
+    return [[field.unpack(value)[0] for field, value in zip(schema, values)]
+            for values in serialized_tuples]
+
 default_serializer = PythonSerializer()
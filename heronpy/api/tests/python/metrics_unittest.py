@@ -24,7 +24,8 @@
 import unittest
 
 from heronpy.api.metrics import (CountMetric, MultiCountMetric,
-                                 MeanReducedMetric, MultiMeanReducedMetric)
+                                 MeanReducedMetric, MultiMeanReducedMetric,
+                                 HistogramMetric, MultiHistogramMetric)
 
 class MetricsTest(unittest.TestCase):
   def test_count_metric(self):
@@ -78,3 +79,51 @@ class MetricsTest(unittest.TestCase):
     ret = metric.get_value_and_reset()
     self.assertIn("key4", ret)
     self.assertIsNone(ret["key4"])
+
+  def assert_close(self, value, expected):
+    # buckets are 1/16 of a power of two wide
+    self.assertLessEqual(abs(value - expected), expected / 32.0)
+
+  def test_histogram_metric(self):
+    metric = HistogramMetric()
+    self.assertIsNone(metric.get_value_and_reset())
+
+    # update from 1 to 1000 in random order
+    for i in range(1000):
+      metric.update((i * 7919) % 1000 + 1)
+    ret = metric.get_value_and_reset()
+    self.assertEqual(sorted(ret.keys()), ["max", "p50", "p90", "p99"])
+    self.assert_close(ret["p50"], 500)
+    self.assert_close(ret["p90"], 900)
+    self.assert_close(ret["p99"], 990)
+    self.assertEqual(ret["max"], 1000)
+    self.assertIsNone(metric.get_value_and_reset())
+
+    # a tail hidden by the mean
+    for _ in range(98):
+      metric.update(10)
+    metric.update(50000)
+    metric.update(1e30)
+    ret = metric.get_value_and_reset()
+    self.assert_close(ret["p50"], 10)
+    self.assert_close(ret["p99"], 50000)
+    self.assertEqual(ret["max"], 1e30)
+
+  def test_histogram_metric_small_values(self):
+    metric = HistogramMetric()
+    metric.update(0)
+    metric.update(0.5)
+    self.assertEqual(metric.get_value_and_reset(), {"p50": 0.5, "p90": 0.5, "p99": 0.5,
+                                                    "max": 0.5})
+
+  def test_multi_histogram_metric(self):
+    metric = MultiHistogramMetric()
+    for i in range(1, 101):
+      metric.update(key="key1", value=i)
+      metric.update(key="key2", value=i * 100)
+    metric.add_key("key3")
+    ret = metric.get_value_and_reset()
+    self.assert_close(ret["key1"]["p90"], 90)
+    self.assert_close(ret["key2"]["p90"], 9000)
+    self.assertEqual(ret["key2"]["max"], 10000)
+    self.assertIsNone(ret["key3"])
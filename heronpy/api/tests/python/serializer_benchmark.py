@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''Microbenchmark of tuple serialization with the built-in serializers
+
+Tuples are serialized and deserialized repeatedly with each serializer, one at a time and in
+batches. No timing is asserted; run with ``pytest --durations=0`` to see how long each takes.
+'''
+import unittest
+
+import heronpy.api.api_constants as api_constants
+from heronpy.api.serializer import (PythonSerializer, PickleSerializer, MsgpackSerializer,
+                                    StructSerializer)
+import heronpy.api.serializer as serializer_module
+
+# pylint: disable=missing-docstring
+
+class SerializerBenchmark(unittest.TestCase):
+  NUM_TUPLES = 20000
+
+  def get_serializers(self, schema):
+    schemas = {"spout": {"default": schema}} if schema is not None else {}
+    config = {api_constants.TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS: schemas}
+    serializers = [PythonSerializer(), PickleSerializer(), StructSerializer()]
+    if serializer_module.msgpack is not None:
+      serializers.append(MsgpackSerializer())
+    for serializer in serializers:
+      serializer.initialize(config)
+    return serializers
+
+  def run_benchmark(self, values, schema):
+    for serializer in self.get_serializers(schema):
+      for _ in range(self.NUM_TUPLES):
+        serialized = serializer.serialize_tuple("spout", "default", values)
+        deserialized = serializer.deserialize_tuple("spout", "default", serialized)
+      self.assertEqual(deserialized, values)
+
+  def test_numeric_tuple(self):
+    self.run_benchmark([123456789, 1500000000000, 0.75, True], ["q", "q", "d", "?"])
+
+  def test_word_count_tuple(self):
+    # struct can't pack variable length strings, so this stream has no struct schema
+    self.run_benchmark(["heron", 42], None)
+
+  def test_deserialize_tuple_set(self):
+    # a bolt deserializes a tuple set in batches
+    tuples = [[i, "word%d" % i] for i in range(100)]
+    for serializer in self.get_serializers(None):
+      serialized = serializer.serialize_batch("spout", "default", tuples)
+      for _ in range(self.NUM_TUPLES // len(tuples)):
+        deserialized = serializer.deserialize_batch("spout", "default", serialized)
+      self.assertEqual(deserialized, tuples)
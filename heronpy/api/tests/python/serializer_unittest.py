@@ -24,7 +24,10 @@
 import unittest
 
 import six
-from heronpy.api.serializer import PythonSerializer
+import heronpy.api.api_constants as api_constants
+from heronpy.api.serializer import (PythonSerializer, PickleSerializer, MsgpackSerializer,
+                                    StructSerializer)
+import heronpy.api.serializer as serializer_module
 
 prim_list = [1000, -234, 0.00023, "string",
              ["abc", "def", "ghi"], True, False,
@@ -43,3 +46,104 @@ class SerializerTest(unittest.TestCase):
       self.assertIsInstance(serialized, six.binary_type)
       deserialized = serializer.deserialize(serialized)
       self.assertEqual(deserialized, obj)
+
+  def test_pickle_serializer(self):
+    serializer = PickleSerializer()
+    serializer.initialize()
+    for obj in prim_list:
+      serialized = serializer.serialize(obj)
+      self.assertIsInstance(serialized, six.binary_type)
+      self.assertEqual(serializer.deserialize(serialized), obj)
+
+  @unittest.skipIf(serializer_module.msgpack is None, "msgpack is not installed")
+  def test_msgpack_serializer(self):
+    serializer = MsgpackSerializer()
+    serializer.initialize()
+    for obj in prim_list:
+      serialized = serializer.serialize(obj)
+      self.assertIsInstance(serialized, six.binary_type)
+      expected = list(obj) if isinstance(obj, tuple) else obj
+      self.assertEqual(serializer.deserialize(serialized), expected)
+    for obj in [b"bytes", u"unicode"]:
+      deserialized = serializer.deserialize(serializer.serialize(obj))
+      self.assertEqual(type(deserialized), type(obj))
+
+  def test_serialize_tuple(self):
+    serializers = [PythonSerializer(), PickleSerializer(), StructSerializer()]
+    if serializer_module.msgpack is not None:
+      serializers.append(MsgpackSerializer())
+    values = [1000, "string", 0.25, None]
+    for serializer in serializers:
+      serializer.initialize()
+      serialized = serializer.serialize_tuple("spout", "default", values)
+      # one serialized value for each value, as fields grouping hashes them individually
+      self.assertEqual(len(serialized), len(values))
+      self.assertEqual(serialized[0], serializer.serialize(values[0]))
+      self.assertEqual(serializer.deserialize_tuple("spout", "default", serialized), values)
+
+  def test_serialize_batch(self):
+    serializers = [PythonSerializer(), PickleSerializer(), StructSerializer()]
+    if serializer_module.msgpack is not None:
+      serializers.append(MsgpackSerializer())
+    config = {api_constants.TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS:
+              {"spout": {"numbers": ["q", "d"]}}}
+    batches = {"default": [[1, "one"], [2, "two"], []],
+               "numbers": [[1, 0.5], [-2, 1.5]]}
+    for serializer in serializers:
+      serializer.initialize(config)
+      for stream_id, tuples in batches.items():
+        serialized = serializer.serialize_batch("spout", stream_id, tuples)
+        self.assertEqual(serialized, [serializer.serialize_tuple("spout", stream_id, values)
+                                      for values in tuples])
+        self.assertEqual(serializer.deserialize_batch("spout", stream_id, serialized), tuples)
+      self.assertEqual(serializer.deserialize_batch("spout", "default", []), [])
+
+  def test_deserialize_field(self):
+    serializers = [PythonSerializer(), PickleSerializer(), StructSerializer()]
+    if serializer_module.msgpack is not None:
+      serializers.append(MsgpackSerializer())
+    config = {api_constants.TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS:
+              {"spout": {"numbers": ["q", "d"]}}}
+    tuples = {"default": [1, "one"], "numbers": [-2, 1.5]}
+    for serializer in serializers:
+      serializer.initialize(config)
+      for stream_id, values in tuples.items():
+        serialized = serializer.serialize_tuple("spout", stream_id, values)
+        self.assertEqual([serializer.deserialize_field("spout", stream_id, i, value)
+                          for i, value in enumerate(serialized)], values)
+
+  def test_struct_serializer(self):
+    serializer = StructSerializer()
+    serializer.initialize({api_constants.TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS:
+                           {"spout": {"scores": ["q", "d", "?"]}}})
+    values = [-(2 ** 40), 0.125, True]
+    serialized = serializer.serialize_tuple("spout", "scores", values)
+    self.assertEqual([len(value) for value in serialized], [8, 8, 1])
+    self.assertEqual(serializer.deserialize_tuple("spout", "scores", serialized), values)
+
+    # other streams fall back to pickle, as do streams of the same id of other components
+    values = ["string", [1, 2]]
+    for component, stream_id in [("spout", "default"), ("bolt", "scores")]:
+      serialized = serializer.serialize_tuple(component, stream_id, values)
+      self.assertEqual(serializer.deserialize_tuple(component, stream_id, serialized), values)
+
+    with self.assertRaises(ValueError):
+      serializer.serialize_tuple("spout", "scores", [1, 0.5])
+    for fmt in ["z", "qq", "x"]:
+      with self.assertRaises(ValueError):
+        serializer.initialize({api_constants.TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS:
+                               {"spout": {"s": [fmt]}}})
+
+  def test_struct_serializer_fields(self):
+    serializer = StructSerializer()
+    serializer.initialize({api_constants.TOPOLOGY_SERIALIZER_STRUCT_SCHEMAS:
+                           {"spout": {"scores": ["q", "d"]}}})
+    with self.assertRaises(ValueError):
+      serializer.check_fields({"spout": {"scores": ("id", "score", "valid")}})
+    with self.assertRaises(ValueError):
+      serializer.check_fields({"bolt": {"scores": ("id", "score")}})
+    serializer.check_fields({"spout": {"scores": ("id", "score")}})
+
+    # a value that doesn't match its field is named in the error
+    with self.assertRaisesRegexp(ValueError, "field score of stream scores of component spout"):
+      serializer.serialize_tuple("spout", "scores", [1, "high"])
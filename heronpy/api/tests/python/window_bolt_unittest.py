@@ -0,0 +1,702 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+
+# pylint: disable=missing-docstring
+# pylint: disable=protected-access
+import logging
+import unittest
+
+from mock import patch
+
+from heronpy.api.bolt.window_bolt import SlidingWindowBolt, TumblingWindowBolt
+from heronpy.api.tuple import Tuple
+import heronpy.api.api_constants as api_constants
+from heronpy.streamlet.impl.joinbolt import JoinBolt
+from heronpy.streamlet.impl.reducebykeyandwindowbolt import ReduceByKeyAndWindowBolt
+from heronpy.streamlet.impl.reducebywindowbolt import ReduceByWindowBolt
+from heronpy.streamlet.windowconfig import WindowConfig
+
+class MockDelegate(object):
+  def __init__(self):
+    self.logger = logging.getLogger(__name__)
+    self.emitted = []
+    self.acked = []
+
+  def emit(self, tup, stream, anchors, direct_task, need_task_ids):
+    self.emitted.append((tup, stream))
+
+  def ack(self, tup):
+    self.acked.append(tup)
+
+class ListWindowBolt(SlidingWindowBolt):
+  def processWindow(self, window_info, tuples):
+    self.emit([window_info, [tup.values[0] for tup in tuples]])
+
+class ListTumblingWindowBolt(TumblingWindowBolt):
+  def processWindow(self, window_info, tuples):
+    self.emit([window_info, [tup.values[0] for tup in tuples]])
+
+class IncrementalWindowBolt(SlidingWindowBolt):
+  def processWindowIncremental(self, window_info, added, expired):
+    self.emit([[tup.values[0] for tup in added], [tup.values[0] for tup in expired]])
+
+class SumWindowBolt(SlidingWindowBolt):
+  def aggregatePane(self, aggregate, tup):
+    return (aggregate or 0) + tup.values[0]
+
+  def processWindowAggregates(self, window_info, aggregates):
+    self.emit([aggregates])
+
+class SumPairWindowBolt(SlidingWindowBolt):
+  def aggregatePane(self, aggregate, tup):
+    return (aggregate or 0) + tup.values[0][1]
+
+  def processWindowAggregates(self, window_info, aggregates):
+    self.emit([aggregates])
+
+class ConcatWindowBolt(SlidingWindowBolt):
+  """Combines panes in order, which is associative but not commutative"""
+  def __init__(self, delegate):
+    super(ConcatWindowBolt, self).__init__(delegate)
+    self.num_combined = 0
+
+  def aggregatePane(self, aggregate, tup):
+    return (aggregate or ()) + (tup.values[0],)
+
+  def combineAggregates(self, older, newer):
+    self.num_combined += 1
+    return older + newer
+
+  def processWindowAggregates(self, window_info, aggregates):
+    self.emit([aggregates])
+
+class MockContext(object):
+  def __init__(self):
+    self.metrics = {}
+
+  def register_metric(self, name, metric, time_bucket_in_sec):
+    self.metrics[name] = metric
+
+def make_tuple(value, component="spout"):
+  return Tuple(id=str(value), component=component, stream="default", task=1, values=[value])
+
+class WindowBoltTestCase(unittest.TestCase):
+  def setUp(self):
+    self.now = 1000
+    patcher = patch("heronpy.api.bolt.window_bolt.time.time", side_effect=lambda: self.now)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def make_bolt(self, bolt_cls, duration, slide, saved_state=None):
+    delegate = MockDelegate()
+    bolt = bolt_cls(delegate)
+    if saved_state is not None:
+      bolt.init_state(saved_state)
+    bolt.initialize({SlidingWindowBolt.WINDOW_DURATION_SECS: duration,
+                     SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: slide}, None)
+    return bolt, delegate
+
+  def make_config_bolt(self, bolt_cls, config, saved_state=None, context=None):
+    delegate = MockDelegate()
+    bolt = bolt_cls(delegate)
+    if saved_state is not None:
+      bolt.init_state(saved_state)
+    bolt.initialize(config, context)
+    return bolt, delegate
+
+  def slide(self, bolt, values, slide):
+    for value in values:
+      bolt.process(make_tuple(value))
+    self.now += slide
+    bolt.process_tick(None)
+
+class SlidingWindowBoltTest(WindowBoltTestCase):
+  def test_process_window(self):
+    bolt, delegate = self.make_bolt(ListWindowBolt, 30, 10)
+    self.assertEqual(bolt.panes_per_window, 3)
+    for i in range(5):
+      self.slide(bolt, [i * 2, i * 2 + 1], 10)
+
+    windows = [values for (_, values), _ in delegate.emitted]
+    self.assertEqual(windows, [[0, 1], [0, 1, 2, 3], [0, 1, 2, 3, 4, 5],
+                               [2, 3, 4, 5, 6, 7], [4, 5, 6, 7, 8, 9]])
+    self.assertEqual(delegate.emitted[-1][0][0], (1020, 1050))
+    # tuples are acked once the last window they are part of is processed
+    self.assertEqual([tup.values[0] for tup in delegate.acked], [0, 1, 2, 3, 4, 5])
+
+  def test_process_window_incremental(self):
+    bolt, delegate = self.make_bolt(IncrementalWindowBolt, 20, 10)
+    for i in range(4):
+      self.slide(bolt, [i], 10)
+    self.assertEqual([values for values, _ in delegate.emitted],
+                     [[[0], []], [[1], []], [[2], [0]], [[3], [1]]])
+    self.assertEqual([tup.values[0] for tup in delegate.acked], [0, 1, 2])
+
+  def test_process_window_aggregates(self):
+    # a window duration that is not a multiple of the slide interval is rounded up
+    bolt, delegate = self.make_bolt(SumWindowBolt, 25, 10)
+    self.assertEqual(bolt.panes_per_window, 3)
+    self.slide(bolt, [1, 2], 10)
+    self.slide(bolt, [], 10)
+    self.slide(bolt, [3], 10)
+    self.slide(bolt, [4, 5], 10)
+    # empty panes are left out
+    self.assertEqual([values for values, _ in delegate.emitted],
+                     [[[3]], [[3]], [[3, 3]], [[3, 9]]])
+
+  def test_checkpoint(self):
+    saved_state = {}
+    bolt, _ = self.make_bolt(SumWindowBolt, 20, 10, saved_state)
+    self.slide(bolt, [1, 2], 10)
+    bolt.process(make_tuple(3))
+    bolt.pre_save("ckpt")
+
+    restored, delegate = self.make_bolt(SumWindowBolt, 20, 10, saved_state)
+    self.slide(restored, [4], 10)
+    self.assertEqual(delegate.emitted[0][0], [[3, 7]])
+
+  def test_restore_tuples(self):
+    # windows used to be checkpointed as (tuple, time) pairs
+    saved_state = {'tuples': [(make_tuple(1), 990), (make_tuple(2), 995)]}
+    bolt, delegate = self.make_bolt(SumWindowBolt, 20, 10, saved_state)
+    self.slide(bolt, [3], 10)
+    self.assertEqual(delegate.emitted[0][0], [[6]])
+
+  def test_combine_aggregates(self):
+    bolt, delegate = self.make_bolt(ConcatWindowBolt, 40, 10)
+    self.assertTrue(bolt.is_combining)
+    slides = [[i] if i % 3 else [] for i in range(20)]
+    for values in slides:
+      self.slide(bolt, values, 10)
+
+    for i, (window, _) in enumerate(delegate.emitted):
+      expected = tuple(value for values in slides[max(0, i - 3):i + 1] for value in values)
+      self.assertEqual(window, [[expected]] if expected else [[]])
+    # older panes are combined again once every 4 slides rather than on every slide
+    self.assertLess(bolt.num_combined, 3 * len(slides))
+
+  def test_combine_aggregates_checkpoint(self):
+    saved_state = {}
+    bolt, _ = self.make_bolt(ConcatWindowBolt, 30, 10, saved_state)
+    for i in range(4):
+      self.slide(bolt, [i], 10)
+    bolt.pre_save("ckpt")
+
+    restored, delegate = self.make_bolt(ConcatWindowBolt, 30, 10, saved_state)
+    for i in range(4, 7):
+      self.slide(restored, [i], 10)
+    self.assertEqual([window for window, _ in delegate.emitted],
+                     [[[(2, 3, 4)]], [[(3, 4, 5)]], [[(4, 5, 6)]]])
+
+class TumblingWindowBoltTest(WindowBoltTestCase):
+  def test_process_window(self):
+    delegate = MockDelegate()
+    bolt = ListTumblingWindowBolt(delegate)
+    config = {TumblingWindowBolt.WINDOW_DURATION_SECS: 10}
+    bolt.initialize(config, None)
+    self.assertEqual(config[api_constants.TOPOLOGY_TICK_TUPLE_FREQ_SECS], "10")
+    self.slide(bolt, [1, 2], 10)
+    self.slide(bolt, [3], 10)
+    self.assertEqual([values for (_, values), _ in delegate.emitted], [[1, 2], [3]])
+    self.assertEqual(delegate.emitted[-1][0][0], (1010, 1020))
+    # tuples are acked as soon as their window is processed
+    self.assertEqual([tup.values[0] for tup in delegate.acked], [1, 2, 3])
+
+  def test_restore_tuples(self):
+    # tumbling windows used to be checkpointed as a list of tuples
+    delegate = MockDelegate()
+    bolt = ListTumblingWindowBolt(delegate)
+    bolt.init_state({'tuples': [make_tuple(1), make_tuple(2)]})
+    bolt.initialize({TumblingWindowBolt.WINDOW_DURATION_SECS: 10}, None)
+    self.slide(bolt, [3], 10)
+    self.assertEqual(delegate.emitted[0][0][1], [1, 2, 3])
+
+  def test_late_tuples_updated(self):
+    delegate = MockDelegate()
+    bolt = ListTumblingWindowBolt(delegate)
+    bolt.initialize({TumblingWindowBolt.WINDOW_DURATION_SECS: 10,
+                     SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR: lambda tup: tup.values[0],
+                     SlidingWindowBolt.WINDOW_LATE_TUPLE_POLICY:
+                     SlidingWindowBolt.LATE_TUPLE_UPDATE}, None)
+    for timestamp in [100, 110]:
+      bolt.process(make_tuple(timestamp))
+    # the pane of a late tuple left with its window, so it is emitted rather than dropped
+    self.assertFalse(bolt.process(make_tuple(103)))
+    self.assertEqual(delegate.emitted, [([(100, 110), [100]], "default"),
+                                        ([103], SlidingWindowBolt.DEFAULT_LATE_TUPLE_STREAM)])
+
+class EventTimeWindowBoltTest(WindowBoltTestCase):
+  def make_event_time_bolt(self, bolt_cls, duration, slide, saved_state=None, **config):
+    delegate = MockDelegate()
+    bolt = bolt_cls(delegate)
+    if saved_state is not None:
+      bolt.init_state(saved_state)
+    config.update({SlidingWindowBolt.WINDOW_DURATION_SECS: duration,
+                   SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: slide,
+                   SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR: lambda tup: tup.values[0]})
+    bolt.initialize(config, None)
+    return bolt, delegate
+
+  def process(self, bolt, timestamps):
+    for timestamp in timestamps:
+      bolt.process(make_tuple(timestamp))
+
+  def test_watermark(self):
+    config = {SlidingWindowBolt.WINDOW_MAX_OUT_OF_ORDERNESS_SECS: 5}
+    bolt, delegate = self.make_event_time_bolt(ListWindowBolt, 20, 10, **config)
+    # no tick tuples are needed
+    self.assertNotIn(api_constants.TOPOLOGY_TICK_TUPLE_FREQ_SECS, config)
+    # tuples up to 5 seconds out of order are in time
+    self.process(bolt, [102, 111, 108, 114, 106])
+    self.assertEqual(delegate.emitted, [])
+    # the watermark passes the end of the first window at 115
+    self.process(bolt, [115])
+    self.assertEqual(delegate.emitted, [([(90, 110), [102, 108, 106]], "default")])
+    self.process(bolt, [125])
+    self.assertEqual(delegate.emitted[-1][0], [(100, 120), [102, 108, 106, 111, 114, 115]])
+    self.assertEqual([tup.values[0] for tup in delegate.acked], [102, 108, 106])
+
+  def test_idle_windows_skipped(self):
+    bolt, delegate = self.make_event_time_bolt(ListWindowBolt, 20, 10)
+    self.process(bolt, [100, 1000, 1010])
+    # windows holding the tuple are processed, and the empty ones up to the next tuple are not
+    self.assertEqual([window for (window, _), _ in delegate.emitted],
+                     [(90, 110), (100, 120), (990, 1010)])
+
+  def test_late_tuples_dropped(self):
+    bolt, delegate = self.make_event_time_bolt(ListWindowBolt, 20, 10)
+    self.process(bolt, [100, 110])
+    self.assertFalse(bolt.process(make_tuple(105)))
+    self.assertEqual([tup.values[0] for tup in delegate.acked], [105])
+    self.process(bolt, [120])
+    self.assertEqual(delegate.emitted[-1][0][1], [100, 110])
+
+  def test_late_tuples_emitted(self):
+    bolt, delegate = self.make_event_time_bolt(
+        ListWindowBolt, 20, 10, **{SlidingWindowBolt.WINDOW_LATE_TUPLE_POLICY:
+                                   SlidingWindowBolt.LATE_TUPLE_EMIT})
+    self.process(bolt, [100, 110, 105])
+    self.assertEqual(delegate.emitted[-1], ([105], SlidingWindowBolt.DEFAULT_LATE_TUPLE_STREAM))
+    self.assertEqual([tup.values[0] for tup in delegate.acked], [105])
+
+  def test_late_tuples_updated(self):
+    config = {SlidingWindowBolt.WINDOW_LATE_TUPLE_POLICY: SlidingWindowBolt.LATE_TUPLE_UPDATE}
+    bolt, delegate = self.make_event_time_bolt(ConcatWindowBolt, 30, 10, **config)
+    self.process(bolt, [100, 110, 120, 105, 115])
+    # late tuples are in the windows processed after them
+    self.process(bolt, [130])
+    self.assertEqual(delegate.emitted[-1][0], [[(100, 105, 110, 115, 120)]])
+    # unless their pane already left the window, in which case they are emitted
+    self.assertFalse(bolt.process(make_tuple(101)))
+    self.assertEqual(delegate.emitted[-1], ([101], SlidingWindowBolt.DEFAULT_LATE_TUPLE_STREAM))
+    self.process(bolt, [140])
+    self.assertEqual(delegate.emitted[-1][0], [[(110, 115, 120, 130)]])
+
+  def test_incremental_late_tuples_updated(self):
+    config = {SlidingWindowBolt.WINDOW_LATE_TUPLE_POLICY: SlidingWindowBolt.LATE_TUPLE_UPDATE}
+    bolt, delegate = self.make_event_time_bolt(IncrementalWindowBolt, 20, 10, **config)
+    self.process(bolt, [100, 110, 105, 120, 130])
+    self.assertEqual([values for values, _ in delegate.emitted],
+                     [[[100], []], [[105, 110], []], [[120], [100, 105]]])
+
+  def test_checkpoint(self):
+    saved_state = {}
+    config = {SlidingWindowBolt.WINDOW_MAX_OUT_OF_ORDERNESS_SECS: 10}
+    bolt, _ = self.make_event_time_bolt(SumWindowBolt, 20, 10, saved_state, **config)
+    self.process(bolt, [100, 110, 121])
+    bolt.pre_save("ckpt")
+
+    restored, delegate = self.make_event_time_bolt(SumWindowBolt, 20, 10, saved_state, **config)
+    self.process(restored, [119, 130])
+    self.assertEqual(delegate.emitted[0][0], [[100, 229]])
+
+  def test_join(self):
+    delegate = MockDelegate()
+    bolt = JoinBolt(delegate)
+    bolt.initialize({SlidingWindowBolt.WINDOW_DURATION_SECS: 20,
+                     SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: 10,
+                     SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR: lambda tup: tup.values[0][1],
+                     SlidingWindowBolt.WINDOW_MAX_OUT_OF_ORDERNESS_SECS: 10,
+                     JoinBolt.JOINEDCOMPONENT: "right",
+                     JoinBolt.JOINFUNCTION: lambda left, right: (left, right),
+                     JoinBolt.JOINTYPE: JoinBolt.INNER}, None)
+    bolt.process(make_tuple(["a", 100], "left"))
+    # the open pane of the right tuple is not joined in the window it is not part of
+    bolt.process(make_tuple(["a", 125], "right"))
+    bolt.process(make_tuple(["a", 112], "right"))
+    bolt.process(make_tuple(["a", 131], "left"))
+    emitted = [(tup[0][0]._window._end_time, tup[0][1]) for tup, _ in delegate.emitted]
+    self.assertEqual(emitted, [(120, (100, 112))])
+
+  def test_join_late_tuples_updated(self):
+    delegate = MockDelegate()
+    bolt = JoinBolt(delegate)
+    bolt.initialize({SlidingWindowBolt.WINDOW_DURATION_SECS: 30,
+                     SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: 10,
+                     SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR: lambda tup: tup.values[0][1],
+                     SlidingWindowBolt.WINDOW_LATE_TUPLE_POLICY:
+                     SlidingWindowBolt.LATE_TUPLE_UPDATE,
+                     JoinBolt.JOINEDCOMPONENT: "right",
+                     JoinBolt.JOINFUNCTION: lambda left, right: (left, right),
+                     JoinBolt.JOINTYPE: JoinBolt.INNER}, None)
+    for side, timestamp in [("left", 100), ("left", 110), ("left", 120), ("left", 105),
+                            ("left", 130), ("right", 135), ("left", 140)]:
+      bolt.process(make_tuple(["a", timestamp], side))
+    # the late tuple leaves the index with its pane, although it was indexed after later ones
+    emitted = sorted(tup[0][1] for tup, _ in delegate.emitted
+                     if tup[0][0]._window._end_time == 140)
+    self.assertEqual(emitted, [(110, 135), (120, 135), (130, 135)])
+
+  def test_join_new_pairs(self):
+    delegate = MockDelegate()
+    bolt = JoinBolt(delegate)
+    bolt.initialize({SlidingWindowBolt.WINDOW_DURATION_SECS: 20,
+                     SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: 10,
+                     SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR: lambda tup: tup.values[0][1],
+                     SlidingWindowBolt.WINDOW_MAX_OUT_OF_ORDERNESS_SECS: 20,
+                     JoinBolt.JOINEDCOMPONENT: "right",
+                     JoinBolt.JOINFUNCTION: lambda left, right: (left, right),
+                     JoinBolt.JOINTYPE: JoinBolt.OUTER,
+                     JoinBolt.EMITMODE: JoinBolt.EMIT_NEW_PAIRS}, None)
+    for side, timestamp in [("left", 130), ("left", 112), ("right", 131), ("right", 160),
+                            ("right", 145)]:
+      bolt.process(make_tuple(["a", timestamp], side))
+    # tuples are only joined if their panes share a window, whatever order they come in
+    emitted = [(tup[0][0]._window._end_time, tup[0][1]) for tup, _ in delegate.emitted]
+    self.assertEqual(emitted, [(140, (130, 131)), (130, (112, None)), (150, (130, 145))])
+
+class CountWindowBoltTest(WindowBoltTestCase):
+  def test_process_window(self):
+    config = WindowConfig.create_count_window(4, 2)._get_bolt_config()
+    bolt, delegate = self.make_config_bolt(ListWindowBolt, config)
+    self.assertNotIn(api_constants.TOPOLOGY_TICK_TUPLE_FREQ_SECS, config)
+    for i in range(7):
+      bolt.process(make_tuple(i))
+    self.assertEqual([values for (_, values), _ in delegate.emitted],
+                     [[0, 1], [0, 1, 2, 3], [2, 3, 4, 5]])
+    self.assertEqual([tup.values[0] for tup in delegate.acked], [0, 1, 2, 3])
+    # at most the tuples of the next window and the ones received since are held
+    self.assertEqual(bolt.num_tuples, 3)
+    # ticks do not slide windows counting tuples
+    bolt.process_tick(None)
+    self.assertEqual(len(delegate.emitted), 3)
+
+  def test_combine_aggregates(self):
+    bolt, delegate = self.make_config_bolt(
+        ConcatWindowBolt, WindowConfig.create_count_window(3, 1)._get_bolt_config())
+    for i in range(5):
+      bolt.process(make_tuple(i))
+    self.assertEqual([window for window, _ in delegate.emitted],
+                     [[[(0,)]], [[(0, 1)]], [[(0, 1, 2)]], [[(1, 2, 3)]], [[(2, 3, 4)]]])
+
+  def test_checkpoint(self):
+    saved_state = {}
+    config = WindowConfig.create_count_window(2)._get_bolt_config()
+    bolt, _ = self.make_config_bolt(SumWindowBolt, dict(config), saved_state)
+    bolt.process(make_tuple(1))
+    bolt.pre_save("ckpt")
+
+    restored, delegate = self.make_config_bolt(SumWindowBolt, dict(config), saved_state)
+    restored.process(make_tuple(2))
+    self.assertEqual(delegate.emitted[0][0], [[3]])
+
+  def test_event_time(self):
+    config = WindowConfig.create_count_window(2)._get_bolt_config()
+    config[SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR] = lambda tup: tup.values[0]
+    self.assertRaises(RuntimeError, self.make_config_bolt, ListWindowBolt, config)
+
+  def test_join(self):
+    delegate = MockDelegate()
+    bolt = JoinBolt(delegate)
+    config = {JoinBolt.JOINEDCOMPONENT: "right",
+              JoinBolt.JOINFUNCTION: lambda left, right: (left, right),
+              JoinBolt.JOINTYPE: JoinBolt.INNER,
+              JoinBolt.EMITMODE: JoinBolt.EMIT_NEW_PAIRS}
+    config.update(WindowConfig.create_count_window(2, 1)._get_bolt_config())
+    bolt.initialize(config, None)
+    bolt.process(make_tuple(["a", 1], "left"))
+    bolt.process(make_tuple(["a", 2], "right"))
+    bolt.process(make_tuple(["b", 3], "left"))
+    # the left tuple of "a" left the window of the last two tuples
+    bolt.process(make_tuple(["a", 4], "right"))
+    self.assertEqual([tup[0][1] for tup, _ in delegate.emitted], [(1, 2)])
+    self.assertEqual(sorted(bolt._index), ["a"])
+
+class SessionWindowBoltTest(WindowBoltTestCase):
+  def make_session_bolt(self, bolt_cls, gap, max_count=None, saved_state=None, **config):
+    config.update(WindowConfig.create_session_window(gap, max_count)._get_bolt_config())
+    config.setdefault(SlidingWindowBolt.WINDOW_SESSION_KEY_EXTRACTOR, lambda tup: tup.values[0][0])
+    return self.make_config_bolt(bolt_cls, config, saved_state)
+
+  def receive(self, bolt, key, value, after=0):
+    self.now += after
+    bolt.process(make_tuple([key, value]))
+
+  def test_sessions(self):
+    bolt, delegate = self.make_session_bolt(ListWindowBolt, 10)
+    self.assertEqual(bolt.panes_per_window, 1)
+    self.receive(bolt, "a", 1)
+    self.receive(bolt, "b", 2, after=5)
+    self.receive(bolt, "a", 3, after=3)
+    self.now += 8
+    bolt.process_tick(None)
+    self.assertEqual(delegate.emitted, [([(1005, 1015), [["b", 2]]], "default")])
+    self.now += 2
+    bolt.process_tick(None)
+    self.assertEqual(delegate.emitted[-1][0], [(1000, 1018), [["a", 1], ["a", 3]]])
+    self.assertEqual(bolt.sessions, {})
+    self.assertEqual(bolt.num_tuples, 0)
+    self.assertEqual(len(delegate.acked), 3)
+
+  def test_gap_ends_session(self):
+    bolt, delegate = self.make_session_bolt(ListWindowBolt, 10)
+    self.receive(bolt, "a", 1)
+    # a tuple received a gap after a session ends it, even if no tick came in between
+    self.receive(bolt, "a", 2, after=10)
+    self.assertEqual([values for (_, values), _ in delegate.emitted], [[["a", 1]]])
+    self.assertEqual(bolt.sessions["a"][0].tuples[0].values[0], ["a", 2])
+
+  def test_max_count(self):
+    bolt, delegate = self.make_session_bolt(ListWindowBolt, 10, max_count=2)
+    for value in range(5):
+      self.receive(bolt, "a", value, after=1)
+    self.assertEqual([len(values) for (_, values), _ in delegate.emitted], [2, 2])
+    self.assertEqual(bolt.num_tuples, 1)
+
+  def test_event_time(self):
+    bolt, delegate = self.make_session_bolt(
+        ListWindowBolt, 10, **{SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR:
+                               lambda tup: tup.values[0][1],
+                               SlidingWindowBolt.WINDOW_MAX_OUT_OF_ORDERNESS_SECS: 10})
+    for key, timestamp in [("a", 100), ("b", 103), ("a", 108), ("a", 104), ("b", 125)]:
+      bolt.process(make_tuple([key, timestamp]))
+    # the watermark at 115 ended the session of "b" at 113, but not the one of "a" at 118
+    self.assertEqual([window for (window, _), _ in delegate.emitted], [(103, 113)])
+    bolt.process(make_tuple(["c", 130]))
+    self.assertEqual(delegate.emitted[-1][0], [(100, 118), [["a", 100], ["a", 108], ["a", 104]]])
+    # a tuple whose session would have ended is late
+    self.assertFalse(bolt.process(make_tuple(["d", 100])))
+
+  def test_event_time_out_of_order(self):
+    bolt, delegate = self.make_session_bolt(
+        ListWindowBolt, 10, **{SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR:
+                               lambda tup: tup.values[0][1],
+                               SlidingWindowBolt.WINDOW_MAX_OUT_OF_ORDERNESS_SECS: 60})
+    # 105 is part of the session at 100, still open, and 141 merges the sessions at 125 and 150
+    for timestamp in [100, 150, 105, 125, 132, 141]:
+      self.assertTrue(bolt.process(make_tuple(["a", timestamp])))
+    self.assertEqual(delegate.emitted, [])
+    self.assertEqual(len(bolt.sessions["a"]), 2)
+    bolt.process(make_tuple(["a", 300]))
+    sessions = [(window, sorted(value for _, value in values))
+                for (window, values), _ in delegate.emitted]
+    self.assertEqual(sessions, [((100, 115), [100, 105]), ((125, 160), [125, 132, 141, 150])])
+    self.assertEqual(bolt.num_tuples, 1)
+    self.assertFalse(bolt.process(make_tuple(["a", 200])))
+
+  def test_checkpoint(self):
+    saved_state = {}
+    bolt, _ = self.make_session_bolt(SumPairWindowBolt, 10, saved_state=saved_state)
+    self.receive(bolt, "a", 1)
+    self.receive(bolt, "b", 2)
+    bolt.pre_save("ckpt")
+
+    restored, delegate = self.make_session_bolt(SumPairWindowBolt, 10, saved_state=saved_state)
+    self.assertEqual(restored.num_tuples, 2)
+    self.receive(restored, "a", 3, after=5)
+    self.now += 10
+    restored.process_tick(None)
+    self.assertEqual(sorted(window for window, _ in delegate.emitted), [[[2]], [[4]]])
+
+  def test_metric(self):
+    context = MockContext()
+    config = WindowConfig.create_session_window(10)._get_bolt_config()
+    bolt, _ = self.make_config_bolt(ListWindowBolt, config, context=context)
+    metric = context.metrics[SlidingWindowBolt.WINDOW_SIZE_METRIC]
+    self.assertEqual(metric.get_value_and_reset(), {'tuples': 0, 'panes': 0})
+    bolt.process(make_tuple(["a", 1]))
+    bolt.process(make_tuple(["b", 2]))
+    # without a key extractor, all the tuples are in a single session
+    self.assertEqual(metric.get_value_and_reset(), {'tuples': 2, 'panes': 1})
+
+  def test_reduce_by_key_and_window(self):
+    delegate = MockDelegate()
+    bolt = ReduceByKeyAndWindowBolt(delegate)
+    config = {ReduceByKeyAndWindowBolt.FUNCTION: lambda x, y: x + y}
+    config.update(WindowConfig.create_session_window(10)._get_bolt_config())
+    bolt.initialize(config, None)
+    self.receive(bolt, "a", 1)
+    self.receive(bolt, "b", 2, after=5)
+    self.receive(bolt, "a", 3, after=3)
+    self.now += 20
+    bolt.process_tick(None)
+    windows = sorted((tup[0][0]._key, tup[0][0]._window._start_time, tup[0][1])
+                     for tup, _ in delegate.emitted)
+    self.assertEqual(windows, [("a", 1000, 4), ("b", 1005, 2)])
+
+  def test_join(self):
+    for emit_mode in [JoinBolt.EMIT_WINDOW, JoinBolt.EMIT_NEW_PAIRS]:
+      delegate = MockDelegate()
+      bolt = JoinBolt(delegate)
+      config = {JoinBolt.JOINEDCOMPONENT: "right",
+                JoinBolt.JOINFUNCTION: lambda left, right: (left, right),
+                JoinBolt.JOINTYPE: JoinBolt.OUTER,
+                JoinBolt.EMITMODE: emit_mode}
+      config.update(WindowConfig.create_session_window(10)._get_bolt_config())
+      bolt.initialize(config, None)
+      bolt.process(make_tuple(["a", 1], "left"))
+      bolt.process(make_tuple(["b", 2], "left"))
+      self.now += 5
+      bolt.process(make_tuple(["a", 3], "right"))
+      self.now += 10
+      bolt.process_tick(None)
+      emitted = sorted((tup[0][0]._key, tup[0][1]) for tup, _ in delegate.emitted)
+      self.assertEqual(emitted, [("a", (1, 3)), ("b", (2, None))])
+      self.assertEqual(bolt._index, {})
+
+  def test_join_new_pairs_merged(self):
+    delegate = MockDelegate()
+    bolt = JoinBolt(delegate)
+    config = {JoinBolt.JOINEDCOMPONENT: "right",
+              JoinBolt.JOINFUNCTION: lambda left, right: (left, right),
+              JoinBolt.JOINTYPE: JoinBolt.INNER,
+              JoinBolt.EMITMODE: JoinBolt.EMIT_NEW_PAIRS,
+              SlidingWindowBolt.WINDOW_TIMESTAMP_EXTRACTOR: lambda tup: tup.values[0][1],
+              SlidingWindowBolt.WINDOW_MAX_OUT_OF_ORDERNESS_SECS: 60}
+    config.update(WindowConfig.create_session_window(10)._get_bolt_config())
+    bolt.initialize(config, None)
+    bolt.process(make_tuple(["a", 100], "left"))
+    bolt.process(make_tuple(["a", 115], "right"))
+    self.assertEqual(delegate.emitted, [])
+    # 108 merges the sessions, whose values are joined together
+    bolt.process(make_tuple(["a", 108], "left"))
+    emitted = sorted((tup[0][0]._window._start_time, tup[0][1]) for tup, _ in delegate.emitted)
+    self.assertEqual(emitted, [(100, (100, 115)), (100, (108, 115))])
+
+class WindowConfigTest(unittest.TestCase):
+  def test_count_window(self):
+    self.assertEqual(WindowConfig.create_count_window(10)._get_bolt_config(),
+                     {SlidingWindowBolt.WINDOW_COUNT: 10, SlidingWindowBolt.WINDOW_SLIDE_COUNT: 10})
+    self.assertRaises(RuntimeError, WindowConfig.create_count_window, 10, 3)
+    self.assertRaises(RuntimeError, WindowConfig.create_count_window, 0)
+
+  def test_session_window(self):
+    self.assertEqual(WindowConfig.create_session_window(30, 100)._get_bolt_config(),
+                     {SlidingWindowBolt.WINDOW_SESSION_GAP_SECS: 30,
+                      SlidingWindowBolt.WINDOW_SESSION_MAX_COUNT: 100})
+    self.assertRaises(RuntimeError, WindowConfig.create_session_window, "30")
+
+class ReduceBoltTest(WindowBoltTestCase):
+  def test_reduce_by_window(self):
+    delegate = MockDelegate()
+    bolt = ReduceByWindowBolt(delegate)
+    bolt.initialize({SlidingWindowBolt.WINDOW_DURATION_SECS: 20,
+                     SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: 10,
+                     ReduceByWindowBolt.FUNCTION: lambda x, y: (x or 0) + y}, None)
+    self.assertTrue(bolt.is_aggregating)
+    for values in ([1, 2], [], [3], [4, 5]):
+      self.slide(bolt, values, 10)
+    self.assertEqual([tup[0][1] for tup, _ in delegate.emitted], [3, 3, 3, 12])
+
+  def test_reduce_by_key_and_window(self):
+    delegate = MockDelegate()
+    bolt = ReduceByKeyAndWindowBolt(delegate)
+    bolt.initialize({SlidingWindowBolt.WINDOW_DURATION_SECS: 20,
+                     SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: 10,
+                     ReduceByKeyAndWindowBolt.FUNCTION: lambda x, y: x + y}, None)
+    for values in ([("a", 1), ("b", 2), ("a", 3)], [("b", 4)], [("c", 5)]):
+      self.slide(bolt, [list(value) for value in values], 10)
+
+    windows = []
+    for (tup, _) in delegate.emitted:
+      keyedwindow, result = tup[0]
+      windows.append((keyedwindow._window._end_time, keyedwindow._key, result))
+    self.assertEqual(sorted(windows), [(1010, "a", 4), (1010, "b", 2),
+                                       (1020, "a", 4), (1020, "b", 6),
+                                       (1030, "b", 4), (1030, "c", 5)])
+
+class JoinBoltTest(WindowBoltTestCase):
+  def make_join_bolt(self, join_type, emit_mode, saved_state=None):
+    delegate = MockDelegate()
+    bolt = JoinBolt(delegate)
+    if saved_state is not None:
+      bolt.init_state(saved_state)
+    bolt.initialize({SlidingWindowBolt.WINDOW_DURATION_SECS: 20,
+                     SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: 10,
+                     JoinBolt.JOINEDCOMPONENT: "right",
+                     JoinBolt.JOINFUNCTION: lambda left, right: (left, right),
+                     JoinBolt.JOINTYPE: join_type,
+                     JoinBolt.EMITMODE: emit_mode}, None)
+    return bolt, delegate
+
+  def join_slide(self, bolt, delegate, left, right):
+    for key, value in left:
+      bolt.process(make_tuple([key, value], "left"))
+    for key, value in right:
+      bolt.process(make_tuple([key, value], "right"))
+    self.now += 10
+    bolt.process_tick(None)
+    emitted = sorted((tup[0][0]._key, tup[0][1]) for tup, _ in delegate.emitted)
+    del delegate.emitted[:]
+    return emitted
+
+  def test_emit_window(self):
+    bolt, delegate = self.make_join_bolt(JoinBolt.INNER, JoinBolt.EMIT_WINDOW)
+    self.assertEqual(self.join_slide(bolt, delegate, [("a", 1), ("b", 2)], [("a", 3)]),
+                     [("a", (1, 3))])
+    # pairs of overlapping windows are emitted again
+    self.assertEqual(self.join_slide(bolt, delegate, [("a", 4)], [("b", 5)]),
+                     [("a", (1, 3)), ("a", (4, 3)), ("b", (2, 5))])
+    self.assertEqual(self.join_slide(bolt, delegate, [], []), [])
+    self.assertEqual(self.join_slide(bolt, delegate, [], []), [])
+    self.assertEqual(bolt._index, {})
+
+  def test_emit_new_pairs(self):
+    bolt, delegate = self.make_join_bolt(JoinBolt.INNER, JoinBolt.EMIT_NEW_PAIRS)
+    bolt.process(make_tuple(["a", 1], "left"))
+    self.assertEqual(delegate.emitted, [])
+    bolt.process(make_tuple(["a", 3], "right"))
+    # pairs are emitted as soon as both of their tuples are received
+    self.assertEqual(len(delegate.emitted), 1)
+    self.assertEqual(self.join_slide(bolt, delegate, [("b", 2)], []), [("a", (1, 3))])
+    self.assertEqual(self.join_slide(bolt, delegate, [("a", 4)], [("b", 5)]),
+                     [("a", (4, 3)), ("b", (2, 5))])
+    self.assertEqual(self.join_slide(bolt, delegate, [], [("a", 6)]), [("a", (4, 6))])
+
+  def test_emit_new_pairs_outer(self):
+    bolt, delegate = self.make_join_bolt(JoinBolt.OUTER, JoinBolt.EMIT_NEW_PAIRS)
+    self.assertEqual(self.join_slide(bolt, delegate, [("a", 1), ("b", 2)], [("c", 3)]), [])
+    # values that had no match are emitted when they leave the last window they are part of
+    self.assertEqual(self.join_slide(bolt, delegate, [], [("a", 4)]),
+                     [("a", (1, 4)), ("b", (2, None)), ("c", (None, 3))])
+    self.assertEqual(self.join_slide(bolt, delegate, [("a", 5)], []), [("a", (5, 4))])
+    self.assertEqual(self.join_slide(bolt, delegate, [("d", 6)], []), [])
+    self.assertEqual(self.join_slide(bolt, delegate, [], []), [("d", (6, None))])
+    self.assertEqual(bolt._index, {})
+
+  def test_restore(self):
+    saved_state = {}
+    bolt, delegate = self.make_join_bolt(JoinBolt.INNER, JoinBolt.EMIT_WINDOW, saved_state)
+    self.join_slide(bolt, delegate, [("a", 1)], [])
+    bolt.pre_save("ckpt")
+
+    restored, delegate = self.make_join_bolt(JoinBolt.INNER, JoinBolt.EMIT_WINDOW, saved_state)
+    self.assertEqual(self.join_slide(restored, delegate, [], [("a", 2)]), [("a", (1, 2))])
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+#  Licensed to the Apache Software Foundation (ASF) under one
+#  or more contributor license agreements.  See the NOTICE file
+#  distributed with this work for additional information
+#  regarding copyright ownership.  The ASF licenses this file
+#  to you under the Apache License, Version 2.0 (the
+#  "License"); you may not use this file except in compliance
+#  with the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+'''utils.py: helpers shared by the Python API and the instance'''
+
+def overrides(obj, cls, name):
+  """Returns whether the class of ``obj`` overrides the method ``name`` of ``cls``"""
+  method = getattr(type(obj), name, None)
+  base_method = getattr(cls, name)
+  # unbound methods wrap the function in Python 2
+  return getattr(method, '__func__', method) is not getattr(base_method, '__func__', base_method)
@@ -21,7 +21,7 @@
 """module for join bolt: JoinBolt"""
 import collections
 
-from heronpy.api.bolt.window_bolt import SlidingWindowBolt
+from heronpy.api.bolt.window_bolt import SlidingWindowBolt, WindowContext
 from heronpy.api.component.component_spec import GlobalStreamId
 from heronpy.api.custom_grouping import ICustomGrouping
 from heronpy.api.stream import Grouping
@@ -36,29 +36,41 @@ from heronpy.streamlet.impl.streamletboltbase import StreamletBoltBase
 # pylint: disable=unused-argument
 # pylint: disable=too-many-branches
 class JoinBolt(SlidingWindowBolt, StreamletBoltBase):
-  """JoinBolt"""
+  """JoinBolt
+
+  The values of the window are kept in an index of key -> (left values, right values),
+  updated as tuples enter and leave the window, rather than rebuilt on every slide.
+  Depending on EMITMODE, either the join of the whole window is emitted on every slide, or
+  each joined pair is emitted once, as soon as the second of its tuples is received. In
+  the latter case, the index holds the tuples of the next window to be processed as they
+  are received, and outer joins emit a value that had no match in it when it leaves the index.
+  In event time, tuples are received out of order, so the values are indexed with their pane
+  instead, and only joined with the values of panes less than a window apart.
+  Session windows are per join key, and the join of each session is emitted when it ends, or
+  its pairs are joined from the tuples of the session itself, as a tuple is added to it or
+  two sessions are merged.
+  """
 
   OUTER_LEFT = 1
   INNER = 2
   OUTER_RIGHT = 3
   OUTER = 4
+  # emits the join of the whole window on every slide
+  EMIT_WINDOW = 1
+  # emits each joined pair once, when the second of its tuples is received
+  EMIT_NEW_PAIRS = 2
   JOINFUNCTION = '__join_function__'
   JOINTYPE = '__join_type__'
+  EMITMODE = '__join_emit_mode__'
   WINDOWDURATION = SlidingWindowBolt.WINDOW_DURATION_SECS
   SLIDEINTERVAL = SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS
   JOINEDCOMPONENT = '__joined_component__'
 
-  def _add(self, key, value, src_component, mymap):
-    if not key in mymap:
-      mymap[key] = ([], [])
-    # Join Output should be Key -> (V1, V2) where
-    # V1 is coming from the left stream and V2 coming
-    # from the right stream. In this case, _joined_component
-    # represents the right stream
-    if src_component == self._joined_component:
-      mymap[key][1].append(value)
-    else:
-      mymap[key][0].append(value)
+  # indexes of the entry of a key in the index
+  LEFT = 0
+  RIGHT = 1
+  UNMATCHED_LEFT = 2
+  UNMATCHED_RIGHT = 3
 
   def initialize(self, config, context):
     super(JoinBolt, self).initialize(config, context)
@@ -71,16 +83,214 @@ class JoinBolt(SlidingWindowBolt, StreamletBoltBase):
     if not JoinBolt.JOINTYPE in config:
       raise RuntimeError("%s must be specified in the JoinBolt" % JoinBolt.JOINTYPE)
     self._join_type = config[JoinBolt.JOINTYPE]
+    self._emit_mode = config.get(JoinBolt.EMITMODE, JoinBolt.EMIT_WINDOW)
+    if self._emit_mode not in [JoinBolt.EMIT_WINDOW, JoinBolt.EMIT_NEW_PAIRS]:
+      raise RuntimeError("Unknown join emit mode %s" % str(self._emit_mode))
 
-  def processWindow(self, window_config, tuples):
-    # our temporary map
-    mymap = {}
+    # map <key -> [deque(left values), deque(right values), #unmatched left, #unmatched right]>
+    # where the unmatched values of a side, that no value of the other side was received
+    # since, are the last ones of its deque, or if the index is by pane
+    # map <key -> [list of [pane start, left value, matched], list of [...right value...]]>
+    self._index = {}
+    self._is_indexed_by_pane = self._emit_mode == JoinBolt.EMIT_NEW_PAIRS and \
+                               self.is_event_time and not self.is_session
+    # restored windows are indexed again
+    panes = list(self.panes)
+    if self._emit_mode == JoinBolt.EMIT_NEW_PAIRS and not self.is_session:
+      panes += self._get_open_panes()
+    for pane in panes:
+      for tup in pane.tuples:
+        if self._is_indexed_by_pane:
+          self._index_tuple_by_pane(tup, False)
+        else:
+          self._index_tuple(tup)
+
+  def _parse(self, tup):
+    """Returns the key, the value and the side of a tuple"""
+    userdata = tup.values[0]
+    if not isinstance(userdata, collections.Iterable) or len(userdata) != 2:
+      raise RuntimeError("Join tuples must be iterable of length 2")
+    # Join Output should be Key -> (V1, V2) where
+    # V1 is coming from the left stream and V2 coming
+    # from the right stream. In this case, _joined_component
+    # represents the right stream
+    side = JoinBolt.RIGHT if tup.component == self._joined_component else JoinBolt.LEFT
+    return userdata[0], userdata[1], side
+
+  def _index_tuple(self, tup):
+    """Adds a tuple to the index, and returns its key, value, side and the entry of its key"""
+    key, value, side = self._parse(tup)
+    entry = self._index.get(key)
+    if entry is None:
+      entry = self._index[key] = [collections.deque(), collections.deque(), 0, 0]
+    entry[side].append(value)
+    other = JoinBolt.RIGHT - side
+    if entry[other]:
+      entry[JoinBolt.UNMATCHED_LEFT + other] = 0
+    else:
+      entry[JoinBolt.UNMATCHED_LEFT + side] += 1
+    return key, value, side, entry
+
+  def _index_tuple_by_pane(self, tup, emit):
+    """Adds a tuple to the index by pane, joining it with the values of the other side whose
+    pane is less than a window apart, and emitting the pairs if ``emit``
+    """
+    key, value, side = self._parse(tup)
+    start = self._get_pane_start(self.timestamp_extractor(tup))
+    entry = self._index.get(key)
+    if entry is None:
+      entry = self._index[key] = [[], []]
+    indexed = [start, value, False]
+    span = self.panes_per_window * self.slide_interval
+    for other in entry[JoinBolt.RIGHT - side]:
+      if abs(other[0] - start) >= span:
+        continue
+      indexed[2] = other[2] = True
+      if emit:
+        # the pair is first part of the window ending with the later of their panes
+        end = max(start, other[0]) + self.slide_interval
+        keyedwindow = KeyedWindow(key, Window(end - self.window_duration, end))
+        if side == JoinBolt.LEFT:
+          result = self._join_function(value, other[1])
+        else:
+          result = self._join_function(other[1], value)
+        self.emit([(keyedwindow, result)], stream='output')
+    entry[side].append(indexed)
+
+  def _remove_pane_from_index(self, pane, window_config):
+    """Removes the values of a pane leaving the window from the index by pane, emitting the
+    ones that had no match
+    """
+    for key in set(self._parse(tup)[0] for tup in pane.tuples):
+      entry = self._index[key]
+      for side in [JoinBolt.LEFT, JoinBolt.RIGHT]:
+        kept = []
+        for indexed in entry[side]:
+          if indexed[0] != pane.start:
+            kept.append(indexed)
+          elif not indexed[2]:
+            self._emit_unmatched(key, indexed[1], side, window_config)
+        entry[side] = kept
+      if not entry[JoinBolt.LEFT] and not entry[JoinBolt.RIGHT]:
+        del self._index[key]
+
+  def _get_session_key(self, tup):
+    return self._parse(tup)[0]
+
+  def _on_tuple_added(self, tup, window_info, pane):
+    if self._emit_mode != JoinBolt.EMIT_NEW_PAIRS:
+      return
+    if self.is_session:
+      # a session holds values of its key only, all joined together
+      key, value, side = self._parse(tup)
+      others = [self._parse(other) for other in pane.tuples if other is not tup]
+      self._emit_pairs(key, [value] if side == JoinBolt.LEFT else
+                       [other[1] for other in others if other[2] == JoinBolt.LEFT],
+                       [value] if side == JoinBolt.RIGHT else
+                       [other[1] for other in others if other[2] == JoinBolt.RIGHT], window_info)
+      return
+    if self._is_indexed_by_pane:
+      self._index_tuple_by_pane(tup, True)
+      return
+    key, value, side, entry = self._index_tuple(tup)
+    others = entry[JoinBolt.RIGHT - side]
+    if others:
+      keyedwindow = KeyedWindow(key, Window(window_info.start, window_info.end))
+      for other in others:
+        if side == JoinBolt.LEFT:
+          result = self._join_function(value, other)
+        else:
+          result = self._join_function(other, value)
+        self.emit([(keyedwindow, result)], stream='output')
+
+  def _on_sessions_merged(self, session, other):
+    if self._emit_mode != JoinBolt.EMIT_NEW_PAIRS:
+      return
+    # the values of each session are joined with the ones of the other for the first time
+    key = session.key
+    values = self._get_values(session.tuples)
+    other_values = self._get_values(other.tuples)
+    window_info = WindowContext(min(session.start, other.start),
+                                max(session.end, other.end) + self.session_gap)
+    self._emit_pairs(key, values[0], other_values[1], window_info)
+    self._emit_pairs(key, other_values[0], values[1], window_info)
+
+  def _get_values(self, tuples):
+    """Returns the left and right values of tuples"""
+    values = ([], [])
     for tup in tuples:
-      userdata = tup.values[0]
-      if not isinstance(userdata, collections.Iterable) or len(userdata) != 2:
-        raise RuntimeError("Join tuples must be iterable of length 2")
-      self._add(userdata[0], userdata[1], tup.component, mymap)
-    for (key, values) in mymap.items():
+      _, value, side = self._parse(tup)
+      values[side].append(value)
+    return values
+
+  def _emit_pairs(self, key, left_values, right_values, window_info):
+    if left_values and right_values:
+      self.inner_join_and_emit(key, (left_values, right_values), window_info)
+
+  def processWindowIncremental(self, window_config, added, expired):
+    if self._emit_mode == JoinBolt.EMIT_NEW_PAIRS:
+      # the oldest pane is not part of the next window, whose tuples are indexed as received
+      if len(self.panes) < self.panes_per_window:
+        return
+      if self._is_indexed_by_pane:
+        self._remove_pane_from_index(self.panes[0], window_config)
+        return
+      leaving = self.panes[0].tuples
+    else:
+      leaving = expired
+      for tup in added:
+        self._index_tuple(tup)
+    self._remove_from_index(leaving, window_config)
+
+    if self._emit_mode == JoinBolt.EMIT_WINDOW:
+      self._emit_window(window_config)
+
+  def processWindow(self, window_config, tuples):
+    # only sessions are handed over whole, as they end
+    if self._emit_mode == JoinBolt.EMIT_WINDOW:
+      for tup in tuples:
+        self._index_tuple(tup)
+      self._emit_window(window_config)
+      self._index = {}
+    else:
+      # the values of a side are unmatched if the session has none of the other side
+      values = self._get_values(tuples)
+      for side in [JoinBolt.LEFT, JoinBolt.RIGHT]:
+        if not values[JoinBolt.RIGHT - side]:
+          for value in values[side]:
+            self._emit_unmatched(self._parse(tuples[0])[0], value, side, window_config)
+
+  def _remove_from_index(self, leaving, window_config):
+    """Removes tuples leaving the window from the index, emitting the values that had no match
+    if pairs are emitted as tuples are received
+    """
+    for tup in leaving:
+      key, value, side = self._parse(tup)
+      entry = self._index[key]
+      values = entry[side]
+      unmatched = len(values) <= entry[JoinBolt.UNMATCHED_LEFT + side]
+      if values[0] is value:
+        values.popleft()
+      else:
+        # a late tuple added to an older pane was indexed after the values of later panes
+        values.remove(value)
+      if unmatched:
+        entry[JoinBolt.UNMATCHED_LEFT + side] -= 1
+        if self._emit_mode == JoinBolt.EMIT_NEW_PAIRS:
+          self._emit_unmatched(key, value, side, window_config)
+      if not entry[JoinBolt.LEFT] and not entry[JoinBolt.RIGHT]:
+        del self._index[key]
+
+  def _emit_unmatched(self, key, value, side, window_config):
+    """Emits a value that never had a match while in the window, if the join type does"""
+    if side == JoinBolt.LEFT and self._join_type in [JoinBolt.OUTER_LEFT, JoinBolt.OUTER]:
+      self.outer_left_join_and_emit(key, ([value], []), window_config)
+    elif side == JoinBolt.RIGHT and self._join_type in [JoinBolt.OUTER_RIGHT, JoinBolt.OUTER]:
+      self.outer_right_join_and_emit(key, ([], [value]), window_config)
+
+  def _emit_window(self, window_config):
+    """Emits the join of the whole window"""
+    for (key, values) in self._index.items():
       if self._join_type == JoinBolt.INNER:
         if values[0] and values[1]:
           self.inner_join_and_emit(key, values, window_config)
@@ -131,6 +341,7 @@ class JoinBolt(SlidingWindowBolt, StreamletBoltBase):
 class JoinGrouping(ICustomGrouping):
   def prepare(self, context, component, stream, target_tasks):
     self.target_tasks = target_tasks
+    self._target_task_lists = [[task] for task in target_tasks]
 
   def choose_tasks(self, values):
     assert isinstance(values, list) and len(values) == 1
@@ -142,10 +353,22 @@ class JoinGrouping(ICustomGrouping):
     target_index = hashvalue % len(self.target_tasks)
     return [self.target_tasks[target_index]]
 
+  def choose_tasks_batch(self, values_list):
+    target_task_lists = self._target_task_lists
+    num_tasks = len(target_task_lists)
+    ret = []
+    for values in values_list:
+      userdata = values[0]
+      if not isinstance(userdata, collections.Iterable) or len(userdata) != 2:
+        raise RuntimeError("Tuples going to join must be iterable of length 2")
+      ret.append(target_task_lists[hash(userdata[0]) % num_tasks])
+    return ret
+
 # pylint: disable=protected-access
 class JoinStreamlet(Streamlet):
   """JoinStreamlet"""
-  def __init__(self, join_type, window_config, join_function, left, right):
+  def __init__(self, join_type, window_config, join_function, left, right,
+               emit_new_pairs=False):
     super(JoinStreamlet, self).__init__()
     if not join_type in [JoinBolt.INNER, JoinBolt.OUTER_RIGHT, JoinBolt.OUTER_LEFT]:
       raise RuntimeError("join type has to be of one of inner, outer, left")
@@ -158,6 +381,7 @@ class JoinStreamlet(Streamlet):
     if not isinstance(right, Streamlet):
       raise RuntimeError("Parent of Join has to be a Streamlet")
     self._join_type = join_type
+    self._emit_mode = JoinBolt.EMIT_NEW_PAIRS if emit_new_pairs else JoinBolt.EMIT_WINDOW
     self._window_config = window_config
     self._join_function = join_function
     self._left = left
@@ -181,11 +405,11 @@ class JoinStreamlet(Streamlet):
     if self.get_name() in stage_names:
       raise RuntimeError("Duplicate Names")
     stage_names.add(self.get_name())
+    config = {JoinBolt.JOINEDCOMPONENT : self._right.get_name(),
+              JoinBolt.JOINFUNCTION : self._join_function,
+              JoinBolt.JOINTYPE : self._join_type,
+              JoinBolt.EMITMODE : self._emit_mode}
+    config.update(self._window_config._get_bolt_config())
     builder.add_bolt(self.get_name(), JoinBolt, par=self.get_num_partitions(),
-                     inputs=self._calculate_inputs(),
-                     config={JoinBolt.WINDOWDURATION : self._window_config._window_duration.seconds,
-                             JoinBolt.SLIDEINTERVAL : self._window_config._slide_interval.seconds,
-                             JoinBolt.JOINEDCOMPONENT : self._right.get_name(),
-                             JoinBolt.JOINFUNCTION : self._join_function,
-                             JoinBolt.JOINTYPE : self._join_type})
+                     inputs=self._calculate_inputs(), config=config)
     return True
@@ -47,25 +47,37 @@ class ReduceByKeyAndWindowBolt(SlidingWindowBolt, StreamletBoltBase):
     if not callable(self.reduce_function):
       raise RuntimeError("Reduce Function has to be callable")
 
-  @staticmethod
-  def _add(key, value, mymap):
-    if key in mymap:
-      mymap[key].append(value)
+  def _get_session_key(self, tup):
+    return tup.values[0][0]
+
+  def aggregatePane(self, aggregate, tup):
+    # map <key -> reduced value> of the pane, updated as tuples are received
+    if aggregate is None:
+      aggregate = {}
+    userdata = tup.values[0]
+    if not isinstance(userdata, collections.Iterable) or len(userdata) != 2:
+      raise RuntimeError("ReduceByWindow tuples must be iterable of length 2")
+    key = userdata[0]
+    if key in aggregate:
+      aggregate[key] = self.reduce_function(aggregate[key], userdata[1])
     else:
-      mymap[key] = [value]
+      aggregate[key] = userdata[1]
+    return aggregate
 
-  def processWindow(self, window_config, tuples):
-    # our temporary map
-    mymap = {}
-    for tup in tuples:
-      userdata = tup.values[0]
-      if not isinstance(userdata, collections.Iterable) or len(userdata) != 2:
-        raise RuntimeError("ReduceByWindow tuples must be iterable of length 2")
-      self._add(userdata[0], userdata[1], mymap)
-    for (key, values) in mymap.items():
-      result = values[0]
-      for value in values[1:]:
-        result = self.reduce_function(result, value)
+  # the reduce function is associative, so the panes reduce to the same result as their tuples
+  def combineAggregates(self, older, newer):
+    combined = dict(older)
+    for (key, value) in newer.items():
+      if key in combined:
+        combined[key] = self.reduce_function(combined[key], value)
+      else:
+        combined[key] = value
+    return combined
+
+  def processWindowAggregates(self, window_config, aggregates):
+    if not aggregates:
+      return
+    for (key, result) in aggregates[0].items():
       keyedwindow = KeyedWindow(key, Window(window_config.start, window_config.end))
       self.emit([(keyedwindow, result)], stream='output')
 
@@ -73,6 +85,7 @@ class ReduceByKeyAndWindowBolt(SlidingWindowBolt, StreamletBoltBase):
 class ReduceGrouping(ICustomGrouping):
   def prepare(self, context, component, stream, target_tasks):
     self.target_tasks = target_tasks
+    self._target_task_lists = [[task] for task in target_tasks]
 
   def choose_tasks(self, values):
     assert isinstance(values, list) and len(values) == 1
@@ -84,6 +97,17 @@ class ReduceGrouping(ICustomGrouping):
     target_index = hashvalue % len(self.target_tasks)
     return [self.target_tasks[target_index]]
 
+  def choose_tasks_batch(self, values_list):
+    target_task_lists = self._target_task_lists
+    num_tasks = len(target_task_lists)
+    ret = []
+    for values in values_list:
+      userdata = values[0]
+      if not isinstance(userdata, collections.Iterable) or len(userdata) != 2:
+        raise RuntimeError("Tuples going to reduce must be iterable of length 2")
+      ret.append(target_task_lists[hash(userdata[0]) % num_tasks])
+    return ret
+
 # pylint: disable=protected-access
 class ReduceByKeyAndWindowStreamlet(Streamlet):
   """ReduceByKeyAndWindowStreamlet"""
@@ -109,11 +133,8 @@ class ReduceByKeyAndWindowStreamlet(Streamlet):
     if self.get_name() in stage_names:
       raise RuntimeError("Duplicate Names")
     stage_names.add(self.get_name())
+    config = {ReduceByKeyAndWindowBolt.FUNCTION : self._reduce_function}
+    config.update(self._window_config._get_bolt_config())
     builder.add_bolt(self.get_name(), ReduceByKeyAndWindowBolt, par=self.get_num_partitions(),
-                     inputs=self._calculate_inputs(),
-                     config={ReduceByKeyAndWindowBolt.FUNCTION : self._reduce_function,
-                             ReduceByKeyAndWindowBolt.WINDOWDURATION :
-                             self._window_config._window_duration.seconds,
-                             ReduceByKeyAndWindowBolt.SLIDEINTERVAL :
-                             self._window_config._slide_interval.seconds})
+                     inputs=self._calculate_inputs(), config=config)
     return True
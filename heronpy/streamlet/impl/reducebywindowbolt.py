@@ -44,11 +44,15 @@ class ReduceByWindowBolt(SlidingWindowBolt, StreamletBoltBase):
       raise RuntimeError("FUNCTION not specified in reducebywindow operator")
     self.reduce_function = config[ReduceByWindowBolt.FUNCTION]
 
-  def processWindow(self, window_config, tuples):
-    result = None
-    for tup in tuples:
-      userdata = tup.values[0]
-      result = self.reduce_function(result, userdata)
+  def aggregatePane(self, aggregate, tup):
+    return self.reduce_function(aggregate, tup.values[0])
+
+  # the reduce function is associative, so the panes reduce to the same result as their tuples
+  def combineAggregates(self, older, newer):
+    return self.reduce_function(older, newer)
+
+  def processWindowAggregates(self, window_config, aggregates):
+    result = aggregates[0] if aggregates else None
     self.emit([(Window(window_config.start, window_config.end), result)], stream='output')
 
 # pylint: disable=unused-argument
@@ -92,11 +96,8 @@ class ReduceByWindowStreamlet(Streamlet):
     if self.get_name() in stage_names:
       raise RuntimeError("Duplicate Names")
     stage_names.add(self.get_name())
+    config = {ReduceByWindowBolt.FUNCTION : self._reduce_function}
+    config.update(self._window_config._get_bolt_config())
     builder.add_bolt(self.get_name(), ReduceByWindowBolt, par=self.get_num_partitions(),
-                     inputs=self._calculate_inputs(),
-                     config={ReduceByWindowBolt.FUNCTION : self._reduce_function,
-                             ReduceByWindowBolt.WINDOWDURATION :
-                             self._window_config._window_duration.seconds,
-                             ReduceByWindowBolt.SLIDEINTERVAL :
-                             self._window_config._slide_interval.seconds})
+                     inputs=self._calculate_inputs(), config=config)
     return True
@@ -112,6 +112,10 @@ class Streamlet(object):
       over a window defined by window_config and then reduced using the reduce_function
       reduce_function takes two element at one time and reduces them to one element that
       is used in the subsequent operations.
+      reduce_function must be associative, i.e. reduce_function(reduce_function(a, b), c) ==
+      reduce_function(a, reduce_function(b, c)): the elements of a window are reduced in runs,
+      whose results are then reduced together, so a reduce_function that counts or otherwise
+      depends on its arguments being single elements gives wrong results.
     """
     from heronpy.streamlet.impl.reducebywindowbolt import ReduceByWindowStreamlet
     reduce_streamlet = ReduceByWindowStreamlet(window_config, reduce_function, self)
@@ -155,43 +159,59 @@ class Streamlet(object):
     self._add_child(consume_streamlet)
     return
 
-  def join(self, join_streamlet, window_config, join_function):
+  def join(self, join_streamlet, window_config, join_function, emit_new_pairs=False):
     """Return a new Streamlet by joining join_streamlet with this streamlet
+
+    If emit_new_pairs is set, each joined pair is emitted once, as soon as both of its
+    elements are received, rather than with every window it is part of
     """
     from heronpy.streamlet.impl.joinbolt import JoinStreamlet, JoinBolt
     join_streamlet_result = JoinStreamlet(JoinBolt.INNER, window_config,
-                                          join_function, self, join_streamlet)
+                                          join_function, self, join_streamlet,
+                                          emit_new_pairs)
     self._add_child(join_streamlet_result)
     join_streamlet._add_child(join_streamlet_result)
     return join_streamlet_result
 
-  def outer_right_join(self, join_streamlet, window_config, join_function):
+  def outer_right_join(self, join_streamlet, window_config, join_function, emit_new_pairs=False):
     """Return a new Streamlet by outer right join_streamlet with this streamlet
+
+    If emit_new_pairs is set, each joined pair is emitted once, as soon as both of its
+    elements are received, rather than with every window it is part of
     """
     from heronpy.streamlet.impl.joinbolt import JoinStreamlet, JoinBolt
     join_streamlet_result = JoinStreamlet(JoinBolt.OUTER_RIGHT, window_config,
-                                          join_function, self, join_streamlet)
+                                          join_function, self, join_streamlet,
+                                          emit_new_pairs)
     self._add_child(join_streamlet_result)
     join_streamlet._add_child(join_streamlet_result)
     return join_streamlet_result
 
-  def outer_left_join(self, join_streamlet, window_config, join_function):
+  def outer_left_join(self, join_streamlet, window_config, join_function, emit_new_pairs=False):
     """Return a new Streamlet by left join_streamlet with this streamlet
+
+    If emit_new_pairs is set, each joined pair is emitted once, as soon as both of its
+    elements are received, rather than with every window it is part of
     """
     from heronpy.streamlet.impl.joinbolt import JoinStreamlet, JoinBolt
     join_streamlet_result = JoinStreamlet(JoinBolt.OUTER_LEFT, window_config,
-                                          join_function, self, join_streamlet)
+                                          join_function, self, join_streamlet,
+                                          emit_new_pairs)
     self._add_child(join_streamlet_result)
     join_streamlet._add_child(join_streamlet_result)
     return join_streamlet_result
 
-  def outer_join(self, join_streamlet, window_config, join_function):
+  def outer_join(self, join_streamlet, window_config, join_function, emit_new_pairs=False):
     """Return a new Streamlet by outer join_streamlet with this streamlet
+
+    If emit_new_pairs is set, each joined pair is emitted once, as soon as both of its
+    elements are received, rather than with every window it is part of
     """
     from heronpy.streamlet.impl.joinbolt import JoinStreamlet, JoinBolt
 
     join_streamlet_result = JoinStreamlet(JoinBolt.OUTER, window_config,
-                                          join_function, self, join_streamlet)
+                                          join_function, self, join_streamlet,
+                                          emit_new_pairs)
     self._add_child(join_streamlet_result)
     join_streamlet._add_child(join_streamlet_result)
     return join_streamlet_result
@@ -199,6 +219,8 @@ class Streamlet(object):
   def reduce_by_key_and_window(self, window_config, reduce_function):
     """Return a new Streamlet in which each (key, value) pair of this Streamlet are collected
        over the time_window and then reduced using the reduce_function
+       reduce_function must be associative, as for reduce_by_window: the values of a key
+       are reduced in runs, whose results are then reduced together.
     """
     from heronpy.streamlet.impl.reducebykeyandwindowbolt import ReduceByKeyAndWindowStreamlet
     reduce_streamlet = ReduceByKeyAndWindowStreamlet(window_config, reduce_function, self)
@@ -22,10 +22,12 @@
 
 import datetime
 
+from heronpy.api.bolt.window_bolt import SlidingWindowBolt
+
 class WindowConfig(object):
   """WindowConfig allows streamlet API users to program window configuration for operations
-     that rely on windowing. Currently we only support time/count based
-     sliding/tumbling windows.
+     that rely on windowing. Currently we support time/count based sliding/tumbling windows,
+     and session windows of the tuples of a key received less than a gap apart.
   """
   def __init__(self, window_duration, slide_interval):
     self._window_duration = window_duration
@@ -33,6 +35,11 @@ class WindowConfig(object):
     if self._window_duration.microseconds > 0 or self._slide_interval.microseconds > 0:
       raise RuntimeError("Python Windowing curently only supports second resolution")
 
+  def _get_bolt_config(self):
+    """Returns the config of the window bolts for windows of this config"""
+    return {SlidingWindowBolt.WINDOW_DURATION_SECS: self._window_duration.seconds,
+            SlidingWindowBolt.WINDOW_SLIDEINTERVAL_SECS: self._slide_interval.seconds}
+
   @staticmethod
   def create_tumbling_window(window_duration):
     return WindowConfig(window_duration, window_duration)
@@ -48,3 +55,59 @@ class WindowConfig(object):
     if not isinstance(slide_interval, datetime.timedelta):
       raise RuntimeError("Slide Interval has to be of type datetime.timedelta")
     return WindowConfig(window_duration, slide_interval)
+
+  @staticmethod
+  def create_count_window(window_count, slide_count=None):
+    """Windows of the last window_count tuples, sliding every slide_count tuples, or tumbling
+    if slide_count is not given. A window holds at most window_count tuples at any time.
+    """
+    if slide_count is None:
+      slide_count = window_count
+    if not isinstance(window_count, int) or window_count <= 0:
+      raise RuntimeError("Window Count has to be a positive int")
+    if not isinstance(slide_count, int) or slide_count <= 0:
+      raise RuntimeError("Slide Count has to be a positive int")
+    if window_count % slide_count != 0:
+      raise RuntimeError("Window Count has to be a multiple of Slide Count")
+    return CountWindowConfig(window_count, slide_count)
+
+  @staticmethod
+  def create_session_window(session_gap, max_count=None):
+    """Sessions of the tuples of each key received less than session_gap apart, that end
+    once no tuple of the key is received for session_gap, or once they hold max_count tuples
+    if it is given
+    """
+    if isinstance(session_gap, int):
+      session_gap = datetime.timedelta(seconds=session_gap)
+    if not isinstance(session_gap, datetime.timedelta):
+      raise RuntimeError("Session Gap has to be of type datetime.timedelta")
+    if max_count is not None and (not isinstance(max_count, int) or max_count <= 0):
+      raise RuntimeError("Max Count has to be a positive int")
+    return SessionWindowConfig(session_gap, max_count)
+
+class CountWindowConfig(WindowConfig):
+  """WindowConfig of windows counting tuples"""
+  # pylint: disable=super-init-not-called
+  def __init__(self, window_count, slide_count):
+    self._window_count = window_count
+    self._slide_count = slide_count
+
+  def _get_bolt_config(self):
+    return {SlidingWindowBolt.WINDOW_COUNT: self._window_count,
+            SlidingWindowBolt.WINDOW_SLIDE_COUNT: self._slide_count}
+
+class SessionWindowConfig(WindowConfig):
+  """WindowConfig of session windows"""
+  # pylint: disable=super-init-not-called
+  def __init__(self, session_gap, max_count):
+    self._session_gap = session_gap
+    self._max_count = max_count
+    if self._session_gap.microseconds > 0:
+      raise RuntimeError("Python Windowing curently only supports second resolution")
+
+  def _get_bolt_config(self):
+    config = {SlidingWindowBolt.WINDOW_SESSION_GAP_SECS:
+              int(self._session_gap.total_seconds())}
+    if self._max_count is not None:
+      config[SlidingWindowBolt.WINDOW_SESSION_MAX_COUNT] = self._max_count
+    return config